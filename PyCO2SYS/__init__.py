@@ -19,6 +19,7 @@ from . import (
     api,
     bio,
     buffers,
+    cache,
     constants,
     convert,
     engine,
@@ -37,6 +38,7 @@ __all__ = [
     "api",
     "bio",
     "buffers",
+    "cache",
     "constants",
     "convert",
     "engine",
@@ -55,7 +57,8 @@ __version__ = meta.version
 
 # Aliases for top-level access
 from .engine import CO2SYS
-from .engine.nd import CO2SYS as sys
+from .engine.nd import CO2SYS as sys, CO2SYSPlan
+from .cache import ConstantsCache
 CO2SYS_nd = sys
 from .api import CO2SYS_wrap, CO2SYS_MATLABv3
 from .meta import say_hello  # because history
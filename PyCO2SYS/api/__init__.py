@@ -104,6 +104,7 @@ def CO2SYS_wrap(
     buffers_mode : str
         Which method to use to evaluate buffer factors.
         'auto'      =  automatic differentiation (DEFAULT)
+        'closed_form' = closed-form equations including all solutes
         'explicit'  =  explicit equations but without nutrient effects
         'none'      =  do not calculate buffers, return NaNs for them
 
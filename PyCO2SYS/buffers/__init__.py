@@ -3,40 +3,102 @@
 """Calculate various buffer factors of the marine carbonate system."""
 
 from autograd import numpy as np
-from autograd import elementwise_grad as egrad
+from autograd import elementwise_grad as egrad, make_jvp
+from autograd.builtins import tuple as agtuple
 from .. import solubility, solve
-from . import explicit
+from . import closed_form, explicit
 
-__all__ = ["explicit"]
+__all__ = ["closed_form", "explicit"]
 
 ilog10e = -1 / np.log10(np.exp(1))  # multiplier to convert pH to ln(H)
 
 
+def _forward(func, x):
+    """Differentiate `func` elementwise with respect to `x` in a single forward-mode
+    pass.  To get several derivatives at once, `func` should return an `agtuple`.
+    """
+    return make_jvp(func)(x)(np.ones_like(x))[1]
+
+
 @np.errstate(all="ignore")
 def _dlnOmega_dCARB(CARB, totals, Ks):
     """Function for d[ln(Omega)]/d[CARB].  Identical for calcite and aragonite."""
-    return egrad(lambda CARB: np.log(solubility.CaCO3(CARB, totals, Ks)[0]))(CARB)
+    return _forward(lambda CARB: np.log(solubility.CaCO3(CARB, totals, Ks)[0]), CARB)
 
 
-def all_ESM10(TA, TC, PH, CARB, Sal, TempK, Pbar, totals, Ks, WhichKs):
+def _pH_slopes(TA, TC, PH, totals, Ks, FC=None, get_ESM10=True):
+    """Get the derivatives with respect to pH that are needed for the ESM10 buffer
+    factors (if `get_ESM10`) and for the isocapnic quotient (if `FC` is provided), all
+    in a single forward-mode pass.
+
+    Total alkalinity is needed at up to three different TC values (zero, for TC from
+    TA and pH; `TC`; and TC from pH and `FC`), so these are stacked together into a
+    single call to the speciation function.
+    """
+    keys = []
+    if get_ESM10:
+        keys += ["TC__TA", "TA__TC", "lnCO2__TA", "lnCO2__TC", "CARB__TA", "CARB__TC"]
+    if FC is not None:
+        keys += ["TA__FC", "TC__FC"]
+    shape = solve.get._broadcast_shape(TC, PH, totals, Ks, FC)
+
+    def pH_functions(PH):
+        values = {}
+        TCs = []
+        if get_ESM10:
+            TCs += [0.0, TC]
+        if FC is not None:
+            values["TC__FC"] = solve.get.TCfrompHfCO2(PH, FC, totals, Ks)
+            TCs.append(values["TC__FC"])
+        if len(TCs) == 1:
+            TAs = [solve.get.TAfromTCpH(TCs[0], PH, totals, Ks)]
+        else:
+            TAs = solve.get.TAfromTCpH(
+                np.stack([np.broadcast_to(v, shape) for v in TCs]), PH, totals, Ks
+            )
+        if get_ESM10:
+            # TC from TA and pH, as in `solve.get.TCfromTApH`
+            H = 10.0 ** -PH
+            K1 = Ks["K1"]
+            K2 = Ks["K2"]
+            TC__TA = (
+                np.where(TAs[0] > TA, np.nan, TA - TAs[0])
+                * (H ** 2 + K1 * H + K1 * K2)
+                / (K1 * (H + 2 * K2))
+            )
+            values["TC__TA"] = TC__TA
+            values["TA__TC"] = TAs[1]
+            values["lnCO2__TA"] = np.log(
+                Ks["K0"] * solve.get.fCO2fromTCpH(TC__TA, PH, totals, Ks)
+            )
+            values["lnCO2__TC"] = np.log(
+                Ks["K0"] * solve.get.fCO2fromTCpH(TC, PH, totals, Ks)
+            )
+            values["CARB__TA"] = solve.get.CarbfromTCpH(TC__TA, PH, totals, Ks)
+            values["CARB__TC"] = solve.get.CarbfromTCpH(TC, PH, totals, Ks)
+        if FC is not None:
+            values["TA__FC"] = TAs[-1]
+        return agtuple([values[k] for k in keys])
+
+    return dict(zip(keys, _forward(pH_functions, PH)))
+
+
+def all_ESM10(TA, TC, PH, CARB, Sal, TempK, Pbar, totals, Ks, WhichKs, FC=None):
     """Get all ESM10 buffer factors with automatic differentiation.
 
-    This is more efficient than calculating each one separately because the number of
-    automatic differentiation steps is minimised.
+    This is more efficient than calculating each one separately because all the
+    derivatives are evaluated together in a single forward-mode pass.  If `FC` is
+    provided, then the isocapnic quotient is included in the same pass, with the key
+    `"isoQ"`.
     """
     # Get the pH differentials
-    dTC_dPH__TA = egrad(lambda PH: solve.get.TCfromTApH(TA, PH, totals, Ks))(PH)
-    dTA_dPH__TC = egrad(lambda PH: solve.get.TAfromTCpH(TC, PH, totals, Ks))(PH)
+    dX_dPH = _pH_slopes(TA, TC, PH, totals, Ks, FC=FC)
+    dTC_dPH__TA = dX_dPH["TC__TA"]
+    dTA_dPH__TC = dX_dPH["TA__TC"]
     # gammaTC is (d[ln(CO2)]/d[TC])^-1 with constant TA, i.e. γ_DIC of ESM10
-    dlnCO2_dPH__TA = egrad(
-        lambda PH: np.log(Ks["K0"] * solve.get.fCO2fromTApH(TA, PH, totals, Ks))
-    )(PH)
-    gammaTC = dTC_dPH__TA / dlnCO2_dPH__TA
+    gammaTC = dTC_dPH__TA / dX_dPH["lnCO2__TA"]
     # gammaTA is (d[ln(CO2)]/d[TA])^-1 with constant TC, i.e. γ_Alk of ESM10
-    dlnCO2_dPH__TC = egrad(
-        lambda PH: np.log(Ks["K0"] * solve.get.fCO2fromTCpH(TC, PH, totals, Ks))
-    )(PH)
-    gammaTA = dTA_dPH__TC / dlnCO2_dPH__TC
+    gammaTA = dTA_dPH__TC / dX_dPH["lnCO2__TC"]
     # betaTC is (d[ln(H)]/d[TC])^-1 with constant TA, i.e. β_DIC of ESM10
     betaTC = dTC_dPH__TA / ilog10e
     # betaTA is (d[ln(H)]/d[TA])^-1 with constant TC, i.e. β_Alk of ESM10
@@ -45,12 +107,10 @@ def all_ESM10(TA, TC, PH, CARB, Sal, TempK, Pbar, totals, Ks, WhichKs):
     # buffers.  Doesn't matter whether we use aragonite or calcite because of the log.
     dlnOmegaAr_dCARB = _dlnOmega_dCARB(CARB, totals, Ks)
     # omegaTC is (d[ln(OmegaAr)]/d[TC] with constant TA, i.e. ω_DIC of ESM10
-    dCARB_dPH__TA = egrad(lambda PH: solve.get.CarbfromTApH(TA, PH, totals, Ks))(PH)
-    omegaTC = dTC_dPH__TA / (dlnOmegaAr_dCARB * dCARB_dPH__TA)
+    omegaTC = dTC_dPH__TA / (dlnOmegaAr_dCARB * dX_dPH["CARB__TA"])
     # omegaTA is (d[ln(OmegaAr)]/d[TA] with constant TC, i.e. ω_Alk of ESM10
-    dCARB_dPH__TC = egrad(lambda PH: solve.get.CarbfromTCpH(TC, PH, totals, Ks))(PH)
-    omegaTA = dTA_dPH__TC / (dlnOmegaAr_dCARB * dCARB_dPH__TC)
-    return {
+    omegaTA = dTA_dPH__TC / (dlnOmegaAr_dCARB * dX_dPH["CARB__TC"])
+    ESM10 = {
         "gammaTC": gammaTC,
         "betaTC": betaTC,
         "omegaTC": omegaTC,
@@ -58,13 +118,15 @@ def all_ESM10(TA, TC, PH, CARB, Sal, TempK, Pbar, totals, Ks, WhichKs):
         "betaTA": betaTA,
         "omegaTA": omegaTA,
     }
+    if FC is not None:
+        ESM10["isoQ"] = dX_dPH["TA__FC"] / dX_dPH["TC__FC"]
+    return ESM10
 
 
 def isocap(TA, TC, PH, FC, totals, Ks):
     """d[TA]/d[TC] at constant fCO2, i.e. Q of HDW18."""
-    dTA_dPH__FC = egrad(lambda PH: solve.get.TAfrompHfCO2(PH, FC, totals, Ks))(PH)
-    dTC_dPH__FC = egrad(lambda PH: solve.get.TCfrompHfCO2(PH, FC, totals, Ks))(PH)
-    return dTA_dPH__FC / dTC_dPH__FC
+    dX_dPH = _pH_slopes(TA, TC, PH, totals, Ks, FC=FC, get_ESM10=False)
+    return dX_dPH["TA__FC"] / dX_dPH["TC__FC"]
 
 
 def psi(Q):
@@ -0,0 +1,114 @@
+# PyCO2SYS: marine carbonate system calculations in Python.
+# Copyright (C) 2020  Matthew Paul Humphreys et al.  (GNU GPLv3)
+"""Calculate various buffer factors of the marine carbonate system in closed form from
+the solved carbonate system, accounting for every component of total alkalinity.
+
+These give the same results as the automatic differentiation in `buffers`, but
+without tracing through the solver functions.  All the derivatives are taken with
+respect to [H+] (`h`) on the same pH scale as the equilibrium constants.
+"""
+
+from autograd import numpy as np
+from .. import solve
+
+
+@np.errstate(divide="ignore", invalid="ignore")
+def _slopes(TC, PH, totals, Ks):
+    """Evaluate the terms needed for all the buffer factors.
+
+    Returns a dict of:
+
+      * `"h"`: [H+].
+      * `"alk_noncarbonate"`: the non-carbonate components of total alkalinity.
+      * `"dalk_noncarbonate_dh"`: their derivative with respect to `h`.
+      * `"dTA_dh__TC"`: d[TA]/d[h] with constant TC.
+      * `"carbonate"`: the carbonate alkalinity per unit TC.
+      * `"dcarbonate_dh"`: its derivative with respect to `h`.
+      * `"dlnCO2_dh__TC"` and `"dlnCARB_dh__TC"`: d[ln(CO2)]/d[h] and
+        d[ln(CARB)]/d[h] with constant TC.
+      * `"CARB_TC"`: the fraction of TC that is carbonate ion.
+    """
+    h = 10.0 ** -PH
+    K1 = Ks["K1"]
+    K2 = Ks["K2"]
+    denom = h ** 2 + K1 * h + K1 * K2
+    alk_noncarbonate, dalk_noncarbonate = solve.get.alkalinity_noncarbonate(
+        h, totals, Ks
+    )
+    carbonate = K1 * (h + 2 * K2) / denom
+    dcarbonate_dh = -K1 * (h ** 2 + 4 * K2 * h + K1 * K2) / denom ** 2
+    dlnCARB_dh__TC = -(2 * h + K1) / denom
+    return {
+        "h": h,
+        "alk_noncarbonate": alk_noncarbonate,
+        "dTA_dh__TC": TC * dcarbonate_dh + dalk_noncarbonate,
+        "dalk_noncarbonate_dh": dalk_noncarbonate,
+        "carbonate": carbonate,
+        "dcarbonate_dh": dcarbonate_dh,
+        "dlnCO2_dh__TC": 2 / h + dlnCARB_dh__TC,
+        "dlnCARB_dh__TC": dlnCARB_dh__TC,
+        "CARB_TC": K1 * K2 / denom,
+    }
+
+
+@np.errstate(divide="ignore", invalid="ignore")
+def all_ESM10(TA, TC, PH, CARB, totals, Ks):
+    """Get all ESM10 buffer factors in closed form.
+
+    As in `buffers.all_ESM10`, the derivatives with constant TA use the TC that is
+    consistent with `TA` and `PH` (as from `solve.get.TCfromTApH`), while those with
+    constant TC use `TC` directly.
+    """
+    s = _slopes(TC, PH, totals, Ks)
+    h = s["h"]
+    # TC from TA and pH, and its derivative with respect to h with constant TA
+    alk_carbonate = np.where(
+        s["alk_noncarbonate"] > TA, np.nan, TA - s["alk_noncarbonate"]
+    )
+    TC_TA = alk_carbonate / s["carbonate"]
+    dTC_dh__TA = (
+        -(s["dalk_noncarbonate_dh"] + TC_TA * s["dcarbonate_dh"]) / s["carbonate"]
+    )
+    dTA_dh__TC = s["dTA_dh__TC"]
+    # gammaTC is (d[ln(CO2)]/d[TC])^-1 with constant TA, i.e. γ_DIC of ESM10
+    gammaTC = dTC_dh__TA / (dTC_dh__TA / TC_TA + s["dlnCO2_dh__TC"])
+    # gammaTA is (d[ln(CO2)]/d[TA])^-1 with constant TC, i.e. γ_Alk of ESM10
+    gammaTA = dTA_dh__TC / s["dlnCO2_dh__TC"]
+    # betaTC and betaTA are (d[ln(H)]/d[TC])^-1 and (d[ln(H)]/d[TA])^-1, i.e. β_DIC
+    # and β_Alk of ESM10
+    betaTC = h * dTC_dh__TA
+    betaTA = h * dTA_dh__TC
+    # omegaTC and omegaTA are (d[ln(Omega)]/d[TC])^-1 and (d[ln(Omega)]/d[TA])^-1,
+    # i.e. ω_DIC and ω_Alk of ESM10.  d[ln(Omega)]/d[CARB] is 1/CARB, but is written
+    # out in full so that it is NaN without calcium, because ln(Omega) is undefined.
+    # Doesn't matter whether we use aragonite or calcite because of the log.
+    dOmega_dCARB = totals["TCa"] / Ks["KAr"]
+    dlnOmega_dCARB = dOmega_dCARB / (CARB * dOmega_dCARB)
+    dCARB_dh__TA = s["CARB_TC"] * (dTC_dh__TA + TC_TA * s["dlnCARB_dh__TC"])
+    omegaTC = dTC_dh__TA / (dlnOmega_dCARB * dCARB_dh__TA)
+    dCARB_dh__TC = s["CARB_TC"] * TC * s["dlnCARB_dh__TC"]
+    omegaTA = dTA_dh__TC / (dlnOmega_dCARB * dCARB_dh__TC)
+    return {
+        "gammaTC": gammaTC,
+        "betaTC": betaTC,
+        "omegaTC": omegaTC,
+        "gammaTA": gammaTA,
+        "betaTA": betaTA,
+        "omegaTA": omegaTA,
+    }
+
+
+@np.errstate(divide="ignore", invalid="ignore")
+def isocap(TC, PH, FC, totals, Ks):
+    """Isocapnic quotient of HDW18, Eq. 8, in closed form."""
+    s = _slopes(TC, PH, totals, Ks)
+    h = s["h"]
+    # TC from pH and fCO2, as from `solve.get.TCfrompHfCO2`
+    TC_FC = Ks["K0"] * FC * (h ** 2 + Ks["K1"] * h + Ks["K1"] * Ks["K2"]) / h ** 2
+    dTC_dh__FC = -TC_FC * s["dlnCO2_dh__TC"]
+    dTA_dh__FC = (
+        s["carbonate"] * dTC_dh__FC
+        + TC_FC * s["dcarbonate_dh"]
+        + s["dalk_noncarbonate_dh"]
+    )
+    return dTA_dh__FC / dTC_dh__FC
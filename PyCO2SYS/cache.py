@@ -0,0 +1,241 @@
+# PyCO2SYS: marine carbonate system calculations in Python.
+# Copyright (C) 2020  Matthew Paul Humphreys et al.  (GNU GPLv3)
+"""Cache total salts and equilibrium constants for repeated conditions."""
+
+from collections import OrderedDict
+from threading import Lock
+from autograd import numpy as np
+from autograd.tracer import isbox
+from . import equilibria, salts
+
+# The `totals` that `equilibria.assemble` depends upon
+equilibria_totals = ["Sal", "TSO4", "TF"]
+
+
+def _columns(values):
+    """Split `values` into a dict of scalars and a dict of arrays, in key order."""
+    scalars = {}
+    arrays = {}
+    for k in sorted(values):
+        v = values[k]
+        if np.ndim(v) == 0:
+            scalars[k] = v.item() if hasattr(v, "item") else v
+        else:
+            arrays[k] = v
+    return scalars, arrays
+
+
+class ConstantsCache:
+    """Bounded least-recently-used cache of total salts and equilibrium constants.
+
+    The `salts` and `equilibria` methods take the same arguments as `salts.assemble`
+    and `equilibria.assemble`.  The rows of their array arguments are deduplicated,
+    any unique rows that are not already in the cache are evaluated together, and the
+    results are broadcast back to the full shape.  Each unique combination of
+    conditions, options and any provided `totals` or `Ks` values is one cache entry.
+    At most `maxsize` entries are kept, discarding the least recently used first.
+
+    The numbers of cache `hits` and `misses` are counted by unique row, and are
+    reported along with the current and maximum size by `info`.
+
+    If any argument is being traced by Autograd, the cache is bypassed.
+
+    The same cache can be used from several threads at once.  It can also be pickled,
+    for example to send it to the worker processes of a pool, each of which then has
+    its own copy.
+    """
+
+    def __init__(self, maxsize=4096):
+        assert maxsize > 0, "`maxsize` must be positive."
+        self.maxsize = maxsize
+        self._lock = Lock()
+        self.clear()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def clear(self):
+        """Empty the cache and reset the hit/miss statistics."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Report the cache hit/miss statistics, current size and maximum size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _lookup(self, label, func, values):
+        """Evaluate `func(**values)` once per unique row of `values`, using the cache.
+
+        `func` must return a dict.  Results that are scalars when `func` is evaluated
+        are returned as scalars; all others are broadcast to the shape of `values`.
+        If there are more unique rows than `maxsize`, most of them could not be kept,
+        so they are all evaluated together without using the cache.
+        """
+        scalars, arrays = _columns(values)
+        if any(isbox(v) for v in values.values()):
+            return func(**values)
+        if arrays:
+            shape = np.broadcast_shapes(*map(np.shape, arrays.values()))
+            if 0 in shape:
+                return func(**values)
+        else:
+            shape = ()
+        # Find the unique rows, with all NaNs in each column treated as the same value
+        label = (
+            label,
+            tuple((k, "nan" if v != v else v) for k, v in scalars.items()),
+            tuple(arrays.keys()),
+        )
+        if arrays:
+            matrix = np.stack(
+                [np.ravel(np.broadcast_to(v, shape)) for v in arrays.values()], axis=1
+            )
+            nans = np.isnan(matrix)
+            if np.any(nans):
+                matrix = np.concatenate([np.where(nans, 0, matrix), nans], axis=1)
+            if np.shape(matrix)[1] == 1:
+                unique, inverse = np.unique(np.ravel(matrix), return_inverse=True)
+                unique = np.vstack(unique)
+            else:
+                unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+            values_unique = unique[:, : len(arrays)]
+            if np.any(nans):
+                values_unique = np.where(
+                    unique[:, len(arrays) :], np.nan, values_unique
+                )
+        else:
+            unique = values_unique = np.empty((1, 0))
+            inverse = np.zeros(1, dtype=int)
+        inverse = np.ravel(inverse)
+        # Get rows from the cache where possible
+        found = {}
+        if len(unique) > self.maxsize:
+            keys = None
+            missing = np.arange(len(unique))
+            with self._lock:
+                self.misses += len(unique)
+        else:
+            keys = [(label, tuple(row)) for row in unique.tolist()]
+            missing = []
+            with self._lock:
+                for i, key in enumerate(keys):
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        found[i] = self._entries[key]
+                    else:
+                        missing.append(i)
+                self.hits += len(found)
+                self.misses += len(missing)
+        # Evaluate all the missing rows together and add them to the cache
+        if len(missing):
+            results = func(
+                **scalars,
+                **{
+                    k: values_unique[missing, j].astype(np.result_type(v))
+                    for j, (k, v) in enumerate(arrays.items())
+                }
+            )
+            columns = tuple(results)
+            scalar_keys = {k for k, v in results.items() if np.ndim(v) == 0}
+            results_missing = np.stack(
+                [np.broadcast_to(v, (len(missing),)) for v in results.values()], axis=1
+            )
+            if keys is not None:
+                with self._lock:
+                    for i, row in zip(missing, results_missing.tolist()):
+                        self._entries[keys[i]] = (row, columns, scalar_keys)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        else:
+            columns, scalar_keys = next(iter(found.values()))[1:]
+        # Put the results for each unique row together and broadcast them back to the
+        # full shape
+        results_unique = np.empty((len(unique), len(columns)))
+        if len(missing):
+            results_unique[missing] = results_missing
+        if found:
+            results_unique[list(found)] = [entry[0] for entry in found.values()]
+        return {
+            k: (
+                results_unique[0, j]
+                if k in scalar_keys
+                else np.reshape(results_unique[inverse, j], shape)
+            )
+            for j, k in enumerate(columns)
+        }
+
+    def salts(self, Sal, TSi, TPO4, TNH3, TH2S, WhichKs, WhoseTB, totals=None):
+        """Cached equivalent of `salts.assemble`."""
+        values = {
+            "Sal": Sal,
+            "TSi": TSi,
+            "TPO4": TPO4,
+            "TNH3": TNH3,
+            "TH2S": TH2S,
+            "WhichKs": WhichKs,
+            "WhoseTB": WhoseTB,
+        }
+        if totals is None:
+            totals = {}
+        values.update({"totals_" + k: v for k, v in totals.items()})
+
+        def assemble(**values):
+            totals = {
+                k[7:]: values.pop(k) for k in list(values) if k.startswith("totals_")
+            }
+            return salts.assemble(**values, totals=totals if totals else None)
+
+        return self._lookup("salts", assemble, values)
+
+    def equilibria(
+        self,
+        TempC,
+        Pdbar,
+        totals,
+        pHScale,
+        WhichKs,
+        WhoseKSO4,
+        WhoseKF,
+        WhichR,
+        Ks=None,
+    ):
+        """Cached equivalent of `equilibria.assemble`.
+
+        Only the `totals` in `equilibria_totals` are used as part of the cache key.
+        """
+        values = {
+            "TempC": TempC,
+            "Pdbar": Pdbar,
+            "pHScale": pHScale,
+            "WhichKs": WhichKs,
+            "WhoseKSO4": WhoseKSO4,
+            "WhoseKF": WhoseKF,
+            "WhichR": WhichR,
+        }
+        values.update({"totals_" + k: totals[k] for k in equilibria_totals})
+        if Ks is None:
+            Ks = {}
+        values.update({"Ks_" + k: v for k, v in Ks.items()})
+
+        def assemble(**values):
+            totals = {
+                k[7:]: values.pop(k) for k in list(values) if k.startswith("totals_")
+            }
+            Ks = {k[3:]: values.pop(k) for k in list(values) if k.startswith("Ks_")}
+            return equilibria.assemble(totals=totals, Ks=Ks if Ks else None, **values)
+
+        return self._lookup("equilibria", assemble, values)
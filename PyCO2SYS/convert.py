@@ -2,7 +2,6 @@
 # Copyright (C) 2020  Matthew Paul Humphreys et al.  (GNU GPLv3)
 """Convert units and calculate conversion factors."""
 
-import copy
 from autograd import numpy as np
 from . import constants
 from .equilibria import pressured
@@ -130,10 +129,15 @@ def pH2allscales(pH, pHScale, totals, k_constants):
 
 
 def sws2tot_P0(TempK, totals, k_constants, WhoseKSO4, WhoseKF):
-    """Determine SWS to Total pH scale correction factor at zero pressure."""
-    k_constants_P0 = copy.deepcopy(k_constants)
-    k_constants_P0["KSO4"] = pressured.KSO4(TempK, totals["Sal"], 0.0, 1.0, WhoseKSO4)
-    k_constants_P0["KF"] = pressured.KF(TempK, totals["Sal"], 0.0, 1.0, WhoseKF)
+    """Determine SWS to Total pH scale correction factor at zero pressure.
+
+    Only KSO4 and KF are needed for this, so these are evaluated at zero pressure on
+    their own.  `k_constants` is not used.
+    """
+    k_constants_P0 = {
+        "KSO4": pressured.KSO4(TempK, totals["Sal"], 0.0, 1.0, WhoseKSO4),
+        "KF": pressured.KF(TempK, totals["Sal"], 0.0, 1.0, WhoseKF),
+    }
     return sws2tot(totals, k_constants_P0)
 
 
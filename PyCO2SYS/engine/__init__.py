@@ -2,6 +2,7 @@
 # Copyright (C) 2020  Matthew Paul Humphreys et al.  (GNU GPLv3)
 """Helpers for the main CO2SYS program."""
 
+from concurrent.futures import ThreadPoolExecutor
 from autograd import numpy as np
 from .. import convert, equilibria, salts, solve
 from . import nd
@@ -394,6 +395,9 @@ def _CO2SYS(
     totals=None,
     equilibria_in=None,
     equilibria_out=None,
+    solver_tolerance=None,
+    solver_max_iter=None,
+    precomputed=None,
 ):
     # Aliases
     Kis = equilibria_in
@@ -443,39 +447,134 @@ def _CO2SYS(
     WhoseTB = args["BORON"]
     buffers_mode = args["buffers_mode"]
     WhichR = args["WhichR"]
+    # Use any precomputed total salts and equilibrium constants, and add those that are
+    # calculated here (see `nd._CO2SYS`)
+    if precomputed is None:
+        precomputed = {}
     # Prepare to solve the core marine carbonate system at input conditions
-    if totals is not None:
-        totals = condition(totals, npts=npts)[0]
-        totals = {k: v * 1e-6 for k, v in totals.items() if k != "SAL"}
-    totals = salts.assemble(
-        args["SAL"], TSi, TP, TNH3, TH2S, WhichKs, WhoseTB, totals=totals
-    )
-    if Kis is not None:
-        Kis = condition(Kis, npts=npts)[0]
-    Kis = equilibria.assemble(
-        TempCi, Pdbari, totals, pHScale, WhichKs, WhoseKSO4, WhoseKF, WhichR, Ks=Kis
-    )
-    if Kos is not None:
-        Kos = condition(Kos, npts=npts)[0]
-    Kos = equilibria.assemble(
-        TempCo, Pdbaro, totals, pHScale, WhichKs, WhoseKSO4, WhoseKF, WhichR, Ks=Kos
-    )
+    if "totals" in precomputed:
+        totals = precomputed["totals"]
+    else:
+        if totals is not None:
+            totals = condition(totals, npts=npts)[0]
+            totals = {k: v * 1e-6 for k, v in totals.items() if k != "SAL"}
+        totals = salts.assemble(
+            args["SAL"], TSi, TP, TNH3, TH2S, WhichKs, WhoseTB, totals=totals
+        )
+        precomputed["totals"] = totals
+    Kis_provided = {} if Kis is None else condition(Kis, npts=npts)[0]
+    Kos = {} if Kos is None else condition(Kos, npts=npts)[0]
+    # Find where the output conditions are the same as the input conditions
+    same = nd._same_rows(TempCi, Pdbari, TempCo, Pdbaro, Kis_provided, Kos)
+    # Where only the pressure differs, the intermediate values that do not depend on
+    # pressure can be reused from input conditions at output conditions
+    if (
+        not Kis_provided
+        and not Kos
+        and not np.all(same)
+        and np.all((TempCo == TempCi) | same)
+    ):
+        Ks_P0 = {}
+    else:
+        Ks_P0 = None
+    if "k_constants_in" in precomputed:
+        Kis = precomputed["k_constants_in"]
+    else:
+        Kis = equilibria.assemble(
+            TempCi,
+            Pdbari,
+            totals,
+            pHScale,
+            WhichKs,
+            WhoseKSO4,
+            WhoseKF,
+            WhichR,
+            Ks=Kis_provided if Kis_provided else None,
+            Ks_P0=Ks_P0,
+        )
+        precomputed["k_constants_in"] = Kis
     # Solve the core marine carbonate system at input conditions
-    core_in = solve.core(PAR1, PAR2, p1, p2, totals, Kis, True)
+    if solver_tolerance is None:
+        solver_tolerance = solve.get.pHTol
+    solver_kwargs = {"tolerance": solver_tolerance, "max_iter": solver_max_iter}
+    core_in = solve.core(PAR1, PAR2, p1, p2, totals, Kis, True, **solver_kwargs)
     # Calculate all other results at input conditions
     others_in = solve.others(
         core_in, TempCi, Pdbari, totals, Kis, pHScale, WhichKs, buffers_mode,
     )
-    # Solve the core MCS at output conditions
-    TAtype = np.full(npts, 1)
-    TCtype = np.full(npts, 2)
-    core_out = solve.core(
-        core_in["TA"], core_in["TC"], TAtype, TCtype, totals, Kos, False,
-    )
-    # Calculate all other results at output conditions
-    others_out = solve.others(
-        core_out, TempCo, Pdbaro, totals, Kos, pHScale, WhichKs, buffers_mode,
-    )
+    if np.all(same):
+        # Output conditions are the same as input conditions everywhere
+        Kos = Kis
+        core_out = core_in
+        others_out = others_in
+        precomputed.setdefault("k_constants_out", Kos)
+    else:
+        # Output conditions are evaluated only where they differ from input conditions
+        conditions_out = {
+            "TempC": TempCo,
+            "Pdbar": Pdbaro,
+            "totals": totals,
+            "pHScale": pHScale,
+            "WhichKs": WhichKs,
+            "WhoseKSO4": WhoseKSO4,
+            "WhoseKF": WhoseKF,
+            "WhichR": WhichR,
+            "Ks": Kos,
+            "Ks_P0": Ks_P0,
+        }
+        core_in_out = core_in
+        buffers_mode_out = buffers_mode
+        if np.any(same):
+            rows = ~same
+            conditions_out = nd._take_rows(conditions_out, rows)
+            conditions_out["totals"] = nd._take_rows(totals, rows)
+            conditions_out["Ks"] = nd._take_rows(Kos, rows)
+            if Ks_P0 is not None:
+                conditions_out["Ks_P0"] = nd._take_rows(Ks_P0, rows)
+            core_in_out = nd._take_rows(core_in, rows)
+            buffers_mode_out = buffers_mode[rows]
+        if not conditions_out["Ks"]:
+            conditions_out["Ks"] = None
+        if "k_constants_out" in precomputed:
+            Kos = precomputed["k_constants_out"]
+            if np.any(same):
+                Kos = nd._take_rows(Kos, rows)
+        else:
+            Kos = equilibria.assemble(**conditions_out)
+        # Solve the core MCS at output conditions
+        TAtype = np.full(np.shape(core_in_out["TA"]), 1)
+        TCtype = np.full(np.shape(core_in_out["TA"]), 2)
+        core_out = solve.core(
+            core_in_out["TA"],
+            core_in_out["TC"],
+            TAtype,
+            TCtype,
+            conditions_out["totals"],
+            Kos,
+            False,
+            **solver_kwargs,
+        )
+        # Calculate all other results at output conditions
+        others_out = solve.others(
+            core_out,
+            conditions_out["TempC"],
+            conditions_out["Pdbar"],
+            conditions_out["totals"],
+            Kos,
+            conditions_out["pHScale"],
+            conditions_out["WhichKs"],
+            buffers_mode_out,
+        )
+        # Reuse the results at input conditions wherever output conditions are the same
+        if np.any(same):
+            Kos = {k: nd._put_rows(rows, Kis[k], v) for k, v in Kos.items()}
+            core_out = {
+                k: nd._put_rows(rows, core_in[k], v) for k, v in core_out.items()
+            }
+            others_out = {
+                k: nd._put_rows(rows, others_in[k], v) for k, v in others_out.items()
+            }
+        precomputed.setdefault("k_constants_out", Kos)
     # Save data directly as a dict to avoid ordering issues
     return _outputdict(
         args, core_in, core_out, others_in, others_out, totals, Kis, Kos, buffers_mode
@@ -505,6 +604,9 @@ def CO2SYS(
     equilibria_in=None,
     equilibria_out=None,
     WhichR=1,
+    solver_tolerance=None,
+    solver_max_iter=None,
+    n_threads=None,
 ):
     """Solve the carbonate system using the input parameters.
 
@@ -513,35 +615,87 @@ def CO2SYS(
     later contributions from S.M.A.C. van Heuven, J.W.B. Rae, J.C. Orr, J.-M. Epitalon,
     A.G. Dickson, J.-P. Gattuso, and D. Pierrot.  Translated into Python and
     subsequently extended by M.P. Humphreys.
+
+    The optional `solver_tolerance` and `solver_max_iter` set the pH tolerance and
+    maximum number of iterations of the iterative TA-pH solvers for this call only.  If
+    `None`, they default to `solve.get.pHTol` and no limit respectively.
+
+    If `n_threads` is more than 1, then the inputs are split into chunks that are
+    solved in parallel in a pool of `n_threads` threads.
     """
     # Convert traditional inputs to new format before running CO2SYS
     KSO4CONSTANT, BORON = convert.options_old2new(KSO4CONSTANTS)
-    return _CO2SYS(
-        PAR1,
-        PAR2,
-        PAR1TYPE,
-        PAR2TYPE,
-        SAL,
-        TEMPIN,
-        TEMPOUT,
-        PRESIN,
-        PRESOUT,
-        SI,
-        PO4,
-        NH3,
-        H2S,
-        pHSCALEIN,
-        K1K2CONSTANTS,
-        KSO4CONSTANT,
-        KFCONSTANT,
-        BORON,
-        buffers_mode,
-        WhichR,
+    # Read the default tolerance only once, so that every chunk uses the same value
+    if solver_tolerance is None:
+        solver_tolerance = solve.get.pHTol
+    kwargs = dict(
+        PAR1=PAR1,
+        PAR2=PAR2,
+        PAR1TYPE=PAR1TYPE,
+        PAR2TYPE=PAR2TYPE,
+        SAL=SAL,
+        TEMPIN=TEMPIN,
+        TEMPOUT=TEMPOUT,
+        PRESIN=PRESIN,
+        PRESOUT=PRESOUT,
+        SI=SI,
+        PO4=PO4,
+        NH3=NH3,
+        H2S=H2S,
+        pHSCALEIN=pHSCALEIN,
+        K1K2CONSTANTS=K1K2CONSTANTS,
+        KSO4CONSTANT=KSO4CONSTANT,
+        KFCONSTANT=KFCONSTANT,
+        BORON=BORON,
+        buffers_mode=buffers_mode,
+        WhichR=WhichR,
         KSO4CONSTANTS=KSO4CONSTANTS,
         totals=totals,
         equilibria_in=equilibria_in,
         equilibria_out=equilibria_out,
+        solver_tolerance=solver_tolerance,
+        solver_max_iter=solver_max_iter,
+    )
+    if n_threads is None or n_threads == 1:
+        return _CO2SYS(**kwargs)
+    return _CO2SYS_threads(kwargs, n_threads)
+
+
+def _take_chunk(value, npts, chunk):
+    """Select the `chunk` slice from `value`, or from each value if it is a dict, if it
+    has `npts` elements, leaving it as it is otherwise.
+    """
+    if isinstance(value, dict):
+        return {k: _take_chunk(v, npts, chunk) for k, v in value.items()}
+    if np.size(value) == npts:
+        return np.ravel(value)[chunk]
+    return value
+
+
+def _CO2SYS_threads(kwargs, n_threads):
+    """Run `_CO2SYS` with `kwargs` split into chunks that are solved in a pool of
+    `n_threads` threads, with at least four chunks for each thread.
+    """
+    assert n_threads >= 1, "`n_threads` must be at least 1."
+    npts = max(
+        np.size(v)
+        for value in kwargs.values()
+        for v in (value.values() if isinstance(value, dict) else [value])
     )
+    chunk_size = -(-npts // (4 * n_threads))
+    chunks = [slice(i, i + chunk_size) for i in range(0, npts, chunk_size)]
+    if npts == 1 or len(chunks) == 1:
+        return _CO2SYS(**kwargs)
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        results = list(
+            executor.map(
+                lambda chunk: _CO2SYS(
+                    **{k: _take_chunk(v, npts, chunk) for k, v in kwargs.items()}
+                ),
+                chunks,
+            )
+        )
+    return {k: np.concatenate([r[k] for r in results]) for k in results[0]}
 
 
 def dict2totals(co2dict):
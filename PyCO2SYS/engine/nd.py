@@ -2,7 +2,14 @@
 # Copyright (C) 2020  Matthew Paul Humphreys et al.  (GNU GPLv3)
 """Carbonate system solving in N dimensions."""
 
+import itertools, os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
 from autograd import numpy as np
+from numpy.lib.format import open_memmap
 from .. import equilibria, salts, solve
 
 # Define function input keys that should be converted to floats
@@ -63,6 +70,43 @@ input_floats = {
     "total_beta",
     "k_beta",
     "k_beta_out",
+    "pH_guess",
+    "pH_guess_out",
+}
+
+
+# Map optional totals and equilibrium constant args onto their internal keys
+totals_optional = {
+    "total_borate": "TB",
+    "total_calcium": "TCa",
+    "total_fluoride": "TF",
+    "total_sulfate": "TSO4",
+    "total_alpha": "alpha",
+    "total_beta": "beta",
+}
+k_constants_optional = {
+    "fugacity_factor": "FugFac",
+    "gas_constant": "RGas",
+    "k_ammonia": "KNH3",
+    "k_borate": "KB",
+    "k_bisulfate": "KSO4",
+    "k_CO2": "K0",
+    "k_carbonic_1": "K1",
+    "k_carbonic_2": "K2",
+    "k_fluoride": "KF",
+    "k_phosphate_1": "KP1",
+    "k_phosphate_2": "KP2",
+    "k_phosphate_3": "KP3",
+    "k_silicate": "KSi",
+    "k_sulfide": "KH2S",
+    "k_water": "KW",
+    "k_calcite": "KCa",
+    "k_aragonite": "KAr",
+    "k_alpha": "alpha",
+    "k_beta": "beta",
+}
+k_constants_optional_out = {
+    "{}_out".format(k): v for k, v in k_constants_optional.items()
 }
 
 
@@ -80,13 +124,15 @@ def broadcast1024(*args):
         )
 
 
-def condition(args, to_shape=None):
+def condition(args, to_shape=None, broadcast=True):
     """Condition n-d args for PyCO2SYS.
     
     If NumPy can broadcast the args together, they are a valid combination, and they
     will be combined following NumPy broadcasting rules.
 
-    All array-like args will be broadcast into the same shape.
+    All array-like args will be broadcast into the same shape, unless `broadcast` is
+    `False`, in which case they are kept at their own shapes (so that everything
+    calculated from them has the smallest shape that it can).
     Any scalar args will be left as scalars.
     """
     try:  # check all args can be broadcast together
@@ -101,11 +147,16 @@ def condition(args, to_shape=None):
                 return
         else:
             args_broadcast_shape = args_broadcast.shape
-        # Broadcast the non-scalar args to a consistent shape
-        args_conditioned = {
-            k: np.broadcast_to(v, args_broadcast_shape) if not np.isscalar(v) else v
-            for k, v in args.items()
-        }
+        # Broadcast the non-scalar args to a consistent shape, if requested
+        if broadcast:
+            args_conditioned = {
+                k: np.broadcast_to(v, args_broadcast_shape) if not np.isscalar(v) else v
+                for k, v in args.items()
+            }
+        else:
+            args_conditioned = {
+                k: np.asarray(v) if not np.isscalar(v) else v for k, v in args.items()
+            }
         # Convert to float, where needed
         args_conditioned = {
             k: np.float64(v) if k in input_floats else v
@@ -117,147 +168,970 @@ def condition(args, to_shape=None):
     return args_conditioned
 
 
-def _get_in_out(core, others, k_constants, suffix=""):
-    io = {
-        "pH": core["PH"],
-        "pCO2": core["PC"] * 1e6,
-        "fCO2": core["FC"] * 1e6,
-        "bicarbonate": core["HCO3"] * 1e6,
-        "carbonate": core["CARB"] * 1e6,
-        "aqueous_CO2": core["CO2"] * 1e6,
-        "alkalinity_borate": others["BAlk"] * 1e6,
-        "hydroxide": others["OH"] * 1e6,
-        "alkalinity_phosphate": others["PAlk"] * 1e6,
-        "alkalinity_silicate": others["SiAlk"] * 1e6,
-        "alkalinity_ammonia": others["NH3Alk"] * 1e6,
-        "alkalinity_sulfide": others["H2SAlk"] * 1e6,
-        "hydrogen_free": others["Hfree"] * 1e6,
-        "revelle_factor": others["Revelle"],
-        "saturation_calcite": others["OmegaCa"],
-        "saturation_aragonite": others["OmegaAr"],
-        "xCO2": others["xCO2dry"] * 1e6,
-        "pH_total": others["pHT"],
-        "pH_sws": others["pHS"],
-        "pH_free": others["pHF"],
-        "pH_nbs": others["pHN"],
-        "k_CO2": k_constants["K0"],
-        "k_carbonic_1": k_constants["K1"],
-        "k_carbonic_2": k_constants["K2"],
-        "k_water": k_constants["KW"],
-        "k_borate": k_constants["KB"],
-        "k_bisulfate": k_constants["KSO4"],
-        "k_fluoride": k_constants["KF"],
-        "k_phosphoric_1": k_constants["KP1"],
-        "k_phosphoric_2": k_constants["KP2"],
-        "k_phosphoric_3": k_constants["KP3"],
-        "k_silicate": k_constants["KSi"],
-        "k_ammonia": k_constants["KNH3"],
-        "k_sulfide": k_constants["KH2S"],
-        "k_calcite": k_constants["KCa"],
-        "k_aragonite": k_constants["KAr"],
-        "gamma_dic": others["gammaTC"],
-        "beta_dic": others["betaTC"],
-        "omega_dic": others["omegaTC"],
-        "gamma_alk": others["gammaTA"],
-        "beta_alk": others["betaTA"],
-        "omega_alk": others["omegaTA"],
-        "isocapnic_quotient": others["isoQ"],
-        "isocapnic_quotient_approx": others["isoQx"],
-        "psi": others["psi"],
-        "substrate_inhibitor_ratio": others["SIR"],
-        "fugacity_factor": k_constants["FugFac"],
-        "fH": k_constants["fH"],
-        # Added in v1.6.0:
-        "k_alpha": k_constants["alpha"],
-        "alkalinity_alpha": others["alk_alpha"] * 1e6,
-        "k_beta": k_constants["beta"],
-        "alkalinity_beta": others["alk_beta"] * 1e6,
+# Results at input/output conditions: (source dict, key in source dict, unit factor)
+in_out_results = {
+    "pH": ("core", "PH", None),
+    "pCO2": ("core", "PC", 1e6),
+    "fCO2": ("core", "FC", 1e6),
+    "bicarbonate": ("core", "HCO3", 1e6),
+    "carbonate": ("core", "CARB", 1e6),
+    "aqueous_CO2": ("core", "CO2", 1e6),
+    "alkalinity_borate": ("others", "BAlk", 1e6),
+    "hydroxide": ("others", "OH", 1e6),
+    "alkalinity_phosphate": ("others", "PAlk", 1e6),
+    "alkalinity_silicate": ("others", "SiAlk", 1e6),
+    "alkalinity_ammonia": ("others", "NH3Alk", 1e6),
+    "alkalinity_sulfide": ("others", "H2SAlk", 1e6),
+    "hydrogen_free": ("others", "Hfree", 1e6),
+    "revelle_factor": ("others", "Revelle", None),
+    "saturation_calcite": ("others", "OmegaCa", None),
+    "saturation_aragonite": ("others", "OmegaAr", None),
+    "xCO2": ("others", "xCO2dry", 1e6),
+    "pH_total": ("others", "pHT", None),
+    "pH_sws": ("others", "pHS", None),
+    "pH_free": ("others", "pHF", None),
+    "pH_nbs": ("others", "pHN", None),
+    "k_CO2": ("k_constants", "K0", None),
+    "k_carbonic_1": ("k_constants", "K1", None),
+    "k_carbonic_2": ("k_constants", "K2", None),
+    "k_water": ("k_constants", "KW", None),
+    "k_borate": ("k_constants", "KB", None),
+    "k_bisulfate": ("k_constants", "KSO4", None),
+    "k_fluoride": ("k_constants", "KF", None),
+    "k_phosphoric_1": ("k_constants", "KP1", None),
+    "k_phosphoric_2": ("k_constants", "KP2", None),
+    "k_phosphoric_3": ("k_constants", "KP3", None),
+    "k_silicate": ("k_constants", "KSi", None),
+    "k_ammonia": ("k_constants", "KNH3", None),
+    "k_sulfide": ("k_constants", "KH2S", None),
+    "k_calcite": ("k_constants", "KCa", None),
+    "k_aragonite": ("k_constants", "KAr", None),
+    "gamma_dic": ("others", "gammaTC", None),
+    "beta_dic": ("others", "betaTC", None),
+    "omega_dic": ("others", "omegaTC", None),
+    "gamma_alk": ("others", "gammaTA", None),
+    "beta_alk": ("others", "betaTA", None),
+    "omega_alk": ("others", "omegaTA", None),
+    "isocapnic_quotient": ("others", "isoQ", None),
+    "isocapnic_quotient_approx": ("others", "isoQx", None),
+    "psi": ("others", "psi", None),
+    "substrate_inhibitor_ratio": ("others", "SIR", None),
+    "fugacity_factor": ("k_constants", "FugFac", None),
+    "fH": ("k_constants", "fH", None),
+    # Added in v1.6.0:
+    "k_alpha": ("k_constants", "alpha", None),
+    "alkalinity_alpha": ("others", "alk_alpha", 1e6),
+    "k_beta": ("k_constants", "beta", None),
+    "alkalinity_beta": ("others", "alk_beta", 1e6),
+}
+# Chemical speciation results, all converted from mol/kg-sw to μmol/kg-sw
+speciation_results = [
+    "HCO3",
+    "CO3",
+    "CO2",
+    "BOH4",
+    "BOH3",
+    "OH",
+    "Hfree",
+    "H3PO4",
+    "H2PO4",
+    "HPO4",
+    "PO4",
+    "H3SiO4",
+    "H4SiO4",
+    "NH3",
+    "NH4",
+    "HS",
+    "H2S",
+    "HSO4",
+    "SO4",
+    "HF",
+    "F",
+    "alpha",
+    "alphaH",
+    "beta",
+    "betaH",
+]
+# Results that are not specific to input or output conditions: (source dict, key in
+# source dict, unit factor)
+fixed_results = {
+    "par1": ("args", "par1", None),
+    "par2": ("args", "par2", None),
+    "par1_type": ("args", "par1_type", None),
+    "par2_type": ("args", "par2_type", None),
+    "opt_k_bisulfate": ("args", "opt_k_bisulfate", None),
+    "opt_k_carbonic": ("args", "opt_k_carbonic", None),
+    "opt_k_fluoride": ("args", "opt_k_fluoride", None),
+    "opt_total_borate": ("args", "opt_total_borate", None),
+    "opt_gas_constant": ("args", "opt_gas_constant", None),
+    "opt_pH_scale": ("args", "opt_pH_scale", None),
+    "buffers_mode": ("args", "buffers_mode", None),
+    "salinity": ("totals", "Sal", None),
+    "temperature": ("args", "temperature", None),
+    "pressure": ("args", "pressure", None),
+    "total_ammonia": ("totals", "TNH3", 1e6),
+    "total_borate": ("totals", "TB", 1e6),
+    "total_calcium": ("totals", "TCa", 1e6),
+    "total_fluoride": ("totals", "TF", 1e6),
+    "total_phosphate": ("totals", "TPO4", 1e6),
+    "total_silicate": ("totals", "TSi", 1e6),
+    "total_sulfate": ("totals", "TSO4", 1e6),
+    "total_sulfide": ("totals", "TH2S", 1e6),
+    "peng_correction": ("totals", "PengCorrection", 1e6),
+    "gas_constant": ("k_constants", "RGas", None),
+    "alkalinity": ("core", "TA", 1e6),
+    "dic": ("core", "TC", 1e6),
+    # Added in v1.6.0:
+    "total_alpha": ("totals", "alpha", 1e6),
+    "total_beta": ("totals", "beta", 1e6),
+}
+# Solver diagnostics at input/output conditions: (key in core dict, unit factor)
+solver_results = {
+    "solver_converged": ("solver_converged", None),
+    "solver_iterations": ("solver_iterations", None),
+    "solver_delta_pH": ("solver_deltapH", None),
+    "solver_residual": ("solver_residual", 1e6),
+}
+# Keys of the `solve.others` dict that are calculated together when they are evaluated
+# lazily, because they share most of their intermediate steps
+others_groups = [set(solve.esm10buffers) | {"isoQ", "Revelle", "psi"}]
+
+
+def _others_outputs(outputs, suffix=""):
+    """Find which `solve.others` keys are needed for the requested `outputs`."""
+    if outputs is None:
+        return None
+    others_outputs = set()
+    for output in outputs:
+        if suffix:
+            if not output.endswith(suffix):
+                continue
+            output = output[: -len(suffix)]
+        elif output.endswith("_out"):
+            continue
+        if output in in_out_results:
+            source, key, factor = in_out_results[output]
+            if source == "others":
+                others_outputs.add(key)
+        elif output in speciation_results:
+            others_outputs.add(output)
+    return others_outputs
+
+
+class _LazyOthers:
+    """Results of `solve.others`, calculated only for the keys that are required.
+
+    `others` is `solve.others` with all its args except for `outputs` already provided.
+    Each call to `require` calculates whichever of its `outputs` have not been already.
+    If `grouped`, then any keys that are in the same one of the `others_groups` are
+    calculated together.
+    """
+
+    def __init__(self, others, grouped=False):
+        self.others = others
+        self.grouped = grouped
+        self.values = {}
+        self.required = set()
+        self.complete = False
+
+    def require(self, outputs):
+        """Make sure that the `outputs` (or everything, if `None`) have been calculated."""
+        if self.complete:
+            return
+        if outputs is None:
+            self.values = {**self.others(outputs=None), **self.values}
+            self.complete = True
+            return
+        missing = set(outputs) - self.required - set(self.values)
+        if self.grouped:
+            for group in others_groups:
+                if not missing.isdisjoint(group):
+                    missing = missing | (group - set(self.values))
+        if missing:
+            self.values.update(self.others(outputs=missing))
+            self.required = self.required | missing
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, key):
+        return key in self.values
+
+
+class LazyResults(Mapping):
+    """Read-only results dict of CO2SYS, with each value calculated only when it is
+    first accessed, and then kept.
+
+    The keys are the same, and in the same order, as those of the dict that CO2SYS
+    otherwise returns.
+    """
+
+    def __init__(self, keys, result):
+        self._keys = keys
+        self._key_set = set(keys)
+        self._result = result
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key not in self._key_set:
+                raise KeyError(key)
+            self._values[key] = self._result(key)
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return "<LazyResults with {} keys, {} evaluated>".format(
+            len(self._keys), len(self._values)
+        )
+
+
+def _speciation_keys(others):
+    """Find which of the `speciation_results` the speciation function provides."""
+    if solve.get.speciation_func is solve.get.speciation:
+        return speciation_results
+    others.require(speciation_results)
+    return [c for c in speciation_results if c in others]
+
+
+def _results_keys(core, speciation, get_out, outputs=None):
+    """List the keys of the results dict for CO2SYS, in order, including only the
+    `outputs` if these are provided.
+    """
+    in_out = list(in_out_results)
+    if "solver_iterations" in core:
+        in_out += list(solver_results)
+    in_out += speciation
+    keys = list(fixed_results) + in_out
+    if get_out:
+        keys += ["temperature_out", "pressure_out"] + [k + "_out" for k in in_out]
+    if outputs is not None:
+        unknown = set(outputs) - set(keys)
+        if unknown:
+            raise KeyError(
+                "Unknown or unavailable outputs for CO2SYS: {}.".format(
+                    ", ".join(sorted(unknown))
+                )
+            )
+        keys = [k for k in keys if k in outputs]
+    return keys
+
+
+def _result(key, args, totals, conditions, shape=None):
+    """Calculate a single value of the results dict for CO2SYS.
+
+    `conditions` is a function of the suffix (`""` or `"_out"`) that returns the `core`,
+    `others` (as `_LazyOthers`) and `k_constants` at input or output conditions.
+
+    An array result is broadcast to `shape`, if it is provided.  Results taken directly
+    from the `args` are read-only views, like the conditioned args themselves, but all
+    others are copied into new writable arrays.
+    """
+    suffix = ""
+    if key in fixed_results:
+        source, k, factor = fixed_results[key]
+    elif key in ["temperature_out", "pressure_out"]:
+        source, k, factor = "args", key, None
+    else:
+        if key.endswith("_out"):
+            suffix = "_out"
+        name = key[: len(key) - len(suffix)]
+        if name in in_out_results:
+            source, k, factor = in_out_results[name]
+        elif name in solver_results:
+            source = "core"
+            k, factor = solver_results[name]
+        else:
+            source, k, factor = "others", name, 1e6
+    if source == "args":
+        value = args[k]
+    elif source == "totals":
+        value = totals[k]
+    else:
+        core, others, k_constants = conditions(suffix)
+        if source == "others":
+            others.require(_others_outputs([key], suffix=suffix))
+        value = {"core": core, "others": others, "k_constants": k_constants}[source][k]
+    if k == "solver_deltapH":
+        value = np.abs(value)
+    if factor is not None:
+        value = value * factor
+    if shape is not None and np.ndim(value) > 0 and np.shape(value) != shape:
+        value = np.broadcast_to(value, shape)
+        if source != "args":
+            value = np.array(value)
+    return value
+
+
+def _same_rows(temperature, pressure, temperature_out, pressure_out, Ks_in, Ks_out):
+    """Find where the output conditions are the same as the input conditions, so the
+    results at input conditions can be reused at output conditions.
+
+    The provided equilibrium constants `Ks_in` and `Ks_out` must also be the same: any
+    that are provided for only one of input or output conditions mean that no rows
+    are the same.
+    """
+    same = (temperature_out == temperature) & (pressure_out == pressure)
+    for k in set(Ks_in) | set(Ks_out):
+        if k in Ks_in and k in Ks_out:
+            same = same & (Ks_out[k] == Ks_in[k])
+        else:
+            return False
+    return same
+
+
+def _take_rows(values, rows):
+    """Select the boolean `rows` from the arrays in the dict `values`, each broadcast to
+    the shape of `rows`, leaving any scalars as they are.
+    """
+    return {
+        k: np.broadcast_to(v, np.shape(rows))[rows] if np.ndim(v) > 0 else v
+        for k, v in values.items()
     }
-    for c in [
-        "HCO3",
-        "CO3",
-        "CO2",
-        "BOH4",
-        "BOH3",
-        "OH",
-        "Hfree",
-        "H3PO4",
-        "H2PO4",
-        "HPO4",
-        "PO4",
-        "H3SiO4",
-        "H4SiO4",
-        "NH3",
-        "NH4",
-        "HS",
-        "H2S",
-        "HSO4",
-        "SO4",
-        "HF",
-        "F",
-        "alpha",
-        "alphaH",
-        "beta",
-        "betaH",
-    ]:
-        if c in others:
-            io[c] = others[c] * 1e6
-    return {"{}{}".format(k, suffix): v for k, v in io.items()}
-
-
-def _get_results_dict(
+
+
+def _put_rows(rows, value, value_rows):
+    """Put `value_rows`, evaluated only at the boolean `rows`, into `value` broadcast to
+    the shape of `rows`.
+    """
+    if np.ndim(value) == 0 and np.ndim(value_rows) == 0 and value == value_rows:
+        return value
+    full = np.array(
+        np.broadcast_to(value, np.shape(rows)),
+        dtype=np.result_type(value, value_rows),
+    )
+    full[rows] = value_rows
+    return full
+
+
+# Args (besides the settings) that each of the `precomputed` stages of `_CO2SYS`
+# depends upon
+stage_args = {
+    "totals": {
+        "salinity",
+        "total_ammonia",
+        "total_phosphate",
+        "total_silicate",
+        "total_sulfide",
+        *totals_optional,
+    },
+    "k_constants_in": {
+        "salinity",
+        "total_fluoride",
+        "total_sulfate",
+        "temperature",
+        "pressure",
+        *k_constants_optional,
+    },
+    "k_constants_out": {
+        "salinity",
+        "total_fluoride",
+        "total_sulfate",
+        "temperature_out",
+        "pressure_out",
+        *k_constants_optional_out,
+    },
+}
+
+
+def stages_affected(key, args):
+    """Find which of the `precomputed` stages of `_CO2SYS` depend upon the arg `key`,
+    when solving with `args`.
+
+    The output conditions follow the input temperature and pressure wherever their
+    own values are not in `args`.
+    """
+    stages = {stage for stage, keys in stage_args.items() if key in keys}
+    if key in ["temperature", "pressure"] and key + "_out" not in args:
+        stages.add("k_constants_out")
+    return stages
+
+
+# Optional args whose values are put straight into each of the `precomputed` stages of
+# `_CO2SYS`: (map onto internal keys, unit factor, internal keys that change the rest)
+stage_provided = {
+    "totals": (totals_optional, 1e-6, []),
+    "k_constants_in": (k_constants_optional, 1, equilibria.Ks_upstream),
+    "k_constants_out": (k_constants_optional_out, 1, equilibria.Ks_upstream),
+}
+
+
+def reuse_stages(precomputed, args, keys):
+    """Select the `precomputed` stages from solving `_CO2SYS` with different values of
+    the args `keys` that can be reused when solving with `args`.
+
+    Stages that depend on any of the `keys` are reused only if all of those are
+    optional args whose values are put straight into the stage, in which case their
+    new values from `args` are put into it.
+    """
+    reused = {}
+    for stage, values in precomputed.items():
+        keys_stage = [k for k in keys if stage in stages_affected(k, args)]
+        provided, factor, blocking = stage_provided[stage]
+        if all(k in provided and provided[k] not in blocking for k in keys_stage):
+            reused[stage] = {
+                **values,
+                **{provided[k]: args[k] * factor for k in keys_stage},
+            }
+    return reused
+
+
+def _CO2SYS(
     args,
-    totals,
-    core_in,
-    others_in,
-    k_constants_in,
-    core_out,
-    others_out,
-    k_constants_out,
+    solver_kwargs,
+    check_buffers_mode=True,
+    outputs=None,
+    constants_cache=None,
+    shape=None,
+    lazy=False,
+    precomputed=None,
 ):
-    """Assemble the results dict for CO2SYS."""
-    results = {
-        "par1": args["par1"],
-        "par2": args["par2"],
-        "par1_type": args["par1_type"],
-        "par2_type": args["par2_type"],
-        "opt_k_bisulfate": args["opt_k_bisulfate"],
-        "opt_k_carbonic": args["opt_k_carbonic"],
-        "opt_k_fluoride": args["opt_k_fluoride"],
-        "opt_total_borate": args["opt_total_borate"],
-        "opt_gas_constant": args["opt_gas_constant"],
-        "opt_pH_scale": args["opt_pH_scale"],
-        "buffers_mode": args["buffers_mode"],
-        "salinity": totals["Sal"],
-        "temperature": args["temperature"],
-        "pressure": args["pressure"],
-        "total_ammonia": totals["TNH3"] * 1e6,
-        "total_borate": totals["TB"] * 1e6,
-        "total_calcium": totals["TCa"] * 1e6,
-        "total_fluoride": totals["TF"] * 1e6,
-        "total_phosphate": totals["TPO4"] * 1e6,
-        "total_silicate": totals["TSi"] * 1e6,
-        "total_sulfate": totals["TSO4"] * 1e6,
-        "total_sulfide": totals["TH2S"] * 1e6,
-        "peng_correction": totals["PengCorrection"] * 1e6,
-        "gas_constant": k_constants_in["RGas"],
-        "alkalinity": core_in["TA"] * 1e6,
-        "dic": core_in["TC"] * 1e6,
-        # Added in v1.6.0:
-        "total_alpha": totals["alpha"] * 1e6,
-        "total_beta": totals["beta"] * 1e6,
+    """Solve the marine carbonate system from conditioned args.
+
+    The args are not broadcast together, so each result is first calculated at the
+    smallest shape that its inputs allow.  Array results are then broadcast to `shape`
+    (by default, the shape of all the args broadcast together).
+
+    If `outputs` is provided, only the results with those keys, and whatever they
+    depend upon, are calculated.
+
+    If a `constants_cache` (a `cache.ConstantsCache`) is provided, then the total salts
+    and equilibrium constants are evaluated through it.
+
+    If `lazy`, then only the core marine carbonate system at input conditions is solved
+    here, and the results are returned as `LazyResults`, which calculate everything
+    else only when it is first accessed.
+
+    If a `precomputed` dict is provided, then any of the total salts (`"totals"`) and
+    the equilibrium constants at input (`"k_constants_in"`) and output conditions
+    (`"k_constants_out"`) that it contains are used instead of being calculated, and any
+    that it does not contain are calculated and added to it.  These must be consistent
+    with the args (see `stages_affected`).
+    """
+    if precomputed is None:
+        precomputed = {}
+    if constants_cache is None:
+        assemble_salts = salts.assemble
+        assemble_equilibria = equilibria.assemble
+    else:
+        assemble_salts = constants_cache.salts
+        assemble_equilibria = constants_cache.equilibria
+    k_constants_P0 = None
+    if shape is None:
+        shape = broadcast1024(*args.values()).shape
+    # Prepare totals dict
+    if "totals" in precomputed:
+        totals = precomputed["totals"]
+    else:
+        totals = {
+            totals_optional[k]: v * 1e-6
+            for k, v in args.items()
+            if k in totals_optional
+        }
+        totals = assemble_salts(
+            args["salinity"],
+            args["total_silicate"],
+            args["total_phosphate"],
+            args["total_ammonia"],
+            args["total_sulfide"],
+            args["opt_k_carbonic"],
+            args["opt_total_borate"],
+            totals=totals if totals else None,
+        )
+        precomputed["totals"] = totals
+    # Prepare equilibrium constants dict (input conditions)
+    k_constants_in_provided = {
+        k_constants_optional[k]: v for k, v in args.items() if k in k_constants_optional
     }
-    results.update(_get_in_out(core_in, others_in, k_constants_in, suffix=""))
-    if core_out is not None:
-        results.update(
-            {
-                "temperature_out": args["temperature_out"],
-                "pressure_out": args["pressure_out"],
+    # Find where the output conditions are the same as the input conditions
+    get_out = ("pressure_out" in args.keys() or "temperature_out" in args.keys()) and (
+        outputs is None or any(k.endswith("_out") for k in outputs)
+    )
+    if get_out:
+        # Make sure we've got output values for both temperature and pressure
+        if "pressure_out" in args.keys():
+            if "temperature_out" not in args.keys():
+                args["temperature_out"] = args["temperature"]
+        if "temperature_out" in args.keys():
+            if "pressure_out" not in args.keys():
+                args["pressure_out"] = args["pressure"]
+        k_constants_out_provided = {
+            k_constants_optional_out[k]: v
+            for k, v in args.items()
+            if k in k_constants_optional_out
+        }
+        same = _same_rows(
+            args["temperature"],
+            args["pressure"],
+            args["temperature_out"],
+            args["pressure_out"],
+            k_constants_in_provided,
+            k_constants_out_provided,
+        )
+        # Where only the pressure differs, the intermediate values that do not depend on
+        # pressure can be reused from input conditions at output conditions
+        if (
+            constants_cache is None
+            and not k_constants_in_provided
+            and not k_constants_out_provided
+            and not np.all(same)
+            and np.all((args["temperature_out"] == args["temperature"]) | same)
+        ):
+            k_constants_P0 = {}
+            assemble_equilibria = partial(equilibria.assemble, Ks_P0=k_constants_P0)
+    else:
+        same = False
+    if "k_constants_in" in precomputed:
+        k_constants_in = precomputed["k_constants_in"]
+    else:
+        k_constants_in = assemble_equilibria(
+            args["temperature"],
+            args["pressure"],
+            totals,
+            args["opt_pH_scale"],
+            args["opt_k_carbonic"],
+            args["opt_k_bisulfate"],
+            args["opt_k_fluoride"],
+            args["opt_gas_constant"],
+            Ks=k_constants_in_provided if k_constants_in_provided else None,
+        )
+        precomputed["k_constants_in"] = k_constants_in
+    # Solve the core marine carbonate system at input conditions
+    core_in = solve.core(
+        args["par1"],
+        args["par2"],
+        args["par1_type"],
+        args["par2_type"],
+        totals,
+        k_constants_in,
+        convert_units=True,
+        full_output=args["solver_diagnostics"],
+        pH_guess=args.get("pH_guess"),
+        **solver_kwargs,
+    )
+    # The rest at input conditions is calculated only as it is needed
+    if check_buffers_mode:
+        solve._check_buffers_mode(args["buffers_mode"])
+    others_in = _LazyOthers(
+        partial(
+            solve.others,
+            core_in,
+            args["temperature"],
+            args["pressure"],
+            totals,
+            k_constants_in,
+            args["opt_pH_scale"],
+            args["opt_k_carbonic"],
+            args["buffers_mode"],
+            check_buffers_mode=False,
+        ),
+        grouped=lazy,
+    )
+
+    def solve_out():
+        """Solve the marine carbonate system at output conditions."""
+        if np.all(same):
+            # Output conditions are the same as input conditions everywhere
+            precomputed.setdefault("k_constants_out", k_constants_in)
+            return core_in, others_in, k_constants_in
+        # Output conditions are evaluated only where they differ from input conditions
+        assemble_equilibria_out = assemble_equilibria
+        k_constants_provided = k_constants_out_provided
+        if np.any(same):
+            rows = np.broadcast_to(~same, shape)
+            args_out = _take_rows(args, rows)
+            totals_out = _take_rows(totals, rows)
+            core_in_out = _take_rows(core_in, rows)
+            k_constants_provided = _take_rows(k_constants_provided, rows)
+            if k_constants_P0 is not None:
+                assemble_equilibria_out = partial(
+                    equilibria.assemble, Ks_P0=_take_rows(k_constants_P0, rows)
+                )
+        else:
+            args_out = args
+            totals_out = totals
+            core_in_out = core_in
+        # Prepare equilibrium constants dict (output conditions)
+        if "k_constants_out" in precomputed:
+            k_constants_out = precomputed["k_constants_out"]
+            if np.any(same):
+                k_constants_out = _take_rows(k_constants_out, rows)
+        else:
+            k_constants_out = assemble_equilibria_out(
+                args_out["temperature_out"],
+                args_out["pressure_out"],
+                totals_out,
+                args_out["opt_pH_scale"],
+                args_out["opt_k_carbonic"],
+                args_out["opt_k_bisulfate"],
+                args_out["opt_k_fluoride"],
+                args_out["opt_gas_constant"],
+                Ks=k_constants_provided if k_constants_provided else None,
+            )
+        # Solve the core marine carbonate system at output conditions
+        core_out = solve.core(
+            core_in_out["TA"],
+            core_in_out["TC"],
+            1,
+            2,
+            totals_out,
+            k_constants_out,
+            convert_units=False,
+            full_output=args_out["solver_diagnostics"],
+            pH_guess=args_out.get("pH_guess_out"),
+            **solver_kwargs,
+        )
+        core_out_rows = core_out
+        k_constants_out_rows = k_constants_out
+
+        def others_out(outputs):
+            """Calculate the rest at output conditions."""
+            others_out = solve.others(
+                core_out_rows,
+                args_out["temperature_out"],
+                args_out["pressure_out"],
+                totals_out,
+                k_constants_out_rows,
+                args_out["opt_pH_scale"],
+                args_out["opt_k_carbonic"],
+                args_out["buffers_mode"],
+                check_buffers_mode=False,
+                outputs=outputs,
+            )
+            if np.any(same):
+                others_in.require(outputs)
+                others_out = {
+                    k: _put_rows(rows, others_in[k], v) for k, v in others_out.items()
+                }
+            return others_out
+
+        # Reuse the results at input conditions wherever output conditions are the same
+        if np.any(same):
+            core_out = {k: _put_rows(rows, core_in[k], v) for k, v in core_out.items()}
+            k_constants_out = {
+                k: _put_rows(rows, k_constants_in[k], v)
+                for k, v in k_constants_out.items()
             }
+        precomputed.setdefault("k_constants_out", k_constants_out)
+        return core_out, _LazyOthers(others_out, grouped=lazy), k_constants_out
+
+    conditions = {"": (core_in, others_in, k_constants_in)}
+
+    def get_conditions(suffix):
+        """Get the results at input or output conditions, solving for the latter on
+        first use.
+        """
+        if suffix not in conditions:
+            conditions[suffix] = solve_out()
+        return conditions[suffix]
+
+    keys = _results_keys(core_in, _speciation_keys(others_in), get_out, outputs=outputs)
+    result = partial(
+        _result, args=args, totals=totals, conditions=get_conditions, shape=shape
+    )
+    if lazy:
+        return LazyResults(keys, result)
+    # Otherwise, calculate all the results now.  If results at input conditions are to
+    # be reused at output conditions, then those needed at output conditions must also
+    # be calculated at input conditions.
+    others_outputs_in = _others_outputs(outputs)
+    if np.any(same) and outputs is not None:
+        others_outputs_in = others_outputs_in | _others_outputs(outputs, suffix="_out")
+    others_in.require(others_outputs_in)
+    if get_out:
+        get_conditions("_out")[1].require(_others_outputs(outputs, suffix="_out"))
+    return {k: result(k) for k in keys}
+
+
+# Approximate peak memory used by `_CO2SYS` per point of the broadcast shape, in bytes,
+# when all the results are calculated at both input and output conditions
+bytes_per_point = 4096
+
+
+def _chunk_indices(shape, chunk_size):
+    """Generate indices that split `shape` along its leading axes into chunks of at
+    most `chunk_size` points each.
+    """
+    # Find the first axis along which the chunks can be sliced, with all the axes after
+    # it included whole in every chunk
+    axis = len(shape) - 1
+    trailing = 1
+    while axis > 0 and trailing * shape[axis] <= chunk_size:
+        trailing *= shape[axis]
+        axis -= 1
+    step = max(1, chunk_size // trailing)
+    for leading in itertools.product(*[range(n) for n in shape[:axis]]):
+        for start in range(0, shape[axis], step):
+            yield leading + (slice(start, min(start + step, shape[axis])),)
+
+
+def _chunk_arg(value, shape, index):
+    """Select the chunk at `index` of the broadcast `shape` from `value`, keeping any
+    axes along which `value` has length 1 at length 1 (or dropping them, where they are
+    indexed by an integer).
+    """
+    if np.ndim(value) == 0:
+        return value
+    index = index[len(shape) - np.ndim(value) :]
+    return value[
+        tuple(
+            i if n != 1 else (slice(None) if isinstance(i, slice) else 0)
+            for i, n in zip(index, np.shape(value))
         )
-        results.update(
-            _get_in_out(core_out, others_out, k_constants_out, suffix="_out")
+    ]
+
+
+def _chunks(shape, n_workers=1, chunk_size=None, max_memory=None):
+    """Find the indices of the chunks into which to split `shape`, with at most
+    `chunk_size` points each and as many as should fit within `max_memory` bytes
+    (following `bytes_per_point`), and at least four chunks for each of `n_workers`
+    if there is more than one.
+    """
+    npts = int(np.prod(shape))
+    if chunk_size is None:
+        chunk_size = np.inf
+    if max_memory is not None:
+        chunk_size = min(chunk_size, max_memory // bytes_per_point)
+    if n_workers > 1:
+        chunk_size = min(chunk_size, -(-npts // (4 * n_workers)))
+    return list(_chunk_indices(shape, max(1, int(min(chunk_size, max(1, npts))))))
+
+
+def _put_chunk(results, results_chunk, shape, index, memmap_directory=None):
+    """Write `results_chunk` for the chunk at `index` into the full-shape `results`.
+
+    Results that are scalars are kept as scalars, because they depend only on scalar
+    args, so they are the same in every chunk.  All others are written into arrays
+    allocated at the full `shape`, in memory or, if a `memmap_directory` is provided,
+    as `np.memmap` .npy files named after each results key in that directory.
+    """
+    for k, v in results_chunk.items():
+        if np.ndim(v) == 0 and (k not in results or np.ndim(results[k]) == 0):
+            results[k] = v
+            continue
+        if np.ndim(results.get(k)) == 0:
+            if memmap_directory is None:
+                full = np.empty(shape, dtype=np.result_type(v))
+            else:
+                full = open_memmap(
+                    os.path.join(memmap_directory, k + ".npy"),
+                    mode="w+",
+                    dtype=np.result_type(v),
+                    shape=shape,
+                )
+            if k in results:
+                full[...] = results[k]
+            results[k] = full
+        results[k][index] = v
+
+
+def _solve_chunk(args, solver_kwargs, shape, index, **kwargs):
+    """Run `_CO2SYS` on the chunk at `index` of the broadcast `shape` of the `args`."""
+    return _CO2SYS(
+        {k: _chunk_arg(v, shape, index) for k, v in args.items()},
+        solver_kwargs,
+        shape=np.broadcast_to(False, shape)[index].shape,
+        **kwargs,
+    )
+
+
+def _CO2SYS_chunked(
+    args,
+    solver_kwargs,
+    chunk_size=None,
+    max_memory=None,
+    memmap_directory=None,
+    n_workers=None,
+    n_threads=None,
+    **kwargs
+):
+    """Solve the marine carbonate system from conditioned args in chunks.
+
+    The broadcast shape of the `args` is split along its leading axes into chunks (see
+    `_chunks`), and `_CO2SYS` is run on each chunk in turn, or in a pool of `n_workers`
+    processes or `n_threads` threads if there is more than one.  The results are
+    written into arrays that are allocated once, at the full shape (see `_put_chunk`).
+    Any `kwargs` are passed to `_CO2SYS`.
+    """
+    shape = broadcast1024(*args.values()).shape
+    n_workers = 1 if n_workers is None else n_workers
+    n_threads = 1 if n_threads is None else n_threads
+    assert n_workers >= 1, "`n_workers` must be at least 1."
+    assert n_threads >= 1, "`n_threads` must be at least 1."
+    assert n_workers == 1 or n_threads == 1, "Use either `n_workers` or `n_threads`."
+    if shape == () or 0 in shape:
+        return _CO2SYS(args, solver_kwargs, **kwargs)
+    indices = _chunks(
+        shape,
+        n_workers=max(n_workers, n_threads),
+        chunk_size=chunk_size,
+        max_memory=max_memory,
+    )
+    results = {}
+    if max(n_workers, n_threads) == 1 or len(indices) == 1:
+        for index in indices:
+            results_chunk = _solve_chunk(args, solver_kwargs, shape, index, **kwargs)
+            _put_chunk(results, results_chunk, shape, index, memmap_directory)
+        return results
+    if n_threads > 1:
+        return _CO2SYS_threads(
+            args, solver_kwargs, shape, indices, n_threads, memmap_directory, **kwargs
+        )
+    return _CO2SYS_pool(
+        args, solver_kwargs, shape, indices, n_workers, memmap_directory, **kwargs
+    )
+
+
+def _CO2SYS_threads(
+    args, solver_kwargs, shape, indices, n_threads, memmap_directory=None, **kwargs
+):
+    """Solve the marine carbonate system from conditioned args at each of the chunk
+    `indices` in a pool of `n_threads` threads.
+
+    The first chunk is solved in this thread, to find the results that are arrays,
+    which are then allocated at the full shape and written into directly by each
+    thread.  Any other results are returned from each chunk and put together with
+    `_put_chunk`.
+    """
+    results = {}
+    results_chunk = _solve_chunk(args, solver_kwargs, shape, indices[0], **kwargs)
+    _put_chunk(results, results_chunk, shape, indices[0], memmap_directory)
+    arrays = [k for k, v in results_chunk.items() if np.ndim(v) > 0]
+
+    def solve_chunk(index):
+        results_chunk = _solve_chunk(args, solver_kwargs, shape, index, **kwargs)
+        for k in arrays:
+            results[k][index] = results_chunk.pop(k)
+        return results_chunk
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for index, results_chunk in zip(
+            indices[1:], executor.map(solve_chunk, indices[1:])
+        ):
+            _put_chunk(results, results_chunk, shape, index, memmap_directory)
+    return results
+
+
+# State of each worker process in `_CO2SYS_pool`, set up by `_pool_initializer`
+_pool = {}
+
+
+def _shared_array(shared, shape, dtype):
+    """View the `SharedMemory` block `shared` as an array."""
+    return np.ndarray(shape, dtype=dtype, buffer=shared.buf)
+
+
+def _pool_initializer(
+    args, args_shared, solver_kwargs, shape, outputs_shared, memmap_directory, kwargs
+):
+    """Attach a worker process of `_CO2SYS_pool` to the shared args and results."""
+    _pool.clear()
+    _pool["blocks"] = []
+    _pool["args"] = dict(args)
+    for k, (name, v_shape, dtype) in args_shared.items():
+        _pool["blocks"].append(SharedMemory(name=name))
+        _pool["args"][k] = _shared_array(_pool["blocks"][-1], v_shape, dtype)
+        _pool["args"][k].flags.writeable = False
+    _pool["results"] = {}
+    for k, (name, dtype) in outputs_shared.items():
+        if memmap_directory is None:
+            _pool["blocks"].append(SharedMemory(name=name))
+            _pool["results"][k] = _shared_array(_pool["blocks"][-1], shape, dtype)
+        else:
+            _pool["results"][k] = np.load(name, mmap_mode="r+")
+    _pool["solver_kwargs"] = solver_kwargs
+    _pool["shape"] = shape
+    _pool["kwargs"] = kwargs
+
+
+def _pool_solve(index):
+    """Solve the chunk at `index` in a worker process of `_CO2SYS_pool`, writing the
+    results into the shared arrays and returning any others.
+    """
+    results_chunk = _solve_chunk(
+        _pool["args"], _pool["solver_kwargs"], _pool["shape"], index, **_pool["kwargs"]
+    )
+    for k in _pool["results"]:
+        _pool["results"][k][index] = results_chunk.pop(k)
+    return results_chunk
+
+
+def _CO2SYS_pool(
+    args, solver_kwargs, shape, indices, n_workers, memmap_directory=None, **kwargs
+):
+    """Solve the marine carbonate system from conditioned args at each of the chunk
+    `indices` in a pool of `n_workers` processes.
+
+    The first chunk is solved in this process, to find the results that are arrays.
+    The array args and these array results are shared with the worker processes
+    through `multiprocessing.shared_memory` (or, for the results, through `np.memmap`
+    files, if a `memmap_directory` is provided) rather than being pickled.  Any other
+    results are returned from each chunk and put together with `_put_chunk`.
+    """
+    results = {}
+    results_chunk = _solve_chunk(args, solver_kwargs, shape, indices[0], **kwargs)
+    with ExitStack() as stack:
+
+        def share(value_shape, dtype):
+            size = max(1, int(np.prod(value_shape)) * np.dtype(dtype).itemsize)
+            shared = SharedMemory(create=True, size=size)
+            stack.callback(shared.unlink)
+            stack.callback(shared.close)
+            return shared, _shared_array(shared, value_shape, dtype)
+
+        args_shared = {}
+        for k, v in args.items():
+            if isinstance(v, np.ndarray) and not v.dtype.hasobject:
+                shared, args_shared[k] = share(v.shape, v.dtype)
+                args_shared[k][...] = v
+                args_shared[k] = (shared.name, v.shape, v.dtype.str)
+        outputs_shared = {}
+        for k, v in results_chunk.items():
+            if np.ndim(v) > 0 and not np.result_type(v).hasobject:
+                dtype = np.result_type(v)
+                if memmap_directory is None:
+                    shared, results[k] = share(shape, dtype)
+                    outputs_shared[k] = (shared.name, dtype.str)
+                else:
+                    _put_chunk(results, {k: v}, shape, indices[0], memmap_directory)
+                    results[k].flush()
+                    outputs_shared[k] = (results[k].filename, dtype.str)
+                results[k][indices[0]] = v
+        _put_chunk(
+            results,
+            {k: v for k, v in results_chunk.items() if k not in outputs_shared},
+            shape,
+            indices[0],
         )
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_pool_initializer,
+            initargs=(
+                {k: v for k, v in args.items() if k not in args_shared},
+                args_shared,
+                solver_kwargs,
+                shape,
+                outputs_shared,
+                memmap_directory,
+                kwargs,
+            ),
+        ) as executor:
+            for index, results_chunk in zip(
+                indices[1:], executor.map(_pool_solve, indices[1:])
+            ):
+                _put_chunk(results, results_chunk, shape, index, memmap_directory)
+        if memmap_directory is None:
+            # Copy the results out of the shared memory before it is released
+            for k in outputs_shared:
+                results[k] = np.array(results[k])
     return results
 
 
@@ -411,6 +1285,18 @@ gradables = [
 ]
 
 
+def _solver_kwargs(method, tolerance=None, max_iter=None):
+    """Prepare the kwargs for the iterative TA-pH solvers, replacing a `tolerance` of
+    `None` with `solve.get.pHTol` and, for the `"bracketed"` method, a `max_iter` of
+    `None` with `solve.get.pHMaxIter`, so that these are read only once for each call.
+    """
+    if tolerance is None:
+        tolerance = solve.get.pHTol
+    if max_iter is None and method == "bracketed":
+        max_iter = solve.get.pHMaxIter
+    return {"method": method, "tolerance": tolerance, "max_iter": max_iter}
+
+
 def CO2SYS(
     par1,
     par2,
@@ -477,162 +1363,213 @@ def CO2SYS(
     total_beta=None,
     k_beta=None,
     k_beta_out=None,
+    solver_method="newton",
+    solver_diagnostics=False,
+    solver_tolerance=None,
+    solver_max_iter=None,
+    pH_guess=None,
+    pH_guess_out=None,
+    outputs=None,
+    constants_cache=None,
+    chunk_size=None,
+    max_memory=None,
+    memmap_directory=None,
+    n_workers=None,
+    n_threads=None,
+    lazy=False,
+    precomputed=None,
 ):
-    """Run CO2SYS with n-dimensional args allowed."""
-    args = condition(locals())
-    # Prepare totals dict
-    totals_optional = {
-        "total_borate": "TB",
-        "total_calcium": "TCa",
-        "total_fluoride": "TF",
-        "total_sulfate": "TSO4",
-        "total_alpha": "alpha",
-        "total_beta": "beta",
-    }
-    if np.any(np.isin(list(args.keys()), list(totals_optional.keys()))):
-        totals = {
-            totals_optional[k]: v * 1e-6
-            for k, v in args.items()
-            if k in totals_optional
-        }
-    else:
-        totals = None
-    totals = salts.assemble(
-        args["salinity"],
-        args["total_silicate"],
-        args["total_phosphate"],
-        args["total_ammonia"],
-        args["total_sulfide"],
-        args["opt_k_carbonic"],
-        args["opt_total_borate"],
-        totals=totals,
-    )
-    # Prepare equilibrium constants dict (input conditions)
-    k_constants_optional = {
-        "fugacity_factor": "FugFac",
-        "gas_constant": "RGas",
-        "k_ammonia": "KNH3",
-        "k_borate": "KB",
-        "k_bisulfate": "KSO4",
-        "k_CO2": "K0",
-        "k_carbonic_1": "K1",
-        "k_carbonic_2": "K2",
-        "k_fluoride": "KF",
-        "k_phosphate_1": "KP1",
-        "k_phosphate_2": "KP2",
-        "k_phosphate_3": "KP3",
-        "k_silicate": "KSi",
-        "k_sulfide": "KH2S",
-        "k_water": "KW",
-        "k_calcite": "KCa",
-        "k_aragonite": "KAr",
-        "k_alpha": "alpha",
-        "k_beta": "beta",
+    """Run CO2SYS with n-dimensional args allowed.
+
+    If a list of `outputs` is provided, then only those keys of the results dict, and
+    whatever they depend upon, are calculated and returned.
+
+    If a `constants_cache` (a `pyco2.ConstantsCache`) is provided, then the total salts
+    and equilibrium constants are computed only once for each unique combination of
+    conditions and options, both within this call and across all other calls that use
+    the same `constants_cache`.
+
+    If a `chunk_size` (in points) or `max_memory` (in bytes) is provided, then the args
+    are split along their leading axes into chunks that are solved one at a time, with
+    the results written into arrays allocated at the full shape.  If a
+    `memmap_directory` is also provided, then these arrays are `np.memmap` .npy files in
+    that directory, so that the peak memory use does not depend on the size of the
+    args.
+
+    If `n_workers` is more than 1, then the args are split into chunks in the same way,
+    which are solved in parallel in a pool of `n_workers` processes.  Alternatively,
+    the chunks can be solved in a pool of `n_threads` threads.
+
+    If `lazy`, then the results are returned as a read-only `LazyResults` mapping
+    instead of a dict.  Only the core marine carbonate system at input conditions is
+    solved straight away.  Every other result (e.g. buffer factors, the chemical
+    speciation, and everything at output conditions) is calculated, converted to its
+    final units and kept only when it is first accessed.  This cannot be combined with
+    chunks.
+
+    If a `precomputed` dict is provided, then any total salts (key `"totals"`) and
+    equilibrium constants at input and output conditions (`"k_constants_in"` and
+    `"k_constants_out"`) that it contains are used instead of being calculated, and
+    those that it does not contain are added to it once calculated.  Passing an empty
+    dict and then the parts of it that `stages_affected` finds do not depend on a
+    changed arg to a second call therefore avoids recalculating them.  This cannot be
+    combined with chunks.
+    """
+    args = locals()
+    outputs = args.pop("outputs")
+    lazy = args.pop("lazy")
+    precomputed = args.pop("precomputed")
+    constants_cache = args.pop("constants_cache")
+    chunks = {
+        k: args.pop(k)
+        for k in [
+            "chunk_size",
+            "max_memory",
+            "memmap_directory",
+            "n_workers",
+            "n_threads",
+        ]
     }
-    if np.any(np.isin(list(args.keys()), list(k_constants_optional.keys()))):
-        k_constants_in = {
-            k_constants_optional[k]: v
-            for k, v in args.items()
-            if k in k_constants_optional
-        }
-    else:
-        k_constants_in = None
-    k_constants_in = equilibria.assemble(
-        args["temperature"],
-        args["pressure"],
-        totals,
-        args["opt_pH_scale"],
-        args["opt_k_carbonic"],
-        args["opt_k_bisulfate"],
-        args["opt_k_fluoride"],
-        args["opt_gas_constant"],
-        Ks=k_constants_in,
-    )
-    # Solve the core marine carbonate system at input conditions
-    core_in = solve.core(
-        args["par1"],
-        args["par2"],
-        args["par1_type"],
-        args["par2_type"],
-        totals,
-        k_constants_in,
-        convert_units=True,
+    args = condition(args, broadcast=False)
+    # Options for the iterative TA-pH solvers, with the defaults read only once
+    solver_kwargs = _solver_kwargs(
+        args["solver_method"], args.get("solver_tolerance"), args.get("solver_max_iter")
     )
-    # Calculate the rest at input conditions
-    others_in = solve.others(
-        core_in,
-        args["temperature"],
-        args["pressure"],
-        totals,
-        k_constants_in,
-        args["opt_pH_scale"],
-        args["opt_k_carbonic"],
-        args["buffers_mode"],
+    if any(
+        chunks[k] is not None
+        for k in ["chunk_size", "max_memory", "n_workers", "n_threads"]
+    ):
+        assert not lazy, "`lazy` results cannot be combined with chunks."
+        assert precomputed is None, "`precomputed` cannot be combined with chunks."
+        return _CO2SYS_chunked(
+            args,
+            solver_kwargs,
+            **chunks,
+            outputs=outputs,
+            constants_cache=constants_cache,
+        )
+    return _CO2SYS(
+        args,
+        solver_kwargs,
+        outputs=outputs,
+        constants_cache=constants_cache,
+        lazy=lazy,
+        precomputed=precomputed,
     )
-    # If requested, solve the core marine carbonate system at output conditions
-    if "pressure_out" in args.keys() or "temperature_out" in args.keys():
-        # Make sure we've got output values for both temperature and pressure
-        if "pressure_out" in args.keys():
-            if "temperature_out" not in args.keys():
-                args["temperature_out"] = args["temperature"]
-        if "temperature_out" in args.keys():
-            if "pressure_out" not in args.keys():
-                args["pressure_out"] = args["pressure"]
-        # Prepare equilibrium constants dict (output conditions)
-        k_constants_optional_out = {
-            "{}_out".format(k): v for k, v in k_constants_optional.items()
+
+
+# Per-call args of CO2SYSPlan.solve that have defaults other than None
+plan_defaults = {
+    "salinity": 35,
+    "temperature": 25,
+    "pressure": 0,
+    "total_ammonia": 0,
+    "total_phosphate": 0,
+    "total_silicate": 0,
+    "total_sulfide": 0,
+}
+
+
+class CO2SYSPlan:
+    """Reusable setup for repeated CO2SYS calls with fixed options.
+
+    All the settings that would be the same in every call (`par1_type`, `par2_type`,
+    the `opt_` args, `buffers_mode` and the solver options) are validated and stored
+    once, when the plan is created.  If `shape` is provided, then every array input to
+    `solve` is checked directly against that shape, without checking the shapes of all
+    the args against each other first, and array results are broadcast to it.  If
+    `outputs` is provided, then `solve` calculates and returns only those keys of the
+    results dict (where they exist).
+
+    The `solve` method then accepts `par1`, `par2` and any of the other CO2SYS args that
+    can vary from call to call (e.g. `salinity`, `temperature`, `pressure`, the `total_`
+    and `k_` args, `temperature_out`, `pressure_out`, `pH_guess` and `pH_guess_out`).
+
+    If a `constants_cache` (a `pyco2.ConstantsCache`) is provided, then every call to
+    `solve` evaluates the total salts and equilibrium constants through it.
+    If `lazy`, then `solve` returns `LazyResults`, as for `CO2SYS`.
+    """
+
+    def __init__(
+        self,
+        par1_type,
+        par2_type,
+        shape=None,
+        outputs=None,
+        opt_gas_constant=3,
+        opt_k_bisulfate=1,
+        opt_k_carbonic=16,
+        opt_k_fluoride=1,
+        opt_pH_scale=1,
+        opt_total_borate=1,
+        buffers_mode="auto",
+        solver_method="newton",
+        solver_diagnostics=False,
+        solver_tolerance=None,
+        solver_max_iter=None,
+        constants_cache=None,
+        lazy=False,
+    ):
+        options = {
+            "par1_type": par1_type,
+            "par2_type": par2_type,
+            "opt_gas_constant": opt_gas_constant,
+            "opt_k_bisulfate": opt_k_bisulfate,
+            "opt_k_carbonic": opt_k_carbonic,
+            "opt_k_fluoride": opt_k_fluoride,
+            "opt_pH_scale": opt_pH_scale,
+            "opt_total_borate": opt_total_borate,
+            "buffers_mode": buffers_mode,
         }
-        if np.any(np.isin(list(args.keys()), k_constants_optional_out)):
-            k_constants_out = {
-                k_constants_optional_out[k]: v
-                for k, v in args.items()
-                if k in k_constants_optional_out
-            }
+        if shape is not None:
+            shape = tuple(np.atleast_1d(shape))
+            options = condition(options, to_shape=shape, broadcast=False)
+            assert options is not None, "The options cannot be broadcast to `shape`."
+        # Do all the validation here so that it can be skipped by `solve`
+        solve.getIcase(options["par1_type"], options["par2_type"], checks=True)
+        solve._check_buffers_mode(options["buffers_mode"])
+        options["solver_diagnostics"] = solver_diagnostics
+        self.options = options
+        self.shape = shape
+        self.outputs = outputs
+        self.constants_cache = constants_cache
+        self.lazy = lazy
+        self.solver_kwargs = {
+            "method": solver_method,
+            "tolerance": solver_tolerance,
+            "max_iter": solver_max_iter,
+        }
+
+    def solve(self, par1, par2, **kwargs):
+        """Run CO2SYS with the plan's options."""
+        unexpected = set(kwargs) - input_floats
+        if unexpected:
+            raise TypeError(
+                "Unexpected args for CO2SYSPlan.solve: {}.".format(
+                    ", ".join(sorted(unexpected))
+                )
+            )
+        args = {k: v for k, v in kwargs.items() if v is not None}
+        for k, v in plan_defaults.items():
+            args.setdefault(k, v)
+        args["par1"] = par1
+        args["par2"] = par2
+        args = {k: np.float64(v) for k, v in args.items()}
+        if self.shape is None:
+            shape = broadcast1024(*args.values(), *self.options.values()).shape
         else:
-            k_constants_out = None
-        k_constants_out = equilibria.assemble(
-            args["temperature_out"],
-            args["pressure_out"],
-            totals,
-            args["opt_pH_scale"],
-            args["opt_k_carbonic"],
-            args["opt_k_bisulfate"],
-            args["opt_k_fluoride"],
-            args["opt_gas_constant"],
-            Ks=k_constants_out,
-        )
-        # Solve the core marine carbonate system at output conditions
-        core_out = solve.core(
-            core_in["TA"],
-            core_in["TC"],
-            1,
-            2,
-            totals,
-            k_constants_out,
-            convert_units=False,
-        )
-        # Calculate the rest at output conditions
-        others_out = solve.others(
-            core_out,
-            args["temperature_out"],
-            args["pressure_out"],
-            totals,
-            k_constants_out,
-            args["opt_pH_scale"],
-            args["opt_k_carbonic"],
-            args["buffers_mode"],
+            shape = self.shape
+            # Check the args can be broadcast to the shape, but don't broadcast them
+            for v in args.values():
+                if not np.isscalar(v):
+                    np.broadcast_to(v, shape)
+        args.update(self.options)
+        return _CO2SYS(
+            args,
+            _solver_kwargs(**self.solver_kwargs),
+            check_buffers_mode=False,
+            outputs=self.outputs,
+            constants_cache=self.constants_cache,
+            shape=shape,
+            lazy=self.lazy,
         )
-    else:
-        core_out = None
-        others_out = None
-        k_constants_out = None
-    return _get_results_dict(
-        args,
-        totals,
-        core_in,
-        others_in,
-        k_constants_in,
-        core_out,
-        others_out,
-        k_constants_out,
-    )
@@ -4,22 +4,49 @@
 
 from autograd import numpy as np
 from . import p1atm, pcx, pressured
-from .. import constants, convert, gas, solubility
+from .. import constants, convert, gas
 
 __all__ = ["p1atm", "pcx", "pressured"]
 
+# The `Ks` that, if provided, change the values of the other equilibrium constants
+Ks_upstream = ["RGas", "KSO4", "KF", "fH"]
+
 
 def prepare(TempC, Pdbar, equilibria):
-    """Initialise equilibria dict if needed and convert temperature/pressure units."""
+    """Initialise equilibria dict if needed and convert temperature/pressure units.
+
+    A provided `equilibria` dict is copied, so that it is not modified.
+    """
     TempK = convert.TempC2K(TempC)
     Pbar = convert.Pdbar2bar(Pdbar)
-    if equilibria is None:
-        equilibria = {}
+    equilibria = {} if equilibria is None else dict(equilibria)
     return TempK, Pbar, equilibria
 
 
+def _get_P0(Ks_P0, keys, func, *args):
+    """Get the values of `keys` from `Ks_P0`, first evaluating them with `func(*args)`
+    and adding them to `Ks_P0` if any are missing.
+    """
+    if any(k not in Ks_P0 for k in keys):
+        values = func(*args)
+        if len(keys) == 1:
+            values = (values,)
+        Ks_P0.update(zip(keys, values))
+    values = tuple(Ks_P0[k] for k in keys)
+    return values if len(keys) > 1 else values[0]
+
+
 def assemble(
-    TempC, Pdbar, totals, pHScale, WhichKs, WhoseKSO4, WhoseKF, WhichR, Ks=None
+    TempC,
+    Pdbar,
+    totals,
+    pHScale,
+    WhichKs,
+    WhoseKSO4,
+    WhoseKF,
+    WhichR,
+    Ks=None,
+    Ks_P0=None,
 ):
     """Evaluate all stoichiometric equilibrium constants, converted to the
     chosen pH scale, and corrected for pressure.
@@ -37,83 +64,115 @@ def assemble(
           5) converted to the chosen pH scale.
 
     Based on a subset of Constants, version 04.01, 10-13-97, by Ernie Lewis.
+
+    If a dict `Ks_P0` is provided, then the intermediate values that do not depend on
+    pressure (the constants at atmospheric pressure, `fH`, `SWStoTOT_P0`, `K0` and
+    `FugFac`) are taken from it where present, and any that are missing are evaluated
+    and added to it.  An empty `Ks_P0` filled by one call can therefore be reused for
+    another call that differs only in `Pdbar`.
     """
     TempK, Pbar, Ks = prepare(TempC, Pdbar, Ks)
+    if Ks_P0 is None:
+        Ks_P0 = {}
     Sal = totals["Sal"]
     # Set ideal gas constant
     if "RGas" not in Ks:
         Ks["RGas"] = constants.RGasConstant(WhichR)
     RGas = Ks["RGas"]
     # Get KSO4 and KF, at pressure, and always on the Free pH scale
+    KSO4_P0 = _get_P0(Ks_P0, ["KSO4"], pressured.KSO4_P0, TempK, Sal, WhoseKSO4)
+    KF_P0 = _get_P0(Ks_P0, ["KF"], pressured.KF_P0, TempK, Sal, WhoseKF)
     if "KSO4" not in Ks:
-        Ks["KSO4"] = pressured.KSO4(TempK, Sal, Pbar, RGas, WhoseKSO4)
+        Ks["KSO4"] = KSO4_P0 * pcx.KSO4fac(TempK, Pbar, RGas)
     if "KF" not in Ks:
-        Ks["KF"] = pressured.KF(TempK, Sal, Pbar, RGas, WhoseKF)
+        Ks["KF"] = KF_P0 * pcx.KFfac(TempK, Pbar, RGas)
     # Correct pH scale conversion factors for pressure.
     # Note that fH has been assumed to be independent of pressure.
     # The values KS and KF are already now pressure-corrected, so the pH scale
     # conversions are now valid at pressure.
     # Find pH scale conversion factor: this is the scale they will be put on
+    if "fH" not in Ks:
+        Ks["fH"] = _get_P0(Ks_P0, ["fH"], pressured.fH, TempK, Sal, WhichKs)
     Ks = convert.get_pHfactor_from_SWS(TempK, Sal, totals, Ks, pHScale, WhichKs)
     pHfactor = Ks["pHfactor_from_SWS"]  # for convenience
-    SWStoTOT_P0 = convert.sws2tot_P0(TempK, totals, Ks, WhoseKSO4, WhoseKF)
+    # SWS to Total pH scale conversion factor at zero pressure
+    SWStoTOT_P0 = _get_P0(
+        Ks_P0, ["SWStoTOT_P0"], convert.sws2tot, totals, {"KSO4": KSO4_P0, "KF": KF_P0}
+    )
     # Borate
     if "KB" not in Ks:
-        Ks["KB"] = (
-            pressured.KB(TempK, Sal, Pbar, RGas, WhichKs, Ks["fH"], SWStoTOT_P0)
-            * pHfactor
+        KB = _get_P0(
+            Ks_P0, ["KB"], pressured.KB_P0, TempK, Sal, WhichKs, Ks["fH"], SWStoTOT_P0
         )
+        Ks["KB"] = KB * pcx.KBfac(TempK, Pbar, RGas, WhichKs) * pHfactor
     # Water
     if "KW" not in Ks:
-        Ks["KW"] = pressured.KW(TempK, Sal, Pbar, RGas, WhichKs) * pHfactor
+        KW = _get_P0(Ks_P0, ["KW"], pressured.KW_P0, TempK, Sal, WhichKs)
+        Ks["KW"] = KW * pcx.KWfac(TempK, Pbar, RGas, WhichKs) * pHfactor
     # Phosphate
     if ("KP1" not in Ks) or ("KP2" not in Ks) or ("KP3" not in Ks):
-        KP1, KP2, KP3 = pressured.KP(TempK, Sal, Pbar, RGas, WhichKs, Ks["fH"])
+        KP1, KP2, KP3 = _get_P0(
+            Ks_P0,
+            ["KP1", "KP2", "KP3"],
+            pressured.KP_P0,
+            TempK,
+            Sal,
+            WhichKs,
+            Ks["fH"],
+        )
         if "KP1" not in Ks:
-            Ks["KP1"] = KP1 * pHfactor
+            Ks["KP1"] = KP1 * pcx.KP1fac(TempK, Pbar, RGas) * pHfactor
         if "KP2" not in Ks:
-            Ks["KP2"] = KP2 * pHfactor
+            Ks["KP2"] = KP2 * pcx.KP2fac(TempK, Pbar, RGas) * pHfactor
         if "KP3" not in Ks:
-            Ks["KP3"] = KP3 * pHfactor
+            Ks["KP3"] = KP3 * pcx.KP3fac(TempK, Pbar, RGas) * pHfactor
     # Silicate
     if "KSi" not in Ks:
-        Ks["KSi"] = pressured.KSi(TempK, Sal, Pbar, RGas, WhichKs, Ks["fH"]) * pHfactor
+        KSi = _get_P0(Ks_P0, ["KSi"], pressured.KSi_P0, TempK, Sal, WhichKs, Ks["fH"])
+        Ks["KSi"] = KSi * pcx.KSifac(TempK, Pbar, RGas) * pHfactor
     # Carbonate
     if ("K1" not in Ks) or ("K2" not in Ks):
-        K1, K2 = pressured.KC(TempK, Sal, Pbar, RGas, WhichKs, Ks["fH"], SWStoTOT_P0)
+        K1, K2 = _get_P0(
+            Ks_P0,
+            ["K1", "K2"],
+            pressured.KC_P0,
+            TempK,
+            Sal,
+            WhichKs,
+            Ks["fH"],
+            SWStoTOT_P0,
+        )
         if "K1" not in Ks:
-            Ks["K1"] = K1 * pHfactor
+            Ks["K1"] = K1 * pcx.K1fac(TempK, Pbar, RGas, WhichKs) * pHfactor
         if "K2" not in Ks:
-            Ks["K2"] = K2 * pHfactor
+            Ks["K2"] = K2 * pcx.K2fac(TempK, Pbar, RGas, WhichKs) * pHfactor
     # Sulfide
     if "KH2S" not in Ks:
-        Ks["KH2S"] = (
-            pressured.KH2S(TempK, Sal, Pbar, RGas, WhichKs, SWStoTOT_P0) * pHfactor
+        KH2S = _get_P0(
+            Ks_P0, ["KH2S"], pressured.KH2S_P0, TempK, Sal, WhichKs, SWStoTOT_P0
         )
+        Ks["KH2S"] = KH2S * pcx.KH2Sfac(TempK, Pbar, RGas) * pHfactor
     # Ammonium
     if "KNH3" not in Ks:
-        Ks["KNH3"] = (
-            pressured.KNH3(TempK, Sal, Pbar, RGas, WhichKs, SWStoTOT_P0) * pHfactor
+        KNH3 = _get_P0(
+            Ks_P0, ["KNH3"], pressured.KNH3_P0, TempK, Sal, WhichKs, SWStoTOT_P0
         )
+        Ks["KNH3"] = KNH3 * pcx.KNH3fac(TempK, Pbar, RGas) * pHfactor
     # K0 for CO2 dissolution - no pressure or pH scale corrections applied
     if "K0" not in Ks:
-        Ks["K0"] = p1atm.kCO2_W74(TempK, Sal)
+        Ks["K0"] = _get_P0(Ks_P0, ["K0"], p1atm.kCO2_W74, TempK, Sal)
     if "FugFac" not in Ks:
-        Ks["FugFac"] = gas.fugacityfactor(TempC, WhichKs, RGas)
+        Ks["FugFac"] = _get_P0(
+            Ks_P0, ["FugFac"], gas.fugacityfactor, TempC, WhichKs, RGas
+        )
     Ks = convert.get_pHfactor_to_Free(TempK, Sal, totals, Ks, pHScale, WhichKs)
     # Aragonite and calcite solubility products
     if "KAr" not in Ks:
-        Ks["KAr"] = np.where(
-            (WhichKs == 6) | (WhichKs == 7),  # GEOSECS values
-            solubility.k_aragonite_GEOSECS(TempK, Sal, Pbar, RGas),
-            solubility.k_aragonite_M83(TempK, Sal, Pbar, RGas),
-        )
+        KAr = _get_P0(Ks_P0, ["KAr"], pressured.KAr_P0, TempK, Sal, WhichKs)
+        Ks["KAr"] = KAr * pcx.KArfac(TempK, Pbar, RGas, WhichKs)
     if "KCa" not in Ks:
-        Ks["KCa"] = np.where(
-            (WhichKs == 6) | (WhichKs == 7),  # GEOSECS values
-            solubility.k_calcite_I75(TempK, Sal, Pbar, RGas),
-            solubility.k_calcite_M83(TempK, Sal, Pbar, RGas),
-        )
+        KCa = _get_P0(Ks_P0, ["KCa"], pressured.KCa_P0, TempK, Sal, WhichKs)
+        Ks["KCa"] = KCa * pcx.KCafac(TempK, Pbar, RGas, WhichKs)
     # Extra alkalinity components
     if "alpha" not in Ks:
         Ks["alpha"] = 1e-7
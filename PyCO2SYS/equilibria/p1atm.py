@@ -673,20 +673,20 @@ def kNH3_TOT_CW95(TempK, Sal):
     # Geochimica et Cosmochimica Acta, Vol. 59, No. 12. pp. 2403-2421
     # eq (18)  Total scale   t=[-2 to 40 oC]  S=[0 to 40 ppt]   pK=+-0.00015
     PKNH3expCW = 9.244605 - 2729.33 * (1 / 298.15 - 1 / TempK)
-    PKNH3expCW += (0.04203362 - 11.24742 / TempK) * Sal ** 0.25
-    PKNH3expCW += (
+    PKNH3expCW = PKNH3expCW + (0.04203362 - 11.24742 / TempK) * Sal ** 0.25
+    PKNH3expCW = PKNH3expCW + (
         -13.6416 + 1.176949 * TempK ** 0.5 - 0.02860785 * TempK + 545.4834 / TempK
     ) * Sal ** 0.5
-    PKNH3expCW += (
+    PKNH3expCW = PKNH3expCW + (
         -0.1462507
         + 0.0090226468 * TempK ** 0.5
         - 0.0001471361 * TempK
         + 10.5425 / TempK
     ) * Sal ** 1.5
-    PKNH3expCW += (
+    PKNH3expCW = PKNH3expCW + (
         0.004669309 - 0.0001691742 * TempK ** 0.5 - 0.5677934 / TempK
     ) * Sal ** 2
-    PKNH3expCW += (-2.354039e-05 + 0.009698623 / TempK) * Sal ** 2.5
+    PKNH3expCW = PKNH3expCW + (-2.354039e-05 + 0.009698623 / TempK) * Sal ** 2.5
     KNH3 = 10.0 ** -PKNH3expCW  # this is on the total pH scale in mol/kg-H2O
     KNH3 = KNH3 * (1 - 0.001005 * Sal)  # convert to mol/kg-SW
     return KNH3
@@ -3,7 +3,67 @@
 """Calculate presure correction factors for equilibrium constants."""
 
 from autograd import numpy as np
-from .. import convert
+from .. import convert, solubility
+
+
+def _take(value, rows, shape):
+    """Broadcast `value` to `shape`, flatten, and extract the elements at `rows`."""
+    if np.ndim(value) == 0:
+        return value
+    return np.ravel(np.broadcast_to(value, shape))[rows]
+
+
+def _dispatch(option, cases, *args, nout=1):
+    """Evaluate `func(*args)` for each `(codes, func)` in `cases` only where `option`
+    is one of its `codes`, and return NaN where `option` matches none of them.
+
+    A case with `codes` of `None` is used for all rows not matched by any other case.
+    If `option` is uniform, only the matching `func` is evaluated, over all of `args`.
+    Otherwise, the rows for each case are gathered, evaluated and scattered back with
+    indexing and concatenation, so Autograd can still differentiate through this.
+    If `nout` > 1, each `func` returns a tuple of `nout` results and so does this.
+    """
+    shape = np.broadcast_shapes(*map(np.shape, (option, *args)))
+    cases = sorted(cases, key=lambda case: case[0] is None)
+    # Scalar fast path: only one option is present
+    option = np.asarray(option)
+    if np.ndim(option) == 0 or (
+        np.size(option) > 0 and np.all(option == option.flat[0])
+    ):
+        option_only = option.flat[0]
+        for codes, func in cases:
+            if codes is None or option_only in codes:
+                results = func(*args)
+                break
+        else:
+            results = (np.nan,) * nout if nout > 1 else np.nan
+        if nout > 1:
+            return tuple(np.broadcast_to(result, shape) for result in results)
+        return np.broadcast_to(results, shape)
+    # Mixed options: gather, evaluate and scatter the rows for each case
+    option_flat = np.ravel(np.broadcast_to(option, shape))
+    unmatched = np.full(np.shape(option_flat), True)
+    rows_groups = []
+    results_groups = []
+    for codes, func in cases:
+        F = unmatched if codes is None else unmatched & np.isin(option_flat, codes)
+        if np.any(F):
+            rows = np.flatnonzero(F)
+            unmatched = unmatched & ~F
+            results = func(*[_take(v, rows, shape) for v in args])
+            if nout == 1:
+                results = (results,)
+            rows_groups.append(rows)
+            results_groups.append([np.broadcast_to(r, rows.shape) for r in results])
+    rows = np.flatnonzero(unmatched)
+    rows_groups.append(rows)
+    results_groups.append([np.full(rows.shape, np.nan)] * nout)
+    order = np.argsort(np.concatenate(rows_groups))
+    results = tuple(
+        np.reshape(np.concatenate([group[i] for group in results_groups])[order], shape)
+        for i in range(nout)
+    )
+    return results if nout > 1 else results[0]
 
 
 def Kfac(deltaV, Kappa, Pbar, TempK, RGas):
@@ -33,25 +93,24 @@ def KFfac(TempK, Pbar, RGas):
     return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
 
 
-def KBfac(TempK, Pbar, RGas, WhichKs):
-    """Calculate pressure correction factor for KB."""
-    TempC = convert.TempK2C(TempK)
-    # Freshwater; this doesn't matter since TB = 0 for this case
-    KBfac = np.where(WhichKs == 8, 1.0, np.nan)
+def _KBfac_GEOSECS(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for KB following GEOSECS."""
     # GEOSECS Pressure Effects On K1, K2, KB (on the NBS scale)
     # Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982 quotes
     # Culberson and Pytkowicz, L and O 13:403-417, 1968:
     # but the fits are the same as those in Edmond and Gieskes, GCA, 34:1261-1291, 1970
     # who in turn quote Li, personal communication
-    KBfac = np.where(
-        (WhichKs == 6) | (WhichKs == 7),
-        np.exp((27.5 - 0.095 * TempC) * Pbar / (RGas * TempK)),
-        KBfac,
-    )
-    # Above: this one is handled differently, because the equation doesn't fit the
+    TempC = convert.TempK2C(TempK)
+    # This one is handled differently, because the equation doesn't fit the
     # standard deltaV & Kappa form of _pcxKfac.
-    # Below: this is from Millero, 1979.
+    return np.exp((27.5 - 0.095 * TempC) * Pbar / (RGas * TempK))
+
+
+def _KBfac_M79(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for KB following M79."""
+    # This is from Millero, 1979.
     # It is from data of Culberson and Pytkowicz, 1968.
+    TempC = convert.TempK2C(TempK)
     deltaV = -29.48 + 0.1622 * TempC - 0.002608 * TempC ** 2
     # Millero, 1983 has:
     #   deltaV = -28.56 + .1211*TempCi - .000321*TempCi*TempCi
@@ -65,38 +124,55 @@ def KBfac(TempK, Pbar, RGas, WhichKs):
     #   Kappa = Kappa + .354*(Sali - 34.8)/1000: # Millero,1979
     # Millero, 1983 has:
     #   Kappa = (-3 + .0427*TempCi)/1000
-    KBfac = np.where(
-        (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8),
-        Kfac(deltaV, Kappa, Pbar, TempK, RGas),
-        KBfac,
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
+
+
+def KBfac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for KB."""
+    cases = (
+        # Freshwater; this doesn't matter since TB = 0 for this case
+        ([8], lambda TempK, Pbar, RGas: 1.0),
+        ([6, 7], _KBfac_GEOSECS),
+        (None, _KBfac_M79),
     )
-    return KBfac
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
 
 
-def KWfac(TempK, Pbar, RGas, WhichKs):
-    """Calculate pressure correction factor for KW."""
+def _KWfac_M83_freshwater(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for KW in freshwater following M83."""
     TempC = convert.TempK2C(TempK)
-    deltaV = np.full(np.shape(TempK), np.nan)
-    Kappa = np.full(np.shape(TempK), np.nan)
-    F = WhichKs == 8  # freshwater case
     # This is from Millero, 1983.
-    deltaV = np.where(F, -25.6 + 0.2324 * TempC - 0.0036246 * TempC ** 2, deltaV)
-    Kappa = np.where(F, (-7.33 + 0.1368 * TempC - 0.001233 * TempC ** 2) / 1000, Kappa)
+    deltaV = -25.6 + 0.2324 * TempC - 0.0036246 * TempC ** 2
+    Kappa = (-7.33 + 0.1368 * TempC - 0.001233 * TempC ** 2) / 1000
     # Note: the temperature dependence of KappaK1 and KappaKW for freshwater
     # in Millero, 1983 are the same.
-    F = WhichKs != 8
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
+
+
+def _KWfac_M83(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for KW in seawater following M83."""
+    TempC = convert.TempK2C(TempK)
     # GEOSECS doesn't include OH term, so this won't matter.
     # Peng et al didn't include pressure, but here I assume that the KW
     # correction is the same as for the other seawater cases.
     # This is from Millero, 1983 and his programs CO2ROY(T).BAS.
-    deltaV = np.where(F, -20.02 + 0.1119 * TempC - 0.001409 * TempC ** 2, deltaV)
+    deltaV = -20.02 + 0.1119 * TempC - 0.001409 * TempC ** 2
     # Millero, 1992 and Millero, 1995 have:
-    Kappa = np.where(F, (-5.13 + 0.0794 * TempC) / 1000, Kappa)  # Millero, 1983
+    Kappa = (-5.13 + 0.0794 * TempC) / 1000  # Millero, 1983
     # Millero, 1995 has this too, but Millero, 1992 is different.
     # Millero, 1979 does not list values for these.
     return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
 
 
+def KWfac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for KW."""
+    cases = (
+        ([8], _KWfac_M83_freshwater),  # freshwater case
+        (None, _KWfac_M83),
+    )
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
+
+
 def KP1fac(TempK, Pbar, RGas):
     """Calculate pressure correction factor for KP1."""
     TempC = convert.TempK2C(TempK)
@@ -156,28 +232,32 @@ def KNH3fac(TempK, Pbar, RGas):
     return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
 
 
-def K1fac(TempK, Pbar, RGas, WhichKs):
-    """Calculate pressure correction factor for K1."""
+def _K1fac_M83_freshwater(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K1 in freshwater following M83."""
     TempC = convert.TempK2C(TempK)
-    K1fac = np.full(
-        np.shape(TempK), np.nan
-    )  # because GEOSECS doesn't use _pcxKfac p1atm.
-    F = WhichKs == 8  # freshwater
     # Pressure effects on K1 in freshwater: this is from Millero, 1983.
     deltaV = -30.54 + 0.1849 * TempC - 0.0023366 * TempC ** 2
     Kappa = (-6.22 + 0.1368 * TempC - 0.001233 * TempC ** 2) / 1000
-    K1fac = np.where(F, Kfac(deltaV, Kappa, Pbar, TempK, RGas), K1fac)
-    F = (WhichKs == 6) | (WhichKs == 7)
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
+
+
+def _K1fac_GEOSECS(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K1 following GEOSECS."""
+    TempC = convert.TempK2C(TempK)
     # GEOSECS Pressure Effects On K1, K2, KB (on the NBS scale)
     # Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982 quotes
     # Culberson and Pytkowicz, L and O 13:403-417, 1968:
     # but the fits are the same as those in
     # Edmond and Gieskes, GCA, 34:1261-1291, 1970
     # who in turn quote Li, personal communication
-    K1fac = np.where(F, np.exp((24.2 - 0.085 * TempC) * Pbar / (RGas * TempK)), K1fac)
     # This one is handled differently because the equation doesn't fit the
     # standard deltaV & Kappa form of _pcxKfac.
-    F = (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8)
+    return np.exp((24.2 - 0.085 * TempC) * Pbar / (RGas * TempK))
+
+
+def _K1fac_M95(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K1 following M95."""
+    TempC = convert.TempK2C(TempK)
     # These are from Millero, 1995.
     # They are the same as Millero, 1979 and Millero, 1992.
     # They are from data of Culberson and Pytkowicz, 1968.
@@ -186,34 +266,47 @@ def K1fac(TempK, Pbar, RGas, WhichKs):
     Kappa = (-3.08 + 0.0877 * TempC) / 1000
     # Kappa = Kappa - .578*(Sali - 34.8)/1000 # Millero, 1979
     # The fits given in Millero, 1983 are somewhat different.
-    K1fac = np.where(F, Kfac(deltaV, Kappa, Pbar, TempK, RGas), K1fac)
-    return K1fac
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
 
 
-def K2fac(TempK, Pbar, RGas, WhichKs):
-    """Calculate pressure correction factor for K2."""
+def K1fac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for K1."""
+    cases = (
+        ([8], _K1fac_M83_freshwater),  # freshwater
+        ([6, 7], _K1fac_GEOSECS),  # GEOSECS doesn't use _pcxKfac p1atm.
+        (None, _K1fac_M95),
+    )
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
+
+
+def _K2fac_M83_freshwater(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K2 in freshwater following M83."""
     TempC = convert.TempK2C(TempK)
-    K2fac = np.full(
-        np.shape(TempK), np.nan
-    )  # because GEOSECS doesn't use _pcxKfac p1atm.
-    F = WhichKs == 8  # freshwater
     # Pressure effects on K2 in freshwater: this is from Millero, 1983.
     deltaV = -29.81 + 0.115 * TempC - 0.001816 * TempC ** 2
     Kappa = (-5.74 + 0.093 * TempC - 0.001896 * TempC ** 2) / 1000
-    K2fac = np.where(F, Kfac(deltaV, Kappa, Pbar, TempK, RGas), K2fac)
-    F = (WhichKs == 6) | (WhichKs == 7)
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
+
+
+def _K2fac_GEOSECS(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K2 following GEOSECS."""
+    TempC = convert.TempK2C(TempK)
     # GEOSECS Pressure Effects On K1, K2, KB (on the NBS scale)
     # Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982 quotes
     # Culberson and Pytkowicz, L and O 13:403-417, 1968:
     # but the fits are the same as those in
     # Edmond and Gieskes, GCA, 34:1261-1291, 1970
     # who in turn quote Li, personal communication
-    K2fac = np.where(F, np.exp((16.4 - 0.04 * TempC) * Pbar / (RGas * TempK)), K2fac)
     # Takahashi et al had 26.4, but 16.4 is from Edmond and Gieskes
     # and matches the GEOSECS results
     # This one is handled differently because the equation doesn't fit the
     # standard deltaV & Kappa form of _pcxKfac.
-    F = (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8)
+    return np.exp((16.4 - 0.04 * TempC) * Pbar / (RGas * TempK))
+
+
+def _K2fac_M95(TempK, Pbar, RGas):
+    """Calculate pressure correction factor for K2 following M95."""
+    TempC = convert.TempK2C(TempK)
     # These are from Millero, 1995.
     # They are the same as Millero, 1979 and Millero, 1992.
     # They are from data of Culberson and Pytkowicz, 1968.
@@ -223,5 +316,32 @@ def K2fac(TempK, Pbar, RGas, WhichKs):
     # Kappa = Kappa - .314*(Sali - 34.8)/1000 # Millero, 1979
     # The fit given in Millero, 1983 is different.
     # Not by a lot for deltaV, but by much for Kappa.
-    K2fac = np.where(F, Kfac(deltaV, Kappa, Pbar, TempK, RGas), K2fac)
-    return K2fac
+    return Kfac(deltaV, Kappa, Pbar, TempK, RGas)
+
+
+def K2fac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for K2."""
+    cases = (
+        ([8], _K2fac_M83_freshwater),  # freshwater
+        ([6, 7], _K2fac_GEOSECS),  # GEOSECS doesn't use _pcxKfac p1atm.
+        (None, _K2fac_M95),
+    )
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
+
+
+def KArfac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for KAr."""
+    cases = (
+        ([6, 7], solubility.pcx_aragonite_GEOSECS),
+        (None, solubility.pcx_aragonite_M79),
+    )
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
+
+
+def KCafac(TempK, Pbar, RGas, WhichKs):
+    """Calculate pressure correction factor for KCa."""
+    cases = (
+        ([6, 7], solubility.pcx_calcite_GEOSECS),
+        (None, solubility.pcx_calcite_I75),
+    )
+    return _dispatch(WhichKs, cases, TempK, Pbar, RGas)
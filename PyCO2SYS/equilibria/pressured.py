@@ -4,30 +4,52 @@
 
 from autograd import numpy as np
 from . import p1atm, pcx
-from .. import convert
+from .. import convert, solubility
 
+# Each constant is evaluated at atmospheric pressure by its `_P0` function, which does
+# not depend on pressure, and then multiplied by its pressure correction factor from
+# `pcx`.  The `_P0` values can therefore be reused for the same temperature, salinity
+# and options at any pressure.
 
-def KSO4(TempK, Sal, Pbar, RGas, WhoseKSO4):
-    """Calculate bisulfate ion dissociation constant for the given options."""
+
+def KSO4_P0(TempK, Sal, WhoseKSO4):
+    """Calculate bisulfate ion dissociation constant at atmospheric pressure for the
+    given options.
+    """
     assert np.all(
         np.isin(WhoseKSO4, [1, 2])
     ), "Valid `WhoseKSO4` options are: `1` or `2`."
+    return pcx._dispatch(
+        WhoseKSO4,
+        (([1], p1atm.kHSO4_FREE_D90a), ([2], p1atm.kHSO4_FREE_KRCB77)),
+        TempK,
+        Sal,
+    )
+
+
+def KSO4(TempK, Sal, Pbar, RGas, WhoseKSO4):
+    """Calculate bisulfate ion dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KSO4 = np.full(np.shape(TempK), np.nan)
-    KSO4 = np.where(WhoseKSO4 == 1, p1atm.kHSO4_FREE_D90a(TempK, Sal), KSO4)
-    KSO4 = np.where(WhoseKSO4 == 2, p1atm.kHSO4_FREE_KRCB77(TempK, Sal), KSO4)
+    KSO4 = KSO4_P0(TempK, Sal, WhoseKSO4)
     # Now correct for seawater pressure
     KSO4 = KSO4 * pcx.KSO4fac(TempK, Pbar, RGas)
     return KSO4
 
 
+def KF_P0(TempK, Sal, WhoseKF):
+    """Calculate HF dissociation constant at atmospheric pressure for the given
+    options.
+    """
+    assert np.all(np.isin(WhoseKF, [1, 2])), "Valid `WhoseKF` options are: `1` or `2`."
+    return pcx._dispatch(
+        WhoseKF, (([1], p1atm.kHF_FREE_DR79), ([2], p1atm.kHF_FREE_PF87)), TempK, Sal,
+    )
+
+
 def KF(TempK, Sal, Pbar, RGas, WhoseKF):
     """Calculate HF dissociation constant for the given options."""
-    assert np.all(np.isin(WhoseKF, [1, 2])), "Valid `WhoseKF` options are: `1` or `2`."
     # Evaluate at atmospheric pressure
-    KF = np.full(np.shape(TempK), np.nan)
-    KF = np.where(WhoseKF == 1, p1atm.kHF_FREE_DR79(TempK, Sal), KF)
-    KF = np.where(WhoseKF == 2, p1atm.kHF_FREE_PF87(TempK, Sal), KF)
+    KF = KF_P0(TempK, Sal, WhoseKF)
     # Now correct for seawater pressure
     KF = KF * pcx.KFfac(TempK, Pbar, RGas)
     return KF
@@ -35,70 +57,95 @@ def KF(TempK, Sal, Pbar, RGas, WhoseKF):
 
 def fH(TempK, Sal, WhichKs):
     """Calculate NBS to Seawater pH scale conversion factor for the given options."""
-    fH = np.where(WhichKs == 8, 1.0, np.nan)
-    fH = np.where(WhichKs == 7, convert.fH_PTBO87(TempK, Sal), fH)
-    # Use GEOSECS's value for all other cases
-    fH = np.where((WhichKs != 7) & (WhichKs != 8), convert.fH_TWB82(TempK, Sal), fH)
-    return fH
+    cases = (
+        ([8], lambda TempK, Sal: 1.0),
+        ([7], convert.fH_PTBO87),
+        # Use GEOSECS's value for all other cases
+        (None, convert.fH_TWB82),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal)
+
+
+def _zero(*args):
+    """Return zero, for the parameters that are not included in some options."""
+    return 0.0
+
+
+def KB_P0(TempK, Sal, WhichKs, fH, SWStoTOT0):
+    """Calculate boric acid dissociation constant at atmospheric pressure for the
+    given options.
+    """
+    cases = (
+        ([8], _zero),  # pure water case
+        (
+            [6, 7],
+            lambda TempK, Sal, fH, SWStoTOT0: p1atm.kBOH3_NBS_LTB69(TempK, Sal) / fH,
+        ),  # convert NBS to SWS
+        (
+            None,
+            lambda TempK, Sal, fH, SWStoTOT0: p1atm.kBOH3_TOT_D90b(TempK, Sal)
+            / SWStoTOT0,
+        ),  # convert TOT to SWS
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal, fH, SWStoTOT0)
 
 
 def KB(TempK, Sal, Pbar, RGas, WhichKs, fH, SWStoTOT0):
     """Calculate boric acid dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KB = np.full(np.shape(TempK), np.nan)
-    KB = np.where(WhichKs == 8, 0.0, KB)  # pure water case
-    KB = np.where(
-        (WhichKs == 6) | (WhichKs == 7), p1atm.kBOH3_NBS_LTB69(TempK, Sal) / fH, KB
-    )  # convert NBS to SWS
-    KB = np.where(
-        (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8),
-        p1atm.kBOH3_TOT_D90b(TempK, Sal) / SWStoTOT0,
-        KB,
-    )  # convert TOT to SWS
+    KB = KB_P0(TempK, Sal, WhichKs, fH, SWStoTOT0)
     # Now correct for seawater pressure
     KB = KB * pcx.KBfac(TempK, Pbar, RGas, WhichKs)
     return KB
 
 
+def KW_P0(TempK, Sal, WhichKs):
+    """Calculate water dissociation constant at atmospheric pressure for the given
+    options.
+    """
+    cases = (
+        ([6], _zero),  # GEOSECS doesn't include OH effects
+        ([7], p1atm.kH2O_SWS_M79),
+        ([8], p1atm.kH2O_SWS_HO58_M79),
+        (None, p1atm.kH2O_SWS_M95),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal)
+
+
 def KW(TempK, Sal, Pbar, RGas, WhichKs):
     """Calculate water dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KW = np.full(np.shape(TempK), np.nan)
-    KW = np.where(WhichKs == 6, 0.0, KW)  # GEOSECS doesn't include OH effects
-    KW = np.where(WhichKs == 7, p1atm.kH2O_SWS_M79(TempK, Sal), KW)
-    KW = np.where(WhichKs == 8, p1atm.kH2O_SWS_HO58_M79(TempK, Sal), KW)
-    KW = np.where(
-        (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8),
-        p1atm.kH2O_SWS_M95(TempK, Sal),
-        KW,
-    )
+    KW = KW_P0(TempK, Sal, WhichKs)
     # Now correct for seawater pressure
     KW = KW * pcx.KWfac(TempK, Pbar, RGas, WhichKs)
     return KW
 
 
+def _KP_KP67(TempK, Sal, fH):
+    """Calculate phosphoric acid dissociation constants following KP67."""
+    KP1, KP2, KP3 = p1atm.kH3PO4_NBS_KP67(TempK, Sal)
+    # KP1 is already on SWS!  Convert KP2 and KP3 from NBS to SWS
+    return KP1, KP2 / fH, KP3 / fH
+
+
+def KP_P0(TempK, Sal, WhichKs, fH):
+    """Calculate phosphoric acid dissociation constants at atmospheric pressure for the
+    given options.
+    """
+    cases = (
+        ([7], _KP_KP67),
+        # Note: neither the GEOSECS choice nor the freshwater choice include
+        # contributions from phosphate or silicate.
+        ([6, 8], lambda TempK, Sal, fH: (0.0, 0.0, 0.0)),
+        (None, lambda TempK, Sal, fH: p1atm.kH3PO4_SWS_YM95(TempK, Sal)),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal, fH, nout=3)
+
+
 def KP(TempK, Sal, Pbar, RGas, WhichKs, fH):
     """Calculate phosphoric acid dissociation constants for the given options."""
     # Evaluate at atmospheric pressure
-    KP1 = np.full(np.shape(TempK), np.nan)
-    KP2 = np.full(np.shape(TempK), np.nan)
-    KP3 = np.full(np.shape(TempK), np.nan)
-    F = WhichKs == 7
-    KP1_KP67, KP2_KP67, KP3_KP67 = p1atm.kH3PO4_NBS_KP67(TempK, Sal)
-    KP1 = np.where(F, KP1_KP67, KP1)  # already on SWS!
-    KP2 = np.where(F, KP2_KP67 / fH, KP2)  # convert NBS to SWS
-    KP3 = np.where(F, KP3_KP67 / fH, KP3)  # convert NBS to SWS
-    F = (WhichKs == 6) | (WhichKs == 8)
-    # Note: neither the GEOSECS choice nor the freshwater choice include
-    # contributions from phosphate or silicate.
-    KP1 = np.where(F, 0.0, KP1)
-    KP2 = np.where(F, 0.0, KP2)
-    KP3 = np.where(F, 0.0, KP3)
-    F = (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8)
-    KP1_YM95, KP2_YM95, KP3_YM95 = p1atm.kH3PO4_SWS_YM95(TempK, Sal)
-    KP1 = np.where(F, KP1_YM95, KP1)
-    KP2 = np.where(F, KP2_YM95, KP2)
-    KP3 = np.where(F, KP3_YM95, KP3)
+    KP1, KP2, KP3 = KP_P0(TempK, Sal, WhichKs, fH)
     # Now correct for seawater pressure
     # === CO2SYS.m comments: =======
     # These corrections don't matter for the GEOSECS choice (WhichKs = 6) and
@@ -112,90 +159,162 @@ def KP(TempK, Sal, Pbar, RGas, WhichKs, fH):
     return KP1, KP2, KP3
 
 
+def KSi_P0(TempK, Sal, WhichKs, fH):
+    """Calculate silicate dissociation constant at atmospheric pressure for the given
+    options.
+    """
+    cases = (
+        (
+            [7],
+            lambda TempK, Sal, fH: p1atm.kSi_NBS_SMB64(TempK, Sal) / fH,
+        ),  # convert NBS to SWS
+        # Note: neither the GEOSECS choice nor the freshwater choice include
+        # contributions from phosphate or silicate.
+        ([6, 8], _zero),
+        (None, lambda TempK, Sal, fH: p1atm.kSi_SWS_YM95(TempK, Sal)),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal, fH)
+
+
 def KSi(TempK, Sal, Pbar, RGas, WhichKs, fH):
     """Calculate silicate dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KSi = np.full(np.shape(TempK), np.nan)
-    KSi = np.where(
-        WhichKs == 7, p1atm.kSi_NBS_SMB64(TempK, Sal) / fH, KSi
-    )  # convert NBS to SWS
-    # Note: neither the GEOSECS choice nor the freshwater choice include
-    # contributions from phosphate or silicate.
-    KSi = np.where((WhichKs == 6) | (WhichKs == 8), 0.0, KSi)
-    KSi = np.where(
-        (WhichKs != 6) & (WhichKs != 7) & (WhichKs != 8),
-        p1atm.kSi_SWS_YM95(TempK, Sal),
-        KSi,
-    )
+    KSi = KSi_P0(TempK, Sal, WhichKs, fH)
     # Now correct for seawater pressure
     KSi = KSi * pcx.KSifac(TempK, Pbar, RGas)
     return KSi
 
 
+def KH2S_P0(TempK, Sal, WhichKs, SWStoTOT0):
+    """Calculate hydrogen disulfide dissociation constant at atmospheric pressure for
+    the given options.
+    """
+    cases = (
+        ([6, 7, 8], _zero),
+        (
+            None,
+            lambda TempK, Sal, SWStoTOT0: p1atm.kH2S_TOT_YM95(TempK, Sal) / SWStoTOT0,
+        ),  # convert TOT to SWS
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal, SWStoTOT0)
+
+
 def KH2S(TempK, Sal, Pbar, RGas, WhichKs, SWStoTOT0):
     """Calculate hydrogen disulfide dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KH2S = np.where(
-        (WhichKs == 6) | (WhichKs == 7) | (WhichKs == 8),
-        0.0,
-        p1atm.kH2S_TOT_YM95(TempK, Sal) / SWStoTOT0,
-    )  # convert TOT to SWS
+    KH2S = KH2S_P0(TempK, Sal, WhichKs, SWStoTOT0)
     # Now correct for seawater pressure
     KH2S = KH2S * pcx.KH2Sfac(TempK, Pbar, RGas)
     return KH2S
 
 
+def KNH3_P0(TempK, Sal, WhichKs, SWStoTOT0):
+    """Calculate ammonium dissociation constant at atmospheric pressure for the given
+    options.
+    """
+    cases = (
+        ([6, 7, 8], _zero),
+        (
+            None,
+            lambda TempK, Sal, SWStoTOT0: p1atm.kNH3_TOT_CW95(TempK, Sal) / SWStoTOT0,
+        ),  # convert TOT to SWS
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal, SWStoTOT0)
+
+
 def KNH3(TempK, Sal, Pbar, RGas, WhichKs, SWStoTOT0):
     """Calculate ammonium dissociation constant for the given options."""
     # Evaluate at atmospheric pressure
-    KNH3 = np.where(
-        (WhichKs == 6) | (WhichKs == 7) | (WhichKs == 8),
-        0.0,
-        p1atm.kNH3_TOT_CW95(TempK, Sal) / SWStoTOT0,
-    )  # convert TOT to SWS
+    KNH3 = KNH3_P0(TempK, Sal, WhichKs, SWStoTOT0)
     # Now correct for seawater pressure
     KNH3 = KNH3 * pcx.KNH3fac(TempK, Pbar, RGas)
     return KNH3
 
 
-def _getKC(F, Kfunc, pHcx, K1, K2, ts):
-    """Convenience function for getting and setting K1 and K2 values."""
-    K1_F, K2_F = Kfunc(*ts)
-    K1 = np.where(F, K1_F / pHcx, K1)
-    K2 = np.where(F, K2_F / pHcx, K2)
-    return K1, K2
+def _getKC(Kfunc, pHscale):
+    """Wrap `Kfunc` to convert its K1 and K2 from `pHscale` to the Seawater scale."""
+
+    def getKC(TempK, Sal, fH, SWStoTOT0):
+        K1, K2 = Kfunc(TempK, Sal)
+        pHcx = {"SWS": 1.0, "NBS": fH, "TOT": SWStoTOT0}[pHscale]
+        return K1 / pHcx, K2 / pHcx
+
+    return getKC
+
+
+# Which carbonic acid parameterisation is used for each `WhichKs` option
+KC_cases = (
+    ([1], _getKC(p1atm.kH2CO3_TOT_RRV93, "TOT")),
+    ([2], _getKC(p1atm.kH2CO3_SWS_GP89, "SWS")),
+    ([3], _getKC(p1atm.kH2CO3_SWS_H73_DM87, "SWS")),
+    ([4], _getKC(p1atm.kH2CO3_SWS_MCHP73_DM87, "SWS")),
+    ([5], _getKC(p1atm.kH2CO3_SWS_HM_DM87, "SWS")),
+    ([6, 7], _getKC(p1atm.kH2CO3_NBS_MCHP73, "NBS")),
+    ([8], _getKC(p1atm.kH2CO3_SWS_M79, "SWS")),
+    ([9], _getKC(p1atm.kH2CO3_NBS_CW98, "NBS")),
+    ([10], _getKC(p1atm.kH2CO3_TOT_LDK00, "TOT")),
+    ([11], _getKC(p1atm.kH2CO3_SWS_MM02, "SWS")),
+    ([12], _getKC(p1atm.kH2CO3_SWS_MPL02, "SWS")),
+    ([13], _getKC(p1atm.kH2CO3_SWS_MGH06, "SWS")),
+    ([14], _getKC(p1atm.kH2CO3_SWS_M10, "SWS")),
+    ([15], _getKC(p1atm.kH2CO3_SWS_WMW14, "SWS")),
+    # Added v1.4.1:
+    ([16], _getKC(p1atm.kH2CO3_TOT_SLH20, "TOT")),
+)
+
+
+def KC_P0(TempK, Sal, WhichKs, fH, SWStoTOT0):
+    """Calculate carbonic acid dissociation constants at atmospheric pressure for the
+    given options.
+
+    Only the parameterisations in `KC_cases` that are selected by `WhichKs` are
+    evaluated.
+    """
+    return pcx._dispatch(WhichKs, KC_cases, TempK, Sal, fH, SWStoTOT0, nout=2)
 
 
 def KC(TempK, Sal, Pbar, RGas, WhichKs, fH, SWStoTOT0):
     """Calculate carbonic acid dissociation constants for the given options."""
     # Evaluate at atmospheric pressure
-    K1 = np.full(np.shape(TempK), np.nan)
-    K2 = np.full(np.shape(TempK), np.nan)
-    ts = (TempK, Sal)  # for convenience
-    K1, K2 = _getKC(WhichKs == 1, p1atm.kH2CO3_TOT_RRV93, SWStoTOT0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 2, p1atm.kH2CO3_SWS_GP89, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 3, p1atm.kH2CO3_SWS_H73_DM87, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 4, p1atm.kH2CO3_SWS_MCHP73_DM87, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 5, p1atm.kH2CO3_SWS_HM_DM87, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(
-        (WhichKs == 6) | (WhichKs == 7), p1atm.kH2CO3_NBS_MCHP73, fH, K1, K2, ts
-    )
-    K1, K2 = _getKC(WhichKs == 8, p1atm.kH2CO3_SWS_M79, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 9, p1atm.kH2CO3_NBS_CW98, fH, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 10, p1atm.kH2CO3_TOT_LDK00, SWStoTOT0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 11, p1atm.kH2CO3_SWS_MM02, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 12, p1atm.kH2CO3_SWS_MPL02, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 13, p1atm.kH2CO3_SWS_MGH06, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 14, p1atm.kH2CO3_SWS_M10, 1.0, K1, K2, ts)
-    K1, K2 = _getKC(WhichKs == 15, p1atm.kH2CO3_SWS_WMW14, 1.0, K1, K2, ts)
-    # Added v1.4.1:
-    K1, K2 = _getKC(WhichKs == 16, p1atm.kH2CO3_TOT_SLH20, SWStoTOT0, K1, K2, ts)
+    K1, K2 = KC_P0(TempK, Sal, WhichKs, fH, SWStoTOT0)
     # Now correct for seawater pressure
     K1 = K1 * pcx.K1fac(TempK, Pbar, RGas, WhichKs)
     K2 = K2 * pcx.K2fac(TempK, Pbar, RGas, WhichKs)
     return K1, K2
 
 
+def KAr_P0(TempK, Sal, WhichKs):
+    """Calculate aragonite solubility product at atmospheric pressure for the given
+    options.
+    """
+    cases = (
+        ([6, 7], solubility.k_aragonite_P0_GEOSECS),  # GEOSECS values
+        (None, solubility.k_aragonite_P0_M83),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal)
+
+
+def KAr(TempK, Sal, Pbar, RGas, WhichKs):
+    """Calculate aragonite solubility product for the given options."""
+    return KAr_P0(TempK, Sal, WhichKs) * pcx.KArfac(TempK, Pbar, RGas, WhichKs)
+
+
+def KCa_P0(TempK, Sal, WhichKs):
+    """Calculate calcite solubility product at atmospheric pressure for the given
+    options.
+    """
+    cases = (
+        ([6, 7], solubility.k_calcite_P0_I75),  # GEOSECS values
+        (None, solubility.k_calcite_P0_M83),
+    )
+    return pcx._dispatch(WhichKs, cases, TempK, Sal)
+
+
+def KCa(TempK, Sal, Pbar, RGas, WhichKs):
+    """Calculate calcite solubility product for the given options."""
+    return KCa_P0(TempK, Sal, WhichKs) * pcx.KCafac(TempK, Pbar, RGas, WhichKs)
+
+
 # Original notes from CO2SYS-MATLAB regarding pressure corrections:
 # ****************************************************************************
 # Correct dissociation constants for pressure
@@ -95,9 +95,10 @@ def fromSal(Sal, WhichKs, WhoseTB, totals=None):
     """Estimate total molinities of calcium, borate, fluoride and sulfate from salinity.
 
     Subfunctions based on Constants, version 04.01, 10-13-97, by Ernie Lewis.
+
+    A provided `totals` dict is copied, so that it is not modified.
     """
-    if totals is None:
-        totals = {}
+    totals = {} if totals is None else dict(totals)
     if "TB" not in totals:
         TB = _co2sys_TB(Sal, WhichKs, WhoseTB)
         totals["TB"] = TB
@@ -15,31 +15,44 @@ def _deltaKappaCalcite_I75(TempC):
     return deltaVKCa, KappaKCa
 
 
-def k_calcite_M83(TempK, Sal, Pbar, RGas):
-    """Calcite solubility following M83."""
+def k_calcite_P0_M83(TempK, Sal):
+    """Calcite solubility following M83 with no pressure correction."""
     logKCa = -171.9065 - 0.077993 * TempK + 2839.319 / TempK
     logKCa = logKCa + 71.595 * np.log10(TempK)
     logKCa = logKCa + (-0.77712 + 0.0028426 * TempK + 178.34 / TempK) * np.sqrt(Sal)
     logKCa = logKCa - 0.07711 * Sal + 0.0041249 * np.sqrt(Sal) * Sal
     # sd fit = .01 (for Sal part, not part independent of Sal)
-    KCa = 10.0 ** logKCa  # this is in (mol/kg-SW)^2 at zero pressure
-    # Add pressure correction for calcite [I75, M79]
+    return 10.0 ** logKCa  # this is in (mol/kg-SW)^2 at zero pressure
+
+
+def pcx_calcite_I75(TempK, Pbar, RGas):
+    """Pressure correction factor for calcite solubility following I75 and M79."""
     TempC = convert.TempK2C(TempK)
     deltaVKCa, KappaKCa = _deltaKappaCalcite_I75(TempC)
     lnKCafac = (-deltaVKCa + 0.5 * KappaKCa * Pbar) * Pbar / (RGas * TempK)
-    KCa = KCa * np.exp(lnKCafac)
+    return np.exp(lnKCafac)
+
+
+def k_calcite_M83(TempK, Sal, Pbar, RGas):
+    """Calcite solubility following M83."""
+    KCa = k_calcite_P0_M83(TempK, Sal)
+    # Add pressure correction for calcite [I75, M79]
+    KCa = KCa * pcx_calcite_I75(TempK, Pbar, RGas)
     return KCa
 
 
-def k_aragonite_M83(TempK, Sal, Pbar, RGas):
-    """Aragonite solubility following M83 with pressure correction of I75."""
+def k_aragonite_P0_M83(TempK, Sal):
+    """Aragonite solubility following M83 with no pressure correction."""
     logKAr = -171.945 - 0.077993 * TempK + 2903.293 / TempK
     logKAr = logKAr + 71.595 * np.log10(TempK)
     logKAr = logKAr + (-0.068393 + 0.0017276 * TempK + 88.135 / TempK) * np.sqrt(Sal)
     logKAr = logKAr - 0.10018 * Sal + 0.0059415 * np.sqrt(Sal) * Sal
     # sd fit = .009 (for Sal part, not part independent of Sal)
-    KAr = 10.0 ** logKAr  # this is in (mol/kg-SW)^2
-    # Add pressure correction for aragonite [M79]:
+    return 10.0 ** logKAr  # this is in (mol/kg-SW)^2
+
+
+def pcx_aragonite_M79(TempK, Pbar, RGas):
+    """Pressure correction factor for aragonite solubility following M79."""
     TempC = convert.TempK2C(TempK)
     deltaVKCa, KappaKCa = _deltaKappaCalcite_I75(TempC)
     # Same as Millero, GCA 1995 except for typos (-.5304, -.3692,
@@ -47,7 +60,14 @@ def k_aragonite_M83(TempK, Sal, Pbar, RGas):
     deltaVKAr = deltaVKCa + 2.8
     KappaKAr = KappaKCa
     lnKArfac = (-deltaVKAr + 0.5 * KappaKAr * Pbar) * Pbar / (RGas * TempK)
-    KAr = KAr * np.exp(lnKArfac)
+    return np.exp(lnKArfac)
+
+
+def k_aragonite_M83(TempK, Sal, Pbar, RGas):
+    """Aragonite solubility following M83 with pressure correction of I75."""
+    KAr = k_aragonite_P0_M83(TempK, Sal)
+    # Add pressure correction for aragonite [M79]:
+    KAr = KAr * pcx_aragonite_M79(TempK, Pbar, RGas)
     return KAr
 
 
@@ -64,6 +84,19 @@ def k_calcite_P0_I75(TempK, Sal):
     )
 
 
+def pcx_calcite_GEOSECS(TempK, Pbar, RGas):
+    """Pressure correction factor for calcite solubility following GEOSECS."""
+    # === CO2SYS.m comments: =======
+    # Culberson and Pytkowicz, Limnology and Oceanography 13:403-417, 1968
+    # (quoted in Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982
+    # but their paper is not even on this topic).
+    # The fits appears to be new in the GEOSECS report.
+    # I can't find them anywhere else.
+    # ==============================
+    TempC = convert.TempK2C(TempK)
+    return np.exp((36 - 0.2 * TempC) * Pbar / (RGas * TempK))
+
+
 def k_calcite_I75(TempK, Sal, Pbar, RGas):
     """Calcite solubility constant following ICHP73/I75 with pressure correction.
     For use with GEOSECS constants.
@@ -77,19 +110,11 @@ def k_calcite_I75(TempK, Sal, Pbar, RGas):
     # ==============================
     KCa = k_calcite_P0_I75(TempK, Sal)
     # Now add pressure correction
-    # === CO2SYS.m comments: =======
-    # Culberson and Pytkowicz, Limnology and Oceanography 13:403-417, 1968
-    # (quoted in Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982
-    # but their paper is not even on this topic).
-    # The fits appears to be new in the GEOSECS report.
-    # I can't find them anywhere else.
-    # ==============================
-    TempC = convert.TempK2C(TempK)
-    KCa = KCa * np.exp((36 - 0.2 * TempC) * Pbar / (RGas * TempK))
+    KCa = KCa * pcx_calcite_GEOSECS(TempK, Pbar, RGas)
     return KCa
 
 
-def k_aragonite_GEOSECS(TempK, Sal, Pbar, RGas):
+def k_aragonite_P0_GEOSECS(TempK, Sal):
     """Aragonite solubility following ICHP73 with no pressure correction.
     For use with GEOSECS constants.
     """
@@ -101,7 +126,11 @@ def k_aragonite_GEOSECS(TempK, Sal, Pbar, RGas):
     KAr = 1.45 * KCa  # this is in (mol/kg-SW)^2
     # Berner (p. 722) states that he uses 1.48.
     # It appears that 1.45 was used in the GEOSECS calculations
-    # Now add pressure correction
+    return KAr
+
+
+def pcx_aragonite_GEOSECS(TempK, Pbar, RGas):
+    """Pressure correction factor for aragonite solubility following GEOSECS."""
     # === CO2SYS.m comments: =======
     # Culberson and Pytkowicz, Limnology and Oceanography 13:403-417, 1968
     # (quoted in Takahashi et al, GEOSECS Pacific Expedition v. 3, 1982
@@ -109,7 +138,16 @@ def k_aragonite_GEOSECS(TempK, Sal, Pbar, RGas):
     # The fits appears to be new in the GEOSECS report.
     # I can't find them anywhere else.
     TempC = convert.TempK2C(TempK)
-    KAr = KAr * np.exp((33.3 - 0.22 * TempC) * Pbar / (RGas * TempK))
+    return np.exp((33.3 - 0.22 * TempC) * Pbar / (RGas * TempK))
+
+
+def k_aragonite_GEOSECS(TempK, Sal, Pbar, RGas):
+    """Aragonite solubility following ICHP73 with pressure correction.
+    For use with GEOSECS constants.
+    """
+    KAr = k_aragonite_P0_GEOSECS(TempK, Sal)
+    # Now add pressure correction
+    KAr = KAr * pcx_aragonite_GEOSECS(TempK, Pbar, RGas)
     return KAr
 
 
@@ -133,116 +133,342 @@ def getIcase(par1type, par2type, checks=True):
     return Icase
 
 
-def fill(Icase, TA, TC, PH, PC, FC, CARB, HCO3, CO2, totals, Ks):
-    """Fill part-empty core marine carbonate system variable columns with solutions."""
+def _fill_TA_TC(
+    TA, TC, PH, FC, CARB, HCO3, totals, Ks, full_output=False, **solver_kwargs
+):
+    """Solve the core marine carbonate system from TA and TC."""
+    PH = get.pHfromTATC(
+        TA - totals["PengCorrection"],
+        TC,
+        totals,
+        Ks,
+        full_output=full_output,
+        **solver_kwargs,
+    )
+    if full_output:
+        PH, solver_info = PH
+    # ^pH is returned on the same scale as `Ks`
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    if full_output:
+        return TA, TC, PH, FC, CARB, HCO3, solver_info
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TA_pH(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from TA and pH."""
+    TC = get.TCfromTApH(TA - totals["PengCorrection"], PH, totals, Ks)
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TA_fCO2(
+    TA, TC, PH, FC, CARB, HCO3, totals, Ks, full_output=False, **solver_kwargs
+):
+    """Solve the core marine carbonate system from TA and [pCO2|fCO2|CO2aq]."""
+    PH = get.pHfromTAfCO2(
+        TA - totals["PengCorrection"],
+        FC,
+        totals,
+        Ks,
+        full_output=full_output,
+        **solver_kwargs,
+    )
+    if full_output:
+        PH, solver_info = PH
+    TC = get.TCfromTApH(TA - totals["PengCorrection"], PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    if full_output:
+        return TA, TC, PH, FC, CARB, HCO3, solver_info
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TA_CARB(
+    TA, TC, PH, FC, CARB, HCO3, totals, Ks, full_output=False, **solver_kwargs
+):
+    """Solve the core marine carbonate system from TA and CARB."""
+    PH = get.pHfromTACarb(
+        TA - totals["PengCorrection"],
+        CARB,
+        totals,
+        Ks,
+        full_output=full_output,
+        **solver_kwargs,
+    )
+    if full_output:
+        PH, solver_info = PH
+    TC = get.TCfromTApH(TA - totals["PengCorrection"], PH, totals, Ks)
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    if full_output:
+        return TA, TC, PH, FC, CARB, HCO3, solver_info
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TA_HCO3(
+    TA, TC, PH, FC, CARB, HCO3, totals, Ks, full_output=False, **solver_kwargs
+):
+    """Solve the core marine carbonate system from TA and HCO3."""
+    PH = get.pHfromTAHCO3(
+        TA - totals["PengCorrection"],
+        HCO3,
+        totals,
+        Ks,
+        full_output=full_output,
+        **solver_kwargs,
+    )
+    if full_output:
+        PH, solver_info = PH
+    TC = get.TCfromTApH(TA - totals["PengCorrection"], PH, totals, Ks)
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    if full_output:
+        return TA, TC, PH, FC, CARB, HCO3, solver_info
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TC_pH(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from TC and pH."""
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TC_fCO2(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from TC and [pCO2|fCO2|CO2aq]."""
+    PH = get.pHfromTCfCO2(TC, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TC_CARB(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from TC and CARB."""
+    PH = get.pHfromTCCarb(TC, CARB, totals, Ks)
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_TC_HCO3(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from TC and HCO3."""
+    PH = get.pHfromTCHCO3(TC, HCO3, totals, Ks)
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_pH_fCO2(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from pH and [pCO2|fCO2|CO2aq]."""
+    TC = get.TCfrompHfCO2(PH, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_pH_CARB(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from pH and CARB."""
+    FC = get.fCO2frompHCarb(PH, CARB, totals, Ks)
+    TC = get.TCfrompHfCO2(PH, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_pH_HCO3(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from pH and HCO3."""
+    TC = get.TCfrompHHCO3(PH, HCO3, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    FC = get.fCO2fromTCpH(TC, PH, totals, Ks)
+    CARB = get.CarbfromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_fCO2_CARB(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from [pCO2|fCO2|CO2aq] and CARB."""
+    PH = get.pHfromfCO2Carb(FC, CARB, totals, Ks)
+    TC = get.TCfrompHfCO2(PH, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    HCO3 = get.HCO3fromTCpH(TC, PH, totals, Ks)
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_CARB_HCO3(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from CARB and HCO3."""
+    FC = get.fCO2fromCarbHCO3(CARB, HCO3, totals, Ks)
+    PH = get.pHfromfCO2Carb(FC, CARB, totals, Ks)
+    TC = get.TCfrompHfCO2(PH, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+def _fill_fCO2_HCO3(TA, TC, PH, FC, CARB, HCO3, totals, Ks):
+    """Solve the core marine carbonate system from [pCO2|fCO2|CO2aq] and HCO3."""
+    CARB = get.CarbfromfCO2HCO3(FC, HCO3, totals, Ks)
+    PH = get.pHfromfCO2Carb(FC, CARB, totals, Ks)
+    TC = get.TCfrompHfCO2(PH, FC, totals, Ks)
+    TA = get.TAfromTCpH(TC, PH, totals, Ks) + totals["PengCorrection"]
+    return TA, TC, PH, FC, CARB, HCO3
+
+
+# Which `fill` subfunction solves each group of Icases, and whether it uses one of the
+# iterative TA-pH solvers (and so takes `solver_kwargs` and also returns a dict of
+# per-row solver diagnostics)
+fill_cases = (
+    ([12], _fill_TA_TC, True),  # input TA, TC
+    ([13], _fill_TA_pH, False),  # input TA, pH
+    ([14, 15, 18], _fill_TA_fCO2, True),  # input TA, [pCO2|fCO2|CO2aq]
+    ([16], _fill_TA_CARB, True),  # input TA, CARB
+    ([17], _fill_TA_HCO3, True),  # input TA, HCO3
+    ([23], _fill_TC_pH, False),  # input TC, pH
+    ([24, 25, 28], _fill_TC_fCO2, False),  # input TC, [pCO2|fCO2|CO2aq]
+    ([26], _fill_TC_CARB, False),  # input TC, CARB
+    ([27], _fill_TC_HCO3, False),  # input TC, HCO3
+    ([34, 35, 38], _fill_pH_fCO2, False),  # input pH, [pCO2|fCO2|CO2aq]
+    ([36], _fill_pH_CARB, False),  # input pH, CARB
+    ([37], _fill_pH_HCO3, False),  # input pH, HCO3
+    ([46, 56, 68], _fill_fCO2_CARB, False),  # input [pCO2|fCO2|CO2aq], CARB
+    ([67], _fill_CARB_HCO3, False),  # input CO3, HCO3
+    ([47, 57, 78], _fill_fCO2_HCO3, False),  # input [pCO2|fCO2|CO2aq], HCO3
+)
+
+
+def _fill_info(shape):
+    """Generate the solver diagnostics for rows that were not solved iteratively."""
+    return {
+        "converged": np.full(shape, True),
+        "iterations": np.zeros(shape, dtype=int),
+        "deltapH": np.full(shape, np.nan),
+        "residual": np.full(shape, np.nan),
+    }
+
+
+def fill(
+    Icase,
+    TA,
+    TC,
+    PH,
+    PC,
+    FC,
+    CARB,
+    HCO3,
+    CO2,
+    totals,
+    Ks,
+    full_output=False,
+    **solver_kwargs
+):
+    """Fill part-empty core marine carbonate system variable columns with solutions.
+
+    Rows are grouped by `Icase` following `fill_cases`.  Each group is gathered (along
+    with its `totals` and `Ks`), solved only with the functions that it needs, and then
+    scattered back into place.  The gather and scatter steps are done with indexing and
+    concatenation rather than in-place assignment, so Autograd can still differentiate
+    through this function.
+
+    Any `solver_kwargs` are passed on to the iterative TA-pH solvers (see
+    `get._pHfromTAVX`), with any array-like values (e.g. `pH_guess`) gathered row by
+    row along with everything else.
+
+    If `full_output` is `True`, the solvers' per-row diagnostics are also returned, as
+    a dict following `get._pHfromTAVX`.  Rows that were not solved iteratively have
+    zero iterations and NaN final pH step and residual.
+    """
     # For convenience
     K0 = Ks["K0"]
-    PengCx = totals["PengCorrection"]
     # Convert any pCO2 and CO2(aq) values into fCO2
     PCgiven = np.isin(Icase, [14, 24, 34, 46, 47])
     FC = np.where(PCgiven, PC * Ks["FugFac"], FC)
     CO2given = np.isin(Icase, [18, 28, 38, 68, 78])
     FC = np.where(CO2given, CO2 / K0, FC)
-    # Solve the marine carbonate system
-    F = Icase == 12  # input TA, TC
-    if np.any(F):
-        PH = np.where(F, get.pHfromTATC(TA - PengCx, TC, totals, Ks), PH)
-        # ^pH is returned on the same scale as `Ks`
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 13  # input TA, pH
-    if np.any(F):
-        TC = np.where(F, get.TCfromTApH(TA - PengCx, PH, totals, Ks), TC)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = (Icase == 14) | (Icase == 15) | (Icase == 18)  # input TA, [pCO2|fCO2|CO2aq]
-    if np.any(F):
-        PH = np.where(F, get.pHfromTAfCO2(TA - PengCx, FC, totals, Ks), PH)
-        TC = np.where(F, get.TCfromTApH(TA - PengCx, PH, totals, Ks), TC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 16  # input TA, CARB
-    if np.any(F):
-        PH = np.where(F, get.pHfromTACarb(TA - PengCx, CARB, totals, Ks), PH)
-        TC = np.where(F, get.TCfromTApH(TA - PengCx, PH, totals, Ks), TC)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 17  # input TA, HCO3
-    if np.any(F):
-        PH = np.where(F, get.pHfromTAHCO3(TA - PengCx, HCO3, totals, Ks), PH)
-        TC = np.where(F, get.TCfromTApH(TA - PengCx, PH, totals, Ks), TC)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-    F = Icase == 23  # input TC, pH
-    if np.any(F):
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = (Icase == 24) | (Icase == 25) | (Icase == 28)  # input TC, [pCO2|fCO2|CO2aq]
-    if np.any(F):
-        PH = np.where(F, get.pHfromTCfCO2(TC, FC, totals, Ks), PH)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 26  # input TC, CARB
-    if np.any(F):
-        PH = np.where(F, get.pHfromTCCarb(TC, CARB, totals, Ks), PH)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 27  # input TC, HCO3
-    if np.any(F):
-        PH = np.where(F, get.pHfromTCHCO3(TC, HCO3, totals, Ks), PH)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-    F = (Icase == 34) | (Icase == 35) | (Icase == 38)  # input pH, [pCO2|fCO2|CO2aq]
-    if np.any(F):
-        TC = np.where(F, get.TCfrompHfCO2(PH, FC, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 36  # input pH, CARB
-    if np.any(F):
-        FC = np.where(F, get.fCO2frompHCarb(PH, CARB, totals, Ks), FC)
-        TC = np.where(F, get.TCfrompHfCO2(PH, FC, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 37  # input pH, HCO3
-    if np.any(F):
-        TC = np.where(F, get.TCfrompHHCO3(PH, HCO3, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        FC = np.where(F, get.fCO2fromTCpH(TC, PH, totals, Ks), FC)
-        CARB = np.where(F, get.CarbfromTCpH(TC, PH, totals, Ks), CARB)
-    F = (Icase == 46) | (Icase == 56) | (Icase == 68)  # input [pCO2|fCO2|CO2aq], CARB
-    if np.any(F):
-        PH = np.where(F, get.pHfromfCO2Carb(FC, CARB, totals, Ks), PH)
-        TC = np.where(F, get.TCfrompHfCO2(PH, FC, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-        HCO3 = np.where(F, get.HCO3fromTCpH(TC, PH, totals, Ks), HCO3)
-    F = Icase == 67  # input CO3, HCO3
-    if np.any(F):
-        FC = np.where(F, get.fCO2fromCarbHCO3(CARB, HCO3, totals, Ks), FC)
-        PH = np.where(F, get.pHfromfCO2Carb(FC, CARB, totals, Ks), PH)
-        TC = np.where(F, get.TCfrompHfCO2(PH, FC, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
-    F = (Icase == 47) | (Icase == 57) | (Icase == 78)  # input [pCO2|fCO2|CO2aq], HCO3
-    if np.any(F):
-        CARB = np.where(F, get.CarbfromfCO2HCO3(FC, HCO3, totals, Ks), CARB)
-        PH = np.where(F, get.pHfromfCO2Carb(FC, CARB, totals, Ks), PH)
-        TC = np.where(F, get.TCfrompHfCO2(PH, FC, totals, Ks), TC)
-        TA = np.where(F, get.TAfromTCpH(TC, PH, totals, Ks) + PengCx, TA)
+    # Flatten everything to a common shape
+    shape = get._broadcast_shape(
+        Icase, TA, TC, PH, FC, CARB, HCO3, totals, Ks, solver_kwargs
+    )
+    Icase_flat = np.ravel(np.broadcast_to(Icase, shape))
+    core_flat = [
+        np.ravel(np.broadcast_to(v, shape)) for v in (TA, TC, PH, FC, CARB, HCO3)
+    ]
+    # Solve the marine carbonate system separately for each group of Icases
+    unsolved = np.full(np.shape(Icase_flat), True)
+    rows_groups = []
+    core_groups = []
+    info_groups = []
+    for cases, fill_case, iterative in fill_cases:
+        F = np.isin(Icase_flat, cases)
+        if np.any(F):
+            rows = np.flatnonzero(F)
+            unsolved = unsolved & ~F
+            rows_groups.append(rows)
+            core_group = fill_case(
+                *[v[rows] for v in core_flat],
+                get._take(totals, rows, shape),
+                get._take(Ks, rows, shape),
+                **(
+                    {
+                        "full_output": full_output,
+                        **get._take(solver_kwargs, rows, shape),
+                    }
+                    if iterative
+                    else {}
+                ),
+            )
+            if iterative and full_output:
+                core_group, solver_info = core_group[:6], core_group[6]
+                info_groups.append(
+                    {k: np.broadcast_to(v, rows.shape) for k, v in solver_info.items()}
+                )
+            elif full_output:
+                info_groups.append(_fill_info(rows.shape))
+            core_groups.append(core_group)
+    # Rows not in any valid Icase are passed through unchanged
+    rows = np.flatnonzero(unsolved)
+    rows_groups.append(rows)
+    core_groups.append([v[rows] for v in core_flat])
+    if full_output:
+        info_groups.append(_fill_info(rows.shape))
+    # Scatter the solutions back into the original row order and shape
+    order = np.argsort(np.concatenate(rows_groups))
+    TA, TC, PH, FC, CARB, HCO3 = [
+        np.reshape(np.concatenate([group[i] for group in core_groups])[order], shape)
+        for i in range(6)
+    ]
     # By now, an fCO2 value is available for each sample.
     # Generate the associated pCO2 and CO2(aq) values:
     PC = np.where(~PCgiven, FC / Ks["FugFac"], PC)
     CO2 = np.where(~CO2given, FC * K0, CO2)
+    if full_output:
+        solver_info = {
+            k: np.reshape(
+                np.concatenate([group[k] for group in info_groups])[order], shape
+            )
+            for k in info_groups[0]
+        }
+        return TA, TC, PH, PC, FC, CARB, HCO3, CO2, solver_info
     return TA, TC, PH, PC, FC, CARB, HCO3, CO2
 
 
-def core(par1, par2, par1type, par2type, totals, Ks, convert_units=True):
+def core(
+    par1,
+    par2,
+    par1type,
+    par2type,
+    totals,
+    Ks,
+    convert_units=True,
+    full_output=False,
+    **solver_kwargs
+):
     """Solve the core marine carbonate system (MCS) from any 2 of its variables.
 
     The core MCS outputs (in a dict) and associated `par1type`/`par2type` inputs are:
@@ -258,6 +484,14 @@ def core(par1, par2, par1type, par2type, totals, Ks, convert_units=True):
 
     The input `convert_units` specifies whether the inputs `par1` and `par2` are in
     μmol/kg and μatm units (`True`) or mol/kg and atm units (`False`).
+
+    Any `solver_kwargs` are passed on to the iterative TA-pH solvers via `fill`.  These
+    can include a `pH_guess` for each row, on the same pH scale as `Ks`, which is used
+    as the starting point for the iterations wherever it is finite.
+
+    If `full_output` is `True`, the solvers' per-row diagnostics are also included in
+    the output dict, with the keys `solver_converged`, `solver_iterations`,
+    `solver_deltapH` and `solver_residual`.
     """
     # Expand inputs `par1` and `par2` into one array per core MCS variable
     TA, TC, PH, PC, FC, CARB, HCO3, CO2 = pair2core(
@@ -266,25 +500,126 @@ def core(par1, par2, par1type, par2type, totals, Ks, convert_units=True):
     # Generate vector describing the combination(s) of input parameters
     Icase = getIcase(par1type, par2type)
     # Solve the core marine carbonate system
-    TA, TC, PH, PC, FC, CARB, HCO3, CO2 = fill(
-        Icase, TA, TC, PH, PC, FC, CARB, HCO3, CO2, totals, Ks
+    filled = fill(
+        Icase,
+        TA,
+        TC,
+        PH,
+        PC,
+        FC,
+        CARB,
+        HCO3,
+        CO2,
+        totals,
+        Ks,
+        full_output=full_output,
+        **solver_kwargs,
     )
-    return {
-        "TA": TA,
-        "TC": TC,
-        "PH": PH,
-        "PC": PC,
-        "FC": FC,
-        "CARB": CARB,
-        "HCO3": HCO3,
-        "CO2": CO2,
+    core_solved = {
+        "TA": filled[0],
+        "TC": filled[1],
+        "PH": filled[2],
+        "PC": filled[3],
+        "FC": filled[4],
+        "CARB": filled[5],
+        "HCO3": filled[6],
+        "CO2": filled[7],
     }
+    if full_output:
+        core_solved.update({"solver_{}".format(k): v for k, v in filled[8].items()})
+    return core_solved
+
+
+def _check_buffers_mode(buffers_mode):
+    """Make sure that all `buffers_mode` values are valid."""
+    assert np.all(
+        np.isin(buffers_mode, ["auto", "closed_form", "explicit", "none"])
+    ), (
+        "Valid options for buffers_mode are 'auto', 'closed_form', 'explicit' or "
+        + "'none'."
+    )
+
+
+# Keys of the `others` dict that are not part of the chemical speciation
+others_keys = {
+    "pK1",
+    "pK2",
+    "OmegaCa",
+    "OmegaAr",
+    "VPFac",
+    "xCO2dry",
+    "pHT",
+    "pHS",
+    "pHF",
+    "pHN",
+    "Revelle",
+    "gammaTC",
+    "betaTC",
+    "omegaTC",
+    "gammaTA",
+    "betaTA",
+    "omegaTA",
+    "isoQ",
+    "isoQx",
+    "psi",
+    "SIR",
+}
+# Keys of the `others` dict that need other keys to be calculated first
+others_dependencies = {
+    "xCO2dry": {"VPFac"},
+    "Revelle": {"gammaTC"},
+    "psi": {"isoQ"},
+    "SIR": {"pHF"},
+}
+esm10buffers = ["gammaTC", "betaTC", "omegaTC", "gammaTA", "betaTA", "omegaTA"]
+
+
+def others_needed(outputs):
+    """Find all the `others` keys that must be calculated to get those in `outputs`,
+    or return `None` if everything is needed.
+    """
+    if outputs is None:
+        return None
+    needed = set()
+    to_check = set(outputs)
+    while to_check:
+        key = to_check.pop()
+        if key not in needed:
+            needed.add(key)
+            to_check.update(others_dependencies.get(key, set()))
+    return needed
 
 
 def others(
-    core_solved, TempC, Pdbar, totals, Ks, pHScale, WhichKs, buffers_mode,
+    core_solved,
+    TempC,
+    Pdbar,
+    totals,
+    Ks,
+    pHScale,
+    WhichKs,
+    buffers_mode,
+    check_buffers_mode=True,
+    outputs=None,
 ):
-    """Calculate all peripheral marine carbonate system variables returned by CO2SYS."""
+    """Calculate all peripheral marine carbonate system variables returned by CO2SYS.
+
+    Set `check_buffers_mode=False` to skip validating `buffers_mode` if that has
+    already been done by the caller.
+
+    If `outputs` is provided, only those keys (and whatever they depend upon) are
+    calculated and returned.  The chemical speciation is calculated if any of the
+    `outputs` are not in `others_keys`.
+    """
+    needed = others_needed(outputs)
+    if needed is None:
+        needed = others_keys
+        get_speciation = True
+    else:
+        get_speciation = not needed.issubset(others_keys)
+    get_buffers = not needed.isdisjoint(esm10buffers)
+    get_isoQ = "isoQ" in needed
+    get_Revelle = "Revelle" in needed
     # Unpack for convenience
     Sal = totals["Sal"]
     TA = core_solved["TA"]
@@ -297,119 +632,151 @@ def others(
     CO2 = core_solved["CO2"]
     # Apply Peng correction
     TAPeng = TA - totals["PengCorrection"]
+    others_out = {}
     # Calculate pKs
-    pK1 = -np.log10(Ks["K1"])
-    pK2 = -np.log10(Ks["K2"])
+    if "pK1" in needed:
+        others_out["pK1"] = -np.log10(Ks["K1"])
+    if "pK2" in needed:
+        others_out["pK2"] = -np.log10(Ks["K2"])
     # Components of alkalinity and DIC
     # alks = get.AlkParts(TC, PH, totals, Ks)  # <=1.5.1
-    sw = get.speciation_func(TC, PH, totals, Ks)  # >=1.6.0
-    sw["PAlk"] = sw["PAlk"] + totals["PengCorrection"]
+    if get_speciation or (
+        np.any(buffers_mode == "explicit") and (get_buffers or get_isoQ)
+    ):
+        sw = get.speciation_func(TC, PH, totals, Ks)  # >=1.6.0
+        sw["PAlk"] = sw["PAlk"] + totals["PengCorrection"]
+    else:
+        sw = {}
     # CaCO3 solubility
-    OmegaCa, OmegaAr = solubility.CaCO3(CARB, totals, Ks)
+    if not needed.isdisjoint(["OmegaCa", "OmegaAr"]):
+        others_out["OmegaCa"], others_out["OmegaAr"] = solubility.CaCO3(
+            CARB, totals, Ks
+        )
     # Dry mole fraction of CO2
-    VPFac = gas.vpfactor(TempC, Sal)
-    xCO2dry = PC / VPFac  # this assumes pTot = 1 atm
+    if "VPFac" in needed:
+        others_out["VPFac"] = gas.vpfactor(TempC, Sal)
+    if "xCO2dry" in needed:
+        others_out["xCO2dry"] = PC / others_out["VPFac"]  # this assumes pTot = 1 atm
     # Just for reference, convert pH at input conditions to the other scales
-    pHT, pHS, pHF, pHN = convert.pH2allscales(PH, pHScale, totals, Ks)
+    if not needed.isdisjoint(["pHT", "pHS", "pHF", "pHN"]):
+        pHT, pHS, pHF, pHN = convert.pH2allscales(PH, pHScale, totals, Ks)
+        others_out.update({"pHT": pHT, "pHS": pHS, "pHF": pHF, "pHN": pHN})
     # Get buffers as and if requested
-    assert np.all(
-        np.isin(buffers_mode, ["auto", "explicit", "none"])
-    ), "Valid options for buffers_mode are 'auto', 'explicit' or 'none'."
+    if check_buffers_mode:
+        _check_buffers_mode(buffers_mode)
     isoQx = np.full(np.shape(Sal), np.nan)
     isoQ = np.full(np.shape(Sal), np.nan)
     Revelle = np.full(np.shape(Sal), np.nan)
     psi = np.full(np.shape(Sal), np.nan)
-    esm10buffers = [
-        "gammaTC",
-        "betaTC",
-        "omegaTC",
-        "gammaTA",
-        "betaTA",
-        "omegaTA",
-    ]
     allbuffers_ESM10 = {
         buffer: np.full(np.shape(Sal), np.nan) for buffer in esm10buffers
     }
-    F = buffers_mode == "auto"
+    if delta._use_closed_form():
+        F = buffers_mode == "auto"
+    else:
+        # The closed-form buffers rely on the default speciation, so fall back to
+        # automatic differentiation if the end user has swapped in their own
+        F = (buffers_mode == "auto") | (buffers_mode == "closed_form")
     if np.any(F):
-        # Evaluate buffers with automatic differentiation [added v1.3.0]
-        auto_ESM10 = buffers.all_ESM10(
-            TAPeng,
-            TC,
-            PH,
-            CARB,
-            Sal,
-            convert.TempC2K(TempC),
-            convert.Pdbar2bar(Pdbar),
-            totals,
-            Ks,
-            WhichKs,
-        )
-        for buffer in esm10buffers:
-            allbuffers_ESM10[buffer] = np.where(
-                F, auto_ESM10[buffer], allbuffers_ESM10[buffer]
+        if get_buffers:
+            # Evaluate buffers with automatic differentiation [added v1.3.0]
+            auto_ESM10 = buffers.all_ESM10(
+                TAPeng,
+                TC,
+                PH,
+                CARB,
+                Sal,
+                convert.TempC2K(TempC),
+                convert.Pdbar2bar(Pdbar),
+                totals,
+                Ks,
+                WhichKs,
+                FC=FC if get_isoQ else None,
+            )
+            for buffer in esm10buffers:
+                allbuffers_ESM10[buffer] = np.where(
+                    F, auto_ESM10[buffer], allbuffers_ESM10[buffer]
+                )
+            if get_isoQ:
+                isoQ = np.where(F, auto_ESM10["isoQ"], isoQ)
+        elif get_isoQ:
+            isoQ = np.where(F, buffers.isocap(TAPeng, TC, PH, FC, totals, Ks), isoQ)
+        if get_Revelle:
+            Revelle = np.where(
+                F,
+                buffers.RevelleFactor_ESM10(TC, allbuffers_ESM10["gammaTC"]),
+                Revelle,
+            )
+    F = buffers_mode == "closed_form"
+    if delta._use_closed_form() and np.any(F):
+        # Evaluate buffers in closed form from the solved system, including every
+        # component of total alkalinity
+        if get_buffers:
+            closed_ESM10 = buffers.closed_form.all_ESM10(
+                TAPeng, TC, PH, CARB, totals, Ks
+            )
+            for buffer in esm10buffers:
+                allbuffers_ESM10[buffer] = np.where(
+                    F, closed_ESM10[buffer], allbuffers_ESM10[buffer]
+                )
+        if get_isoQ:
+            isoQ = np.where(F, buffers.closed_form.isocap(TC, PH, FC, totals, Ks), isoQ)
+        if get_Revelle:
+            Revelle = np.where(
+                F,
+                buffers.RevelleFactor_ESM10(TC, allbuffers_ESM10["gammaTC"]),
+                Revelle,
             )
-        isoQ = np.where(F, buffers.isocap(TAPeng, TC, PH, FC, totals, Ks), isoQ)
-        Revelle = np.where(
-            F, buffers.RevelleFactor_ESM10(TC, allbuffers_ESM10["gammaTC"]), Revelle
-        )
     F = buffers_mode == "explicit"
     if np.any(F):
         # Evaluate buffers with explicit equations, but these don't include nutrients
         # (i.e. only carbonate, borate and water alkalinities are accounted for)
-        expl_ESM10 = buffers.explicit.all_ESM10(
-            TC, TAPeng, CO2, HCO3, CARB, PH, sw["OH"], sw["BAlk"], Ks["KB"],
-        )
-        for buffer in esm10buffers:
-            allbuffers_ESM10[buffer] = np.where(
-                F, expl_ESM10[buffer], allbuffers_ESM10[buffer]
+        if get_buffers:
+            expl_ESM10 = buffers.explicit.all_ESM10(
+                TC, TAPeng, CO2, HCO3, CARB, PH, sw["OH"], sw["BAlk"], Ks["KB"],
+            )
+            for buffer in esm10buffers:
+                allbuffers_ESM10[buffer] = np.where(
+                    F, expl_ESM10[buffer], allbuffers_ESM10[buffer]
+                )
+        if get_isoQ:
+            isoQ = np.where(
+                F,
+                buffers.explicit.isocap(
+                    CO2, PH, Ks["K1"], Ks["K2"], Ks["KB"], Ks["KW"], totals["TB"]
+                ),
+                isoQ,
+            )
+        if get_Revelle:
+            Revelle = np.where(
+                F, buffers.explicit.RevelleFactor(TAPeng, TC, totals, Ks), Revelle
             )
-        isoQ = np.where(
-            F,
-            buffers.explicit.isocap(
-                CO2, PH, Ks["K1"], Ks["K2"], Ks["KB"], Ks["KW"], totals["TB"]
-            ),
-            isoQ,
-        )
-        Revelle = np.where(
-            F, buffers.explicit.RevelleFactor(TAPeng, TC, totals, Ks), Revelle
-        )
     F = buffers_mode != "none"
     if np.any(F):
         # Approximate isocapnic quotient of HDW18
-        isoQx = np.where(
-            F,
-            buffers.explicit.isocap_approx(TC, PC, Ks["K0"], Ks["K1"], Ks["K2"]),
-            isoQx,
-        )
+        if "isoQx" in needed:
+            isoQx = np.where(
+                F,
+                buffers.explicit.isocap_approx(TC, PC, Ks["K0"], Ks["K1"], Ks["K2"]),
+                isoQx,
+            )
         # psi of FCG94 following HDW18
-        psi = np.where(F, buffers.psi(isoQ), psi)
+        if "psi" in needed:
+            psi = np.where(F, buffers.psi(isoQ), psi)
+    if get_buffers:
+        others_out.update(allbuffers_ESM10)
+    if get_isoQ:
+        others_out["isoQ"] = isoQ
+    if get_Revelle:
+        others_out["Revelle"] = Revelle
+    if "isoQx" in needed:
+        others_out["isoQx"] = isoQx
+    if "psi" in needed:
+        others_out["psi"] = psi
     # Substrate:inhibitor ratio of B15
-    SIR = bio.SIratio(HCO3, pHF)
-    others_out = {
-        "pK1": pK1,
-        "pK2": pK2,
-        "OmegaCa": OmegaCa,
-        "OmegaAr": OmegaAr,
-        "VPFac": VPFac,
-        "xCO2dry": xCO2dry,
-        "pHT": pHT,
-        "pHS": pHS,
-        "pHF": pHF,
-        "pHN": pHN,
-        "Revelle": Revelle,
-        "gammaTC": allbuffers_ESM10["gammaTC"],
-        "betaTC": allbuffers_ESM10["betaTC"],
-        "omegaTC": allbuffers_ESM10["omegaTC"],
-        "gammaTA": allbuffers_ESM10["gammaTA"],
-        "betaTA": allbuffers_ESM10["betaTA"],
-        "omegaTA": allbuffers_ESM10["omegaTA"],
-        "isoQ": isoQ,
-        "isoQx": isoQx,
-        "psi": psi,
-        # Added in v1.4.0:
-        "SIR": SIR,
-    }
+    if "SIR" in needed:
+        others_out["SIR"] = bio.SIratio(HCO3, others_out["pHF"])  # added v1.4.0
     # Added in v1.6.0:
-    others_out.update(sw)
+    if get_speciation:
+        others_out.update(sw)
     return others_out
@@ -7,10 +7,26 @@ from autograd import elementwise_grad as egrad
 from . import get
 
 
-# Set whether to use the approximate slopes [True] or exact (Autograd) slopes [False]
+# Set whether to use the approximate slopes [True] or exact slopes [False]
 USE_APPROX = False
 
 
+def _use_closed_form():
+    """Check whether the closed-form slopes can be used, which is only the case if the
+    end user has not swapped in their own speciation function.
+    """
+    return get.speciation_func is get.speciation
+
+
+def _residual_slope(h, TA, alk_carbonate, dalk_carbonate, totals, Ks):
+    """Combine the carbonate alkalinity and its derivative with respect to [H+] with
+    the non-carbonate components to get the residual alkalinity and its slope with
+    respect to pH.
+    """
+    alk, dalk = get.alkalinity_noncarbonate(h, totals, Ks)
+    return alk + alk_carbonate - TA, -np.log(10) * h * (dalk + dalk_carbonate)
+
+
 def _pHfromTATC_r(pH, TA, TC, totals, Ks):
     """Calculate residual alkalinity from pH and TC for solver `pHfromTATC`."""
     return get.TAfromTCpH(TC, pH, totals, Ks) - TA
@@ -43,6 +59,27 @@ def _pHfromTATC_s_approx(pH, TA, TC, totals, Ks):
     )
 
 
+def _pHfromTATC_rs(pH, TA, TC, totals, Ks):
+    """Calculate residual alkalinity and its exact slope from pH and TC together for
+    solver `pHfromTATC`, using the fused kernel instead of the full speciation.
+    """
+    alk, slope = get.TAfromTCpH_fused(TC, pH, totals, Ks)
+    return alk - TA, slope
+
+
+def pHfromTATC_residual(pH, TA, TC, totals, Ks):
+    """Calculate residual alkalinity and its slope from pH and TC for solver
+    `pHfromTATC`.
+    """
+    if _use_closed_form():
+        return _pHfromTATC_rs(pH, TA, TC, totals, Ks)
+    # Fall back to Autograd if the end user has swapped the speciation function
+    return (
+        _pHfromTATC_r(pH, TA, TC, totals, Ks),
+        _pHfromTATC_s(pH, TA, TC, totals, Ks),
+    )
+
+
 if USE_APPROX:
 
     def pHfromTATC(pH, TA, TC, totals, Ks):
@@ -57,10 +94,8 @@ else:
 
     def pHfromTATC(pH, TA, TC, totals, Ks):
         """Calculate delta-pH from pH and TC for solver `pHfromTATC`."""
-        return -(
-            _pHfromTATC_r(pH, TA, TC, totals, Ks)
-            / _pHfromTATC_s(pH, TA, TC, totals, Ks)
-        )
+        residual, slope = pHfromTATC_residual(pH, TA, TC, totals, Ks)
+        return -residual / slope
 
 
 def _pHfromTAfCO2_r(pH, TA, fCO2, totals, Ks):
@@ -92,6 +127,29 @@ def _pHfromTAfCO2_s_approx(pH, TA, fCO2, totals, Ks):
     return np.log(10) * (HCO3 + 4 * CO3 + BAlk * H / (KB + H) + OH + H)
 
 
+def _pHfromTAfCO2_rs(pH, TA, fCO2, totals, Ks):
+    """Calculate residual alkalinity and its exact slope from pH and fCO2 together for
+    solver `pHfromTAfCO2`, in closed form.
+    """
+    H = 10.0 ** -pH
+    HCO3 = Ks["K0"] * Ks["K1"] * fCO2 / H
+    CO3 = HCO3 * Ks["K2"] / H
+    return _residual_slope(H, TA, HCO3 + 2 * CO3, -(HCO3 + 4 * CO3) / H, totals, Ks)
+
+
+def pHfromTAfCO2_residual(pH, TA, fCO2, totals, Ks):
+    """Calculate residual alkalinity and its slope from pH and fCO2 for solver
+    `pHfromTAfCO2`.
+    """
+    if _use_closed_form():
+        return _pHfromTAfCO2_rs(pH, TA, fCO2, totals, Ks)
+    # Fall back to Autograd if the end user has swapped the speciation function
+    return (
+        _pHfromTAfCO2_r(pH, TA, fCO2, totals, Ks),
+        _pHfromTAfCO2_s(pH, TA, fCO2, totals, Ks),
+    )
+
+
 if USE_APPROX:
 
     def pHfromTAfCO2(pH, TA, fCO2, totals, Ks):
@@ -106,10 +164,8 @@ else:
 
     def pHfromTAfCO2(pH, TA, fCO2, totals, Ks):
         """Calculate delta-pH from pH and fCO2 for solver `pHfromTAfCO2`."""
-        return -(
-            _pHfromTAfCO2_r(pH, TA, fCO2, totals, Ks)
-            / _pHfromTAfCO2_s(pH, TA, fCO2, totals, Ks)
-        )
+        residual, slope = pHfromTAfCO2_residual(pH, TA, fCO2, totals, Ks)
+        return -residual / slope
 
 
 def _pHfromTACarb_r(pH, TA, CARB, totals, Ks):
@@ -137,6 +193,28 @@ def _pHfromTACarb_s_approx(pH, TA, CARB, totals, Ks):
     return np.log(10) * (-CARB * H / K2 + BAlk * H / (KB + H) + OH + H)
 
 
+def _pHfromTACarb_rs(pH, TA, CARB, totals, Ks):
+    """Calculate residual alkalinity and its exact slope from pH and CARB together for
+    solver `pHfromTACarb`, in closed form.
+    """
+    H = 10.0 ** -pH
+    HCO3 = CARB * H / Ks["K2"]
+    return _residual_slope(H, TA, HCO3 + 2 * CARB, CARB / Ks["K2"], totals, Ks)
+
+
+def pHfromTACarb_residual(pH, TA, CARB, totals, Ks):
+    """Calculate residual alkalinity and its slope from pH and CARB for solver
+    `pHfromTACarb`.
+    """
+    if _use_closed_form():
+        return _pHfromTACarb_rs(pH, TA, CARB, totals, Ks)
+    # Fall back to Autograd if the end user has swapped the speciation function
+    return (
+        _pHfromTACarb_r(pH, TA, CARB, totals, Ks),
+        _pHfromTACarb_s(pH, TA, CARB, totals, Ks),
+    )
+
+
 if USE_APPROX:
 
     def pHfromTACarb(pH, TA, CARB, totals, Ks):
@@ -151,10 +229,8 @@ else:
 
     def pHfromTACarb(pH, TA, CARB, totals, Ks):
         """Calculate delta-pH from pH and CARB for solver `pHfromTACarb`."""
-        return -(
-            _pHfromTACarb_r(pH, TA, CARB, totals, Ks)
-            / _pHfromTACarb_s(pH, TA, CARB, totals, Ks)
-        )
+        residual, slope = pHfromTACarb_residual(pH, TA, CARB, totals, Ks)
+        return -residual / slope
 
 
 def _pHfromTAHCO3_r(pH, TA, HCO3, totals, Ks):
@@ -181,6 +257,28 @@ def _pHfromTAHCO3_s_approx(pH, TA, HCO3, totals, Ks):
     return np.log(10) * (2 * HCO3 * K2 / H + BAlk * H / (KB + H) + OH + H)
 
 
+def _pHfromTAHCO3_rs(pH, TA, HCO3, totals, Ks):
+    """Calculate residual alkalinity and its exact slope from pH and HCO3 together for
+    solver `pHfromTAHCO3`, in closed form.
+    """
+    H = 10.0 ** -pH
+    CO3 = HCO3 * Ks["K2"] / H
+    return _residual_slope(H, TA, HCO3 + 2 * CO3, -2 * CO3 / H, totals, Ks)
+
+
+def pHfromTAHCO3_residual(pH, TA, HCO3, totals, Ks):
+    """Calculate residual alkalinity and its slope from pH and HCO3 for solver
+    `pHfromTAHCO3`.
+    """
+    if _use_closed_form():
+        return _pHfromTAHCO3_rs(pH, TA, HCO3, totals, Ks)
+    # Fall back to Autograd if the end user has swapped the speciation function
+    return (
+        _pHfromTAHCO3_r(pH, TA, HCO3, totals, Ks),
+        _pHfromTAHCO3_s(pH, TA, HCO3, totals, Ks),
+    )
+
+
 if USE_APPROX:
 
     def pHfromTAHCO3(pH, TA, HCO3, totals, Ks):
@@ -195,7 +293,5 @@ else:
 
     def pHfromTAHCO3(pH, TA, HCO3, totals, Ks):
         """Calculate delta-pH from pH and HCO3 for solver `pHfromTAHCO3`."""
-        return -(
-            _pHfromTAHCO3_r(pH, TA, HCO3, totals, Ks)
-            / _pHfromTAHCO3_s(pH, TA, HCO3, totals, Ks)
-        )
+        residual, slope = pHfromTAHCO3_residual(pH, TA, HCO3, totals, Ks)
+        return -residual / slope
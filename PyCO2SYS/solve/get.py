@@ -3,10 +3,13 @@
 """Calculate one new carbonate system variable from various input pairs."""
 
 from autograd import numpy as np
+from autograd.tracer import isbox
 from .. import convert
 from . import delta, initialise
 
 pHTol = 1e-8  # tolerance for ending iterations in all pH solvers
+pHMaxIter = 100  # default iteration cap for the bracketed pH solver
+pHBracketMax = 8.0  # widest half-width of the bracketed pH solver's initial bracket
 
 
 def CarbfromTCH(TC, H, totals, k_constants):
@@ -207,6 +210,77 @@ def speciation(dic, pH, totals, k_constants):
 speciation_func = speciation
 
 
+def _single_proton(total, k, h_scale):
+    """Calculate the deprotonated form of a monoprotic acid and its derivative with
+    respect to `h_scale`.
+    """
+    k_h = k + h_scale
+    return total * k / k_h, -total * k / k_h ** 2
+
+
+@np.errstate(invalid="ignore")
+def alkalinity_noncarbonate(h_scale, totals, k_constants):
+    """Calculate the non-carbonate components of total alkalinity together with their
+    derivative with respect to `h_scale`, without building the full speciation.
+
+    Includes every component of `speciation`: borate, water, phosphate, silicate,
+    ammonia, sulfide, bisulfate, HF and the extra alpha and beta components.
+    """
+    # Borate, silicate, ammonia and sulfide
+    alk, dalk = _single_proton(totals["TB"], k_constants["KB"], h_scale)
+    for t, k in (("TSi", "KSi"), ("TNH3", "KNH3"), ("TH2S", "KH2S")):
+        a, da = _single_proton(totals[t], k_constants[k], h_scale)
+        alk = alk + a
+        dalk = dalk + da
+    # Water
+    OH = k_constants["KW"] / h_scale
+    fH = k_constants["pHfactor_to_Free"]
+    alk = alk + OH - h_scale * fH
+    dalk = dalk - OH / h_scale - fH
+    # Phosphate
+    KP1 = k_constants["KP1"]
+    KP2 = k_constants["KP2"]
+    KP3 = k_constants["KP3"]
+    P_numer = KP1 * KP2 * h_scale + 2 * KP1 * KP2 * KP3 - h_scale ** 3
+    P_denom = h_scale ** 3 + KP1 * h_scale ** 2 + KP1 * KP2 * h_scale + KP1 * KP2 * KP3
+    alk = alk + totals["TPO4"] * P_numer / P_denom
+    dalk = dalk + totals["TPO4"] * (
+        (KP1 * KP2 - 3 * h_scale ** 2) * P_denom
+        - P_numer * (3 * h_scale ** 2 + 2 * KP1 * h_scale + KP1 * KP2)
+    ) / P_denom ** 2
+    # Bisulfate and HF (KSO4 and KF are always on the Free scale)
+    Hfree = h_scale * fH
+    for t, k in (("TSO4", "KSO4"), ("TF", "KF")):
+        k_Hfree = k_constants[k] + Hfree
+        alk = alk - totals[t] * Hfree / k_Hfree
+        dalk = dalk - totals[t] * fH * k_constants[k] / k_Hfree ** 2
+    # Extra alkalinity components: a component whose pK is at or below the 'zero
+    # level of protons' contributes -[XH], i.e. its deprotonated form minus its total
+    zlp = 4.5  # pK of 'zero level of protons' [WZK07]
+    for x in ("alpha", "beta"):
+        a, da = _single_proton(totals[x], k_constants[x], h_scale)
+        alk = alk + np.where(k_constants[x] >= 10.0 ** -zlp, a - totals[x], a)
+        dalk = dalk + da
+    return alk, dalk
+
+
+def TAfromTCpH_fused(TC, pH, totals, k_constants):
+    """Calculate total alkalinity from dissolved inorganic carbon and pH along with its
+    derivative with respect to pH.
+
+    Gives the same total alkalinity as `speciation` but without building any of the
+    intermediate species, for use within the pH solvers.
+    """
+    h_scale = 10.0 ** -pH
+    K1 = k_constants["K1"]
+    K2 = k_constants["K2"]
+    denom = h_scale ** 2 + K1 * h_scale + K1 * K2
+    alk, dalk = alkalinity_noncarbonate(h_scale, totals, k_constants)
+    alk = alk + TC * K1 * (h_scale + 2 * K2) / denom
+    dalk = dalk - TC * K1 * (h_scale ** 2 + 4 * K2 * h_scale + K1 * K2) / denom ** 2
+    return alk, -np.log(10) * h_scale * dalk
+
+
 def TAfromTCpH(TC, pH, totals, k_constants):
     """Calculate total alkalinity from dissolved inorganic carbon and pH.
 
@@ -256,8 +330,219 @@ def TAfrompHHCO3(pH, HCO3, totals, k_constants):
     return TAfromTCpH(TC, pH, totals, k_constants)
 
 
+def _broadcast_shape(*args):
+    """Find the shape that all args, including the values of any dicts among them,
+    broadcast to together.
+    """
+    shape = ()
+    for arg in args:
+        for v in arg.values() if isinstance(arg, dict) else [arg]:
+            shape = np.broadcast(np.broadcast_to(0.0, shape), v).shape
+    return shape
+
+
+def _any_box(*args):
+    """Check whether any args, including the values of any dicts among them, are
+    being traced by Autograd.
+    """
+    return any(
+        isbox(v)
+        for arg in args
+        for v in (arg.values() if isinstance(arg, dict) else [arg])
+    )
+
+
+def _take(values, index, shape):
+    """Broadcast `values` to `shape`, flatten, and extract the elements at `index`.
+
+    Works through dicts (e.g. `totals` and `k_constants`) value by value.  Scalars are
+    returned unchanged, because they broadcast against anything.
+    """
+    if isinstance(values, dict):
+        return {k: _take(v, index, shape) for k, v in values.items()}
+    elif np.ndim(values) == 0:
+        return values
+    else:
+        return np.ravel(np.broadcast_to(values, shape))[index]
+
+
+def _limit_deltapH(deltapH):
+    """Restrict the size of a pH jump to avoid overshooting during the iterations."""
+    abs_deltapH = np.abs(deltapH)
+    sign_deltapH = np.sign(deltapH)
+    # Jump by 1 instead if `deltapH` > 5
+    deltapH = np.where(abs_deltapH > 5.0, sign_deltapH, deltapH)
+    # Jump by 0.5 instead if 1 < `deltapH` < 5
+    deltapH = np.where(
+        (abs_deltapH > 0.5) & (abs_deltapH <= 5.0), 0.5 * sign_deltapH, deltapH,
+    )  # assumes that once we're within 1 of the correct pH, we will converge
+    return deltapH
+
+
+@np.errstate(invalid="ignore")
+def _pHfromTAVX_active(
+    pH, TA, VX, totals, k_constants, deltafunc, tolerance, max_iter=None
+):
+    """Run the Newton-Raphson iterations of `_pHfromTAVX` on an active set of rows.
+
+    All inputs are flattened to a common shape and, after every step, the rows that
+    have converged are dropped, along with their slices of `TA`, `VX`, `totals` and
+    `k_constants`.  Each step therefore only costs as much as the number of rows that
+    still need solving.  The updates are scattered back into the full pH array.
+
+    Iterations stop once the pH step is smaller than `tolerance`.  Returns the pH and a
+    dict of per-row diagnostics: whether each row converged within `max_iter`
+    iterations (no limit if `None`), how many iterations it took and the final pH
+    step.
+    """
+    shape = _broadcast_shape(pH, TA, VX, totals, k_constants)
+    pH = np.array(np.broadcast_to(pH, shape), dtype=float).ravel()
+    converged = np.ones(pH.size, dtype=bool)
+    iterations = np.zeros(pH.size, dtype=int)
+    final_deltapH = np.full(pH.size, np.nan)
+    rows = np.arange(pH.size)
+    TA, VX, totals, k_constants = [
+        _take(v, rows, shape) for v in (TA, VX, totals, k_constants)
+    ]
+    while rows.size > 0:
+        if max_iter is not None and iterations[rows[0]] >= max_iter:
+            converged[rows] = False
+            break
+        deltapH = _limit_deltapH(deltafunc(pH[rows], TA, VX, totals, k_constants))
+        pH[rows] = pH[rows] + deltapH
+        iterations[rows] += 1
+        final_deltapH[rows] = deltapH
+        # Keep iterating only the rows that haven't converged yet
+        active = np.abs(deltapH) >= tolerance
+        rows = rows[active]
+        TA, VX, totals, k_constants = [
+            _take(v, active, np.shape(active)) for v in (TA, VX, totals, k_constants)
+        ]
+    return (
+        np.reshape(pH, shape),
+        {
+            "converged": np.reshape(converged, shape),
+            "iterations": np.reshape(iterations, shape),
+            "deltapH": np.reshape(final_deltapH, shape),
+        },
+    )
+
+
 @np.errstate(invalid="ignore")
-def _pHfromTAVX(TA, VX, totals, k_constants, initialfunc, deltafunc):
+def _pHfromTAVX_newton(
+    pH, TA, VX, totals, k_constants, deltafunc, tolerance, max_iter=None
+):
+    """Run the Newton-Raphson iterations of `_pHfromTAVX` on every row, masking the
+    update for rows that have already converged.
+
+    Returns the pH and a dict of per-row diagnostics, like `_pHfromTAVX_active`.
+    """
+    deltapH = 1.0 + tolerance
+    iterations = 0
+    final_deltapH = np.nan
+    while np.any(np.abs(deltapH) >= tolerance):
+        if max_iter is not None and np.max(iterations) >= max_iter:
+            break
+        pHdone = np.abs(deltapH) < tolerance  # check which rows don't need updating
+        deltapH = deltafunc(pH, TA, VX, totals, k_constants)  # the pH jump
+        # To keep the jump from being too big:
+        deltapH = _limit_deltapH(deltapH)
+        pH = np.where(pHdone, pH, pH + deltapH)  # only update rows that need it
+        iterations = iterations + ~pHdone
+        final_deltapH = np.where(pHdone, final_deltapH, deltapH)
+    shape = np.shape(pH)
+    return (
+        pH,
+        {
+            "converged": np.broadcast_to(~(np.abs(deltapH) >= tolerance), shape),
+            "iterations": np.broadcast_to(iterations, shape),
+            "deltapH": np.broadcast_to(final_deltapH, shape),
+        },
+    )
+
+
+@np.errstate(invalid="ignore", over="ignore")
+def _pHfromTAVX_bracketed(
+    pH, TA, VX, totals, k_constants, residualfunc, tolerance, max_iter
+):
+    """Solve for pH with Newton-Raphson steps safeguarded by a bracket, falling back to
+    bisection whenever a Newton step would leave the bracket.
+
+    The bracket is centred on the initial estimate `pH` and is widened until the
+    residual alkalinity changes sign across it, up to +/- `pHBracketMax` pH units.
+    Iterations stop once the pH step is smaller than `tolerance`.  Rows that cannot be
+    bracketed or that do not converge within `max_iter` iterations are flagged as not
+    converged.
+
+    Returns the pH and a dict of per-row diagnostics, like `_pHfromTAVX_active`.
+    """
+    shape = _broadcast_shape(pH, TA, VX, totals, k_constants)
+    pH = np.broadcast_to(np.where(np.isfinite(pH), pH, 8.0), shape)
+
+    def residual(pH):
+        return residualfunc(pH, TA, VX, totals, k_constants)[0]
+
+    # Widen the bracket around the initial estimate until it contains a root
+    width = 0.5
+    pH_lo, pH_hi = pH - width, pH + width
+    r_lo, r_hi = residual(pH_lo), residual(pH_hi)
+    while True:
+        unbracketed = ~(r_lo * r_hi <= 0)
+        if width >= pHBracketMax or not np.any(unbracketed):
+            break
+        width = 2 * width
+        pH_lo = np.where(unbracketed, pH - width, pH_lo)
+        pH_hi = np.where(unbracketed, pH + width, pH_hi)
+        r_lo = np.where(unbracketed, residual(pH_lo), r_lo)
+        r_hi = np.where(unbracketed, residual(pH_hi), r_hi)
+    active = ~unbracketed
+    converged = np.zeros(shape, dtype=bool)
+    iterations = np.zeros(shape, dtype=int)
+    final_deltapH = np.full(shape, np.nan)
+    for _ in range(max_iter):
+        if not np.any(active):
+            break
+        r, slope = residualfunc(pH, TA, VX, totals, k_constants)
+        # Shrink the bracket onto the current estimate
+        lo_side = np.sign(r) == np.sign(r_lo)
+        pH_lo = np.where(lo_side, pH, pH_lo)
+        r_lo = np.where(lo_side, r, r_lo)
+        pH_hi = np.where(lo_side, pH_hi, pH)
+        r_hi = np.where(lo_side, r_hi, r)
+        # Take the Newton step if it stays inside the bracket, else bisect
+        pH_newton = pH - r / slope
+        inside = (pH_newton >= np.minimum(pH_lo, pH_hi)) & (
+            pH_newton <= np.maximum(pH_lo, pH_hi)
+        )
+        pH_next = np.where(inside, pH_newton, (pH_lo + pH_hi) / 2)
+        done = active & (np.abs(pH_next - pH) < tolerance)
+        final_deltapH = np.where(active, pH_next - pH, final_deltapH)
+        pH = np.where(active, pH_next, pH)
+        iterations = iterations + active
+        converged = converged | done
+        active = active & ~done
+    return (
+        pH,
+        {"converged": converged, "iterations": iterations, "deltapH": final_deltapH},
+    )
+
+
+@np.errstate(invalid="ignore")
+def _pHfromTAVX(
+    TA,
+    VX,
+    totals,
+    k_constants,
+    initialfunc,
+    deltafunc,
+    residualfunc=None,
+    active_set=True,
+    method="newton",
+    tolerance=None,
+    max_iter=None,
+    full_output=False,
+    pH_guess=None,
+):
     """Calculate pH from total alkalinity and DIC or one of its components using a
     Newton-Raphson iterative method.
 
@@ -265,36 +550,103 @@ def _pHfromTAVX(TA, VX, totals, k_constants, initialfunc, deltafunc):
     seawater (pH > 6) it will be equally valid on any pH scale (H terms negligible) as
     long as the K Constants are on that scale.
 
+    The iterative `method` can be:
+
+      * `"newton"` (default): unbounded Newton-Raphson steps, with the size of each
+      jump restricted by `_limit_deltapH`.
+      * `"bracketed"`: Newton-Raphson steps safeguarded by a bracket with a bisection
+      fallback, which needs the `residualfunc` (see `_pHfromTAVX_bracketed`).
+
+    Iterations stop once the pH step is smaller than `tolerance`, which defaults to
+    `pHTol` if `None`.  The number of iterations is capped at `max_iter`.  If `None`,
+    this defaults to no limit for `"newton"` and to `pHMaxIter` for `"bracketed"`.
+    Any rows that have not converged when the iterations stop are returned as NaN.
+
+    The iterations start from the initial estimate of `initialfunc`, except wherever
+    a finite `pH_guess` is provided (e.g. the pH from the previous step of a time
+    series), which is used instead.
+
+    If `full_output` is `True`, a dict of per-row diagnostics is returned alongside the
+    pH, with the keys:
+
+      * `"converged"`: boolean flagging which rows were solved.
+      * `"iterations"`: how many iterations each row took.
+      * `"deltapH"`: the final pH step taken.
+      * `"residual"`: the final residual alkalinity, from `residualfunc`.
+
+    If `active_set` is `True` (default), converged rows are removed from the
+    `"newton"` iterations as they go (see `_pHfromTAVX_active`).  If `False`, every
+    row is re-evaluated on every iteration and only the update is masked.  The
+    results are identical either way.  The active set relies on in-place updates, so
+    it is not used when any of the inputs are being differentiated by Autograd.
+
     Based on the CalculatepHfromTA* functions, version 04.01, Oct 96, by Ernie Lewis.
     """
+    assert method in [
+        "newton",
+        "bracketed",
+    ], "Valid options for method are 'newton' or 'bracketed'."
+    if tolerance is None:
+        tolerance = pHTol
     # First guess inspired by M13/OE15, added v1.3.0:
     pH = initialfunc(
         TA, VX, totals["TB"], k_constants["K1"], k_constants["K2"], k_constants["KB"]
     )
-    deltapH = 1.0 + pHTol
-    while np.any(np.abs(deltapH) >= pHTol):
-        pHdone = np.abs(deltapH) < pHTol  # check which rows don't need updating
-        deltapH = deltafunc(pH, TA, VX, totals, k_constants)  # the pH jump
-        # To keep the jump from being too big:
-        abs_deltapH = np.abs(deltapH)
-        np.sign_deltapH = np.sign(deltapH)
-        # Jump by 1 instead if `deltapH` > 5
-        deltapH = np.where(abs_deltapH > 5.0, np.sign_deltapH, deltapH)
-        # Jump by 0.5 instead if 1 < `deltapH` < 5
-        deltapH = np.where(
-            (abs_deltapH > 0.5) & (abs_deltapH <= 5.0), 0.5 * np.sign_deltapH, deltapH,
-        )  # assumes that once we're within 1 of the correct pH, we will converge
-        pH = np.where(pHdone, pH, pH + deltapH)  # only update rows that need it
+    # Warm start from the user's pH guesses, where provided
+    if pH_guess is not None:
+        pH = np.where(np.isfinite(pH_guess), pH_guess, pH)
+    if method == "bracketed":
+        pH, info = _pHfromTAVX_bracketed(
+            pH,
+            TA,
+            VX,
+            totals,
+            k_constants,
+            residualfunc,
+            tolerance,
+            pHMaxIter if max_iter is None else max_iter,
+        )
+    elif active_set and not _any_box(pH, TA, VX, totals, k_constants):
+        pH, info = _pHfromTAVX_active(
+            pH, TA, VX, totals, k_constants, deltafunc, tolerance, max_iter
+        )
+    else:
+        pH, info = _pHfromTAVX_newton(
+            pH, TA, VX, totals, k_constants, deltafunc, tolerance, max_iter
+        )
+    info["converged"] = info["converged"] & ~np.isnan(pH)
+    pH = np.where(info["converged"], pH, np.nan)
+    if full_output:
+        if residualfunc is None:
+            info["residual"] = np.full(np.shape(pH), np.nan)
+        else:
+            info["residual"] = residualfunc(pH, TA, VX, totals, k_constants)[0]
+        return pH, info
     return pH
 
 
-def pHfromTATC(TA, TC, totals, k_constants):
-    """Calculate pH from total alkalinity and dissolved inorganic carbon."""
-    return _pHfromTAVX(TA, TC, totals, k_constants, initialise.fromTC, delta.pHfromTATC)
+def pHfromTATC(TA, TC, totals, k_constants, **solver_kwargs):
+    """Calculate pH from total alkalinity and dissolved inorganic carbon.
+
+    Any `solver_kwargs` are passed on to `_pHfromTAVX`.
+    """
+    return _pHfromTAVX(
+        TA,
+        TC,
+        totals,
+        k_constants,
+        initialise.fromTC,
+        delta.pHfromTATC,
+        residualfunc=delta.pHfromTATC_residual,
+        **solver_kwargs,
+    )
 
 
-def pHfromTAfCO2(TA, fCO2, totals, k_constants):
-    """Calculate pH from total alkalinity and CO2 fugacity."""
+def pHfromTAfCO2(TA, fCO2, totals, k_constants, **solver_kwargs):
+    """Calculate pH from total alkalinity and CO2 fugacity.
+
+    Any `solver_kwargs` are passed on to `_pHfromTAVX`.
+    """
     # Slightly more convoluted than the others because initialise.fromCO2 takes CO2 as
     # an input, while delta.pHfromTAfCO2 takes fCO2.
     return _pHfromTAVX(
@@ -306,20 +658,42 @@ def pHfromTAfCO2(TA, fCO2, totals, k_constants):
             TA, k_constants["K0"] * fCO2, TB, K1, K2, KB
         ),  # this just transforms initalise.fromCO2 to take fCO2 in place of CO2
         delta.pHfromTAfCO2,
+        residualfunc=delta.pHfromTAfCO2_residual,
+        **solver_kwargs,
     )
 
 
-def pHfromTACarb(TA, CARB, totals, k_constants):
-    """Calculate pH from total alkalinity and carbonate ion molinity."""
+def pHfromTACarb(TA, CARB, totals, k_constants, **solver_kwargs):
+    """Calculate pH from total alkalinity and carbonate ion molinity.
+
+    Any `solver_kwargs` are passed on to `_pHfromTAVX`.
+    """
     return _pHfromTAVX(
-        TA, CARB, totals, k_constants, initialise.fromCO3, delta.pHfromTACarb
+        TA,
+        CARB,
+        totals,
+        k_constants,
+        initialise.fromCO3,
+        delta.pHfromTACarb,
+        residualfunc=delta.pHfromTACarb_residual,
+        **solver_kwargs,
     )
 
 
-def pHfromTAHCO3(TA, HCO3, totals, k_constants):
-    """Calculate pH from total alkalinity and bicarbonate ion molinity."""
+def pHfromTAHCO3(TA, HCO3, totals, k_constants, **solver_kwargs):
+    """Calculate pH from total alkalinity and bicarbonate ion molinity.
+
+    Any `solver_kwargs` are passed on to `_pHfromTAVX`.
+    """
     return _pHfromTAVX(
-        TA, HCO3, totals, k_constants, initialise.fromHCO3, delta.pHfromTAHCO3
+        TA,
+        HCO3,
+        totals,
+        k_constants,
+        initialise.fromHCO3,
+        delta.pHfromTAHCO3,
+        residualfunc=delta.pHfromTAHCO3_residual,
+        **solver_kwargs,
     )
 
 
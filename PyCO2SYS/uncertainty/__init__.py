@@ -4,7 +4,7 @@
 
 import copy
 from autograd import numpy as np
-from .. import engine
+from .. import engine, equilibria
 from . import automatic
 
 __all__ = ["automatic"]
@@ -41,18 +41,25 @@ def _get_dx_wrt(dx, var, dx_scaling, dx_func=None):
     return dx_wrt
 
 
+def _override_key(kwarg, wrt):
+    """Get the key of the internal override `wrt` in the `kwarg` dict."""
+    if wrt.startswith("pK"):
+        wrt = wrt[1:]
+    if kwarg == "equilibria_in":
+        return wrt.replace("input", "")
+    elif kwarg == "equilibria_out":
+        return wrt.replace("output", "")
+    else:
+        return wrt
+
+
 def _overridekwargs(co2dict, co2kwargs_plus, kwarg, wrt, dx, dx_scaling, dx_func):
     """Generate `co2kwargs_plus` and scale `dx` for internal override derivatives."""
     # Reformat variable names for the kwargs dicts
     ispK = wrt.startswith("pK")
     if ispK:
         wrt = wrt[1:]
-    if kwarg == "equilibria_in":
-        wrt_stem = wrt.replace("input", "")
-    elif kwarg == "equilibria_out":
-        wrt_stem = wrt.replace("output", "")
-    else:
-        wrt_stem = wrt
+    wrt_stem = _override_key(kwarg, wrt)
     # If there isn't yet a dict, create one
     if co2kwargs_plus[kwarg] is None:
         co2kwargs_plus[kwarg] = {wrt_stem: co2dict[wrt]}
@@ -206,6 +213,35 @@ def forward(
         "equilibria_in": equilibria_in,
         "equilibria_out": equilibria_out,
     }
+    # Find which of the total salts and equilibrium constants (the `precomputed` stages
+    # of `engine._CO2SYS`) depend on each of the `grads_wrt`
+    stages_all = {"totals", "k_constants_in", "k_constants_out"}
+    stages_wrt = {
+        "PAR1": set(),
+        "PAR2": set(),
+        "SAL": stages_all,
+        "TEMPIN": {"k_constants_in"},
+        "TEMPOUT": {"k_constants_out"},
+        "PRESIN": {"k_constants_in"},
+        "PRESOUT": {"k_constants_out"},
+        "TF": stages_all,
+        "TSO4": stages_all,
+    }
+    stages_wrt.update(
+        {wrt: {"totals"} for wrt in ["SI", "PO4", "NH3", "H2S", "TB", "TCa"]}
+    )
+    stages_wrt.update({wrt: {"k_constants_in"} for wrt in Kis_wrt + pKis_wrt})
+    stages_wrt.update({wrt: {"k_constants_out"} for wrt in Kos_wrt[:-1] + pKos_wrt})
+    # Internal overrides whose values are put straight into one of these stages: (kwarg,
+    # stage, unit factor)
+    overrides_wrt = {wrt: ("totals", "totals", 1e-6) for wrt in totals_wrt}
+    overrides_wrt.update(
+        {wrt: ("equilibria_in", "k_constants_in", 1) for wrt in Kis_wrt + pKis_wrt}
+    )
+    overrides_wrt.update(
+        {wrt: ("equilibria_out", "k_constants_out", 1) for wrt in Kos_wrt[:-1]}
+    )
+    stages = {}
     # Preallocate output dict to store the gradients
     co2derivs = {of: {wrt: None for wrt in grads_wrt} for of in grads_of}
     dxs = {wrt: None for wrt in grads_wrt}
@@ -259,8 +295,24 @@ def forward(
                 dx_scaling,
                 dx_func=dx_func,
             )
+        # Reuse the stages that do not depend on `wrt`, and put its perturbed value
+        # straight into any stage that it overrides (unless that changes the rest)
+        precomputed = {k: v for k, v in stages.items() if k not in stages_wrt[wrt]}
+        if wrt in overrides_wrt:
+            kwarg, stage, factor = overrides_wrt[wrt]
+            key = _override_key(kwarg, wrt)
+            if stage in stages and key not in equilibria.Ks_upstream:
+                precomputed[stage] = {
+                    **stages[stage],
+                    key: co2kwargs_plus[kwarg][key] * factor,
+                }
         # Solve CO2SYS with the perturbation applied
-        co2dict_plus = engine._CO2SYS(**co2args_plus, **co2kwargs_plus)
+        co2dict_plus = engine._CO2SYS(
+            **co2args_plus, **co2kwargs_plus, precomputed=precomputed
+        )
+        for stage, values in precomputed.items():
+            if stage not in stages and stage not in stages_wrt[wrt]:
+                stages[stage] = values
         dxs[wrt] = dx_wrt
         # Extract results and calculate forward finite difference derivatives
         for of in grads_of:
@@ -313,6 +365,53 @@ def propagate(
     return uncertainties, components
 
 
+def _solve_reusing(args, keys, stages, ndim=None):
+    """Solve CO2SYS_nd with `args`, reusing any of the total salts and equilibrium
+    constants in `stages` that do not depend on the perturbed args `keys` (see
+    `engine.nd.reuse_stages`).
+
+    Any of these that are calculated here and that do not depend on the `keys` are
+    added to `stages`, after dropping any leading axes beyond `ndim`.
+    """
+    precomputed = engine.nd.reuse_stages(stages, args, keys)
+    results = engine.nd.CO2SYS(**args, precomputed=precomputed)
+    for stage, values in precomputed.items():
+        if stage not in stages and not any(
+            stage in engine.nd.stages_affected(k, args) for k in keys
+        ):
+            if ndim is not None:
+                values = {
+                    k: v[(0,) * (np.ndim(v) - ndim)] if np.ndim(v) > ndim else v
+                    for k, v in values.items()
+                }
+            stages[stage] = values
+    return results
+
+
+def _solve_perturbations(args, CO2SYS_nd_results, perturbations, stages):
+    """Solve CO2SYS_nd once for a list of `perturbations`, each a tuple of the key of
+    the arg to perturb and its perturbed value, reusing the `stages` where possible
+    (see `_solve_reusing`).
+
+    The perturbations are stacked along a new leading axis.  Only the args that are
+    perturbed are stacked: all the others are broadcast along the new axis.
+    """
+    nd_shape = engine.nd.broadcast1024(
+        *args.values(), *[value for _, value in perturbations]
+    ).shape
+    args = dict(args)
+    for key in set(key for key, _ in perturbations):
+        value_fixed = args[key] if key in args else CO2SYS_nd_results[key]
+        values = [value if k == key else value_fixed for k, value in perturbations]
+        shape = engine.nd.broadcast1024(*values).shape
+        args[key] = np.reshape(
+            np.stack([np.broadcast_to(value, shape) for value in values]),
+            (len(values),) + (1,) * (len(nd_shape) - len(shape)) + shape,
+        )
+    keys = set(key for key, _ in perturbations)
+    return _solve_reusing(args, keys, stages, ndim=len(nd_shape))
+
+
 def forward_nd(
     CO2SYS_nd_results,
     grads_of,
@@ -320,10 +419,19 @@ def forward_nd(
     dx=1e-6,
     dx_scaling="median",
     dx_func=None,
+    batch=False,
     **CO2SYS_nd_kwargs,
 ):
     """Get forward finite-difference derivatives of CO2SYS_nd results with respect to
     its arguments.
+
+    The total salts and equilibrium constants are calculated only for the first
+    perturbation, and then again only for those perturbations of args that they depend
+    upon.
+
+    If `batch`, then all the perturbations are solved together in a single call to
+    CO2SYS_nd, stacked along a new leading axis, instead of one at a time.  This is
+    faster, but needs about `len(grads_wrt)` times as much memory.
     """
     # Check requested grads are possible
     assert np.all(
@@ -367,26 +475,67 @@ def forward_nd(
         + list(CO2SYS_nd_kwargs.keys())
     )
     args_fixed = {k: CO2SYS_nd_results[k] for k in keys_fixed}
-    # Loop through requested parameters and calculate the gradients
-    dxs = {wrt: None for wrt in grads_wrt}
-    CO2SYS_derivs = {of: {wrt: None for wrt in grads_wrt} for of in grads_of}
+    # Perturb each of the requested parameters
+    dxs = {}
+    perturbations = []
     for wrt in grads_wrt:
-        args_plus = copy.deepcopy(args_fixed)
-        is_pk = wrt.startswith("pk_")
-        if is_pk:
+        if wrt.startswith("pk_"):
             wrt_k = wrt[1:]
             pk_values = -np.log10(CO2SYS_nd_results[wrt_k])
             dxs[wrt] = _get_dx_wrt(dx, pk_values, dx_scaling, dx_func=dx_func)
-            pk_values_plus = pk_values + dxs[wrt]
-            args_plus[wrt_k] = 10.0 ** -pk_values_plus
+            perturbations.append((wrt_k, 10.0 ** -(pk_values + dxs[wrt])))
         else:
             dxs[wrt] = _get_dx_wrt(
                 dx, CO2SYS_nd_results[wrt], dx_scaling, dx_func=dx_func
             )
-            args_plus[wrt] = CO2SYS_nd_results[wrt] + dxs[wrt]
-        results_plus = engine.nd.CO2SYS(**args_plus)
+            perturbations.append((wrt, CO2SYS_nd_results[wrt] + dxs[wrt]))
+
+    # Solve with each perturbation applied, first for those that the fewest of the
+    # total salts and equilibrium constants depend upon, so that the rest can reuse them
+    def n_stages_affected(indices):
+        """Count the stages that depend on any of the perturbations `indices`."""
+        return len(
+            set().union(
+                *[
+                    engine.nd.stages_affected(perturbations[i][0], args_fixed)
+                    for i in indices
+                ]
+            )
+        )
+
+    stages = {}
+    results_plus = [None] * len(perturbations)
+    if batch:
+        # Args that were not provided (i.e. equilibrium constants that were calculated
+        # internally) are perturbed in separate calls, because providing their values
+        # for the other perturbations would stop them from responding to those
+        batches = {}
+        for i, (key, _) in enumerate(perturbations):
+            batches.setdefault(key if key not in args_fixed else None, []).append(i)
+        for indices in sorted(batches.values(), key=n_stages_affected):
+            results_batch = _solve_perturbations(
+                args_fixed,
+                CO2SYS_nd_results,
+                [perturbations[i] for i in indices],
+                stages,
+            )
+            for j, i in enumerate(indices):
+                results_plus[i] = {
+                    of: results_batch[of][j]
+                    if np.ndim(results_batch[of]) > 0
+                    else results_batch[of]
+                    for of in grads_of
+                }
+    else:
+        order = sorted(range(len(perturbations)), key=lambda i: n_stages_affected([i]))
+        for i in order:
+            key, value = perturbations[i]
+            results_plus[i] = _solve_reusing({**args_fixed, key: value}, [key], stages)
+    # Calculate the gradients
+    CO2SYS_derivs = {of: {wrt: None for wrt in grads_wrt} for of in grads_of}
+    for wrt, results_wrt in zip(grads_wrt, results_plus):
         for of in grads_of:
-            CO2SYS_derivs[of][wrt] = (results_plus[of] - CO2SYS_nd_results[of]) / dxs[
+            CO2SYS_derivs[of][wrt] = (results_wrt[of] - CO2SYS_nd_results[of]) / dxs[
                 wrt
             ]
     return CO2SYS_derivs, dxs
@@ -399,9 +548,13 @@ def propagate_nd(
     dx=1e-6,
     dx_scaling="median",
     dx_func=None,
+    batch=False,
     **CO2SYS_nd_kwargs,
 ):
-    """Propagate uncertainties from requested CO2SYS_nd arguments to results."""
+    """Propagate uncertainties from requested CO2SYS_nd arguments to results.
+
+    If `batch`, then the perturbations are all solved together (see `forward_nd`).
+    """
     CO2SYS_derivs = forward_nd(
         CO2SYS_nd_results,
         uncertainties_into,
@@ -409,6 +562,7 @@ def propagate_nd(
         dx=dx,
         dx_scaling=dx_scaling,
         dx_func=dx_func,
+        batch=batch,
         **CO2SYS_nd_kwargs,
     )[0]
     nd_shape = engine.nd.broadcast1024(*CO2SYS_nd_results.values()).shape
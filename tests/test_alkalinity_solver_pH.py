@@ -29,3 +29,159 @@ def test_pH_scale_consistency():
 
 
 test_pH_scale_consistency()
+
+
+# Solve with and without the active set of rows in the Newton-Raphson iterations
+npts = 1000
+active_totals = pyco2.salts.assemble(
+    np.linspace(0, 40, npts), 20.0, 2.0, 3.0, 1.0, 10, 1
+)
+active_k_constants = pyco2.equilibria.assemble(
+    np.linspace(-1, 35, npts), 0.0, active_totals, 1, 10, 1, 1, 3
+)
+active_alkalinity = np.linspace(1000, 2500, npts) * 1e-6
+active_solvers = {
+    pyco2.solve.get.pHfromTATC: np.full(npts, 2000e-6),
+    pyco2.solve.get.pHfromTAfCO2: np.full(npts, 400e-6),
+    pyco2.solve.get.pHfromTACarb: np.full(npts, 200e-6),
+    pyco2.solve.get.pHfromTAHCO3: np.full(npts, 1800e-6),
+}
+
+
+def test_active_set_consistency():
+    for solver, par2 in active_solvers.items():
+        pH_active = solver(
+            active_alkalinity, par2, active_totals, active_k_constants, active_set=True
+        )
+        pH_all = solver(
+            active_alkalinity, par2, active_totals, active_k_constants, active_set=False
+        )
+        assert np.shape(pH_active) == np.shape(pH_all)
+        assert np.all((pH_active == pH_all) | (np.isnan(pH_active) & np.isnan(pH_all)))
+
+
+test_active_set_consistency()
+
+
+# Compare the fused alkalinity kernel with the full speciation
+fused_totals = {**active_totals, "alpha": 5e-6, "beta": 3e-6}
+fused_k_constants = {
+    **active_k_constants,
+    "alpha": np.where(np.arange(npts) % 2, 1e-4, 1e-7),
+    "beta": 1e-5,
+}
+fused_pH = np.linspace(3, 11, npts)
+
+
+def test_fused_alkalinity():
+    alk_fused, slope_fused = pyco2.solve.get.TAfromTCpH_fused(
+        2000e-6, fused_pH, fused_totals, fused_k_constants
+    )
+    alk_speciation = pyco2.solve.get.speciation(
+        2000e-6, fused_pH, fused_totals, fused_k_constants
+    )["alk_total"]
+    slope_autograd = pyco2.solve.delta._pHfromTATC_s(
+        fused_pH, 0.0, 2000e-6, fused_totals, fused_k_constants
+    )
+    assert np.allclose(alk_fused, alk_speciation, rtol=0, atol=1e-15)
+    assert np.allclose(slope_fused, slope_autograd, rtol=1e-12, atol=0)
+
+
+test_fused_alkalinity()
+
+
+# Compare the closed-form residuals and slopes with the Autograd versions
+delta = pyco2.solve.delta
+slope_solvers = {
+    "TATC": 2000e-6,
+    "TAfCO2": 400e-6,
+    "TACarb": 200e-6,
+    "TAHCO3": 1800e-6,
+}
+
+
+def test_closed_form_slopes():
+    for solver, par2 in slope_solvers.items():
+        args = (fused_pH, active_alkalinity, par2, fused_totals, fused_k_constants)
+        residual, slope = getattr(delta, "_pHfrom{}_rs".format(solver))(*args)
+        residual_autograd = getattr(delta, "_pHfrom{}_r".format(solver))(*args)
+        slope_autograd = getattr(delta, "_pHfrom{}_s".format(solver))(*args)
+        assert np.allclose(residual, residual_autograd, rtol=1e-12, atol=1e-15)
+        assert np.allclose(slope, slope_autograd, rtol=1e-12, atol=0)
+
+
+test_closed_form_slopes()
+
+
+def test_bracketed_solver():
+    for solver, par2 in active_solvers.items():
+        pH_newton = solver(active_alkalinity, par2, active_totals, active_k_constants)
+        pH_bracketed, info = solver(
+            active_alkalinity,
+            par2,
+            active_totals,
+            active_k_constants,
+            method="bracketed",
+            full_output=True,
+        )
+        assert np.all(info["converged"])
+        assert np.allclose(pH_bracketed, pH_newton, rtol=0, atol=1e-8)
+        # Rows that cannot converge are returned as NaN and flagged
+        pH_capped, info = solver(
+            np.where(np.arange(npts) % 2, active_alkalinity, np.nan),
+            par2,
+            active_totals,
+            active_k_constants,
+            method="bracketed",
+            max_iter=1,
+            full_output=True,
+        )
+        assert ~np.any(info["converged"])
+        assert np.all(np.isnan(pH_capped))
+
+
+test_bracketed_solver()
+
+
+def test_bracketed_solver_pathological():
+    """Are pathological rows returned as NaN or solved properly without affecting the
+    valid rows or running past `max_iter`?
+    """
+    # Valid rows, then NaN constants, negative TA, zero TA and an extreme pH guess
+    kind = np.arange(npts) % 5
+    k_constants = {
+        **active_k_constants,
+        "KW": np.where(kind == 1, np.nan, active_k_constants["KW"]),
+    }
+    alkalinity = np.where(kind == 2, -1000e-6, active_alkalinity)
+    alkalinity = np.where(kind == 3, 0.0, alkalinity)
+    pH_guess = np.where(kind == 4, 30.0, np.nan)
+    max_iter = 50
+    for solver, par2 in active_solvers.items():
+        pH_valid = solver(active_alkalinity, par2, active_totals, active_k_constants)
+        pH_newton = solver(alkalinity, par2, active_totals, k_constants)
+        pH, info = solver(
+            alkalinity,
+            par2,
+            active_totals,
+            k_constants,
+            method="bracketed",
+            max_iter=max_iter,
+            pH_guess=pH_guess,
+            full_output=True,
+        )
+        valid = kind == 0
+        assert np.all(info["converged"][valid])
+        assert np.allclose(pH[valid], pH_valid[valid], rtol=0, atol=1e-8)
+        assert np.all(np.isnan(pH[kind == 1]) & ~info["converged"][kind == 1])
+        assert np.all(np.isnan(pH[kind == 4]) & ~info["converged"][kind == 4])
+        # Non-positive TA can have a genuine (acidic) root, which must then agree with
+        # Newton-Raphson, otherwise it is flagged and returned as NaN
+        assert np.all(np.isfinite(pH) == info["converged"])
+        both = info["converged"] & np.isfinite(pH_newton)
+        assert np.allclose(pH[both], pH_newton[both], rtol=0, atol=1e-8)
+        assert np.all(np.abs(info["residual"][info["converged"]]) < 1e-12)
+        assert np.all(info["iterations"] <= max_iter)
+
+
+test_bracketed_solver_pathological()
@@ -0,0 +1,101 @@
+import PyCO2SYS as pyco2, numpy as np
+
+# Solve the carbonate system from several parameter pairs, with every component of
+# total alkalinity present and with output conditions that differ from input
+rng = np.random.default_rng(21)
+npts = 100
+kwargs = dict(
+    par1=rng.uniform(2200, 2400, npts),
+    par2=np.array([2100, 8.1, 400, 150, 1800] * (npts // 5)),
+    par1_type=1,
+    par2_type=np.array([2, 3, 4, 6, 7] * (npts // 5)),
+    salinity=rng.uniform(25, 40, npts),
+    temperature=rng.uniform(0, 30, npts),
+    pressure=rng.uniform(0, 3000, npts),
+    temperature_out=10,
+    total_silicate=50,
+    total_phosphate=2,
+    total_ammonia=5,
+    total_sulfide=5,
+    total_alpha=20,
+    k_alpha=1e-5,
+    total_beta=20,
+    k_beta=1e-8,
+    opt_k_carbonic=np.array([10, 16, 7, 6] * (npts // 4)),
+    opt_pH_scale=np.array([1, 2, 3, 4] * (npts // 4)),
+)
+buffers = [
+    "gamma_dic",
+    "gamma_alk",
+    "beta_dic",
+    "beta_alk",
+    "omega_dic",
+    "omega_alk",
+    "isocapnic_quotient",
+    "revelle_factor",
+]
+buffers = buffers + [b + "_out" for b in buffers]
+r_auto = pyco2.sys(**kwargs, buffers_mode="auto")
+r_closed = pyco2.sys(**kwargs, buffers_mode="closed_form")
+
+
+def test_closed_form_auto():
+    """Do the closed-form buffers agree with those from automatic differentiation?"""
+    for b in buffers:
+        assert np.allclose(r_closed[b], r_auto[b], rtol=1e-12, atol=0), b
+
+
+def test_closed_form_fallback():
+    """Do the closed-form buffers fall back to automatic differentiation when the
+    speciation function has been replaced?
+    """
+    pyco2.solve.get.speciation_func = lambda *args: pyco2.solve.get.speciation(*args)
+    try:
+        r_fallback = pyco2.sys(
+            **kwargs,
+            buffers_mode="closed_form",
+            outputs=["gamma_dic", "isocapnic_quotient"],
+        )
+    finally:
+        pyco2.solve.get.speciation_func = pyco2.solve.get.speciation
+    for b in ["gamma_dic", "isocapnic_quotient"]:
+        assert np.allclose(r_fallback[b], r_auto[b], rtol=1e-12, atol=0), b
+
+
+def test_all_ESM10_forward():
+    """Do the forward-mode buffers agree with those from the individual reverse-mode
+    functions?
+    """
+    totals = pyco2.salts.assemble(kwargs["salinity"], 50e-6, 2e-6, 5e-6, 5e-6, 10, 1)
+    Ks = pyco2.equilibria.assemble(
+        kwargs["temperature"], kwargs["pressure"], totals, 1, 10, 1, 1, 1
+    )
+    PH = rng.uniform(7.5, 8.3, npts)
+    TC = rng.uniform(1.9e-3, 2.2e-3, npts)
+    TA = pyco2.solve.get.TAfromTCpH(TC, PH, totals, Ks)
+    CARB = pyco2.solve.get.CarbfromTCpH(TC, PH, totals, Ks)
+    FC = pyco2.solve.get.fCO2fromTCpH(TC, PH, totals, Ks)
+    Sal, TempK, Pbar = kwargs["salinity"], 298.15, 1.0
+    ESM10 = pyco2.buffers.all_ESM10(
+        TA, TC, PH, CARB, Sal, TempK, Pbar, totals, Ks, 10, FC=FC
+    )
+    omega_args = (CARB, Sal, TempK, Pbar, 10, totals, Ks)
+    reverse = {
+        "gammaTC": pyco2.buffers.gammaTC(TA, PH, totals, Ks),
+        "gammaTA": pyco2.buffers.gammaTA(TC, PH, totals, Ks),
+        "betaTC": pyco2.buffers.betaTC(TA, PH, totals, Ks),
+        "betaTA": pyco2.buffers.betaTA(TC, PH, totals, Ks),
+        "omegaTC": pyco2.buffers.omegaTC(TA, PH, *omega_args),
+        "omegaTA": pyco2.buffers.omegaTA(TC, PH, *omega_args),
+        "isoQ": pyco2.buffers.closed_form.isocap(TC, PH, FC, totals, Ks),
+    }
+    for b, v in reverse.items():
+        assert np.allclose(ESM10[b], v, rtol=1e-12, atol=0), b
+    assert np.allclose(
+        pyco2.buffers.isocap(TA, TC, PH, FC, totals, Ks), ESM10["isoQ"], rtol=1e-12
+    )
+
+
+test_closed_form_auto()
+test_closed_form_fallback()
+test_all_ESM10_forward()
@@ -1,3 +1,4 @@
+import multiprocessing, tempfile
 import numpy as np, PyCO2SYS as pyco2
 
 # Set up for basic conditioning check
@@ -94,3 +95,704 @@ def test_grid():
 
 
 test_grid()
+
+
+# Test solving a batch with every valid Icase mixed together
+par_values = {1: 2300, 2: 2100, 3: 8.1, 4: 400, 5: 398, 6: 200, 7: 1800, 8: 12}
+par_pairs = [
+    (p1, p2)
+    for p1 in range(1, 9)
+    for p2 in range(p1 + 1, 9)
+    if (p1, p2) not in [(4, 5), (4, 8), (5, 8)]
+]
+par1m_type = np.array([pair[0] for pair in par_pairs])
+par2m_type = np.array([pair[1] for pair in par_pairs])
+par1m = np.array([par_values[t] for t in par1m_type])
+par2m = np.array([par_values[t] for t in par2m_type])
+temperature_m = np.linspace(0, 30, len(par_pairs))
+co2nd_mixed = pyco2.sys(
+    par1m,
+    par2m,
+    par1m_type,
+    par2m_type,
+    temperature=temperature_m,
+    total_phosphate=2,
+    total_silicate=10,
+)
+
+
+def test_mixed_Icase():
+    for i in range(len(par_pairs)):
+        co2nd_single = pyco2.sys(
+            par1m[i],
+            par2m[i],
+            par1m_type[i],
+            par2m_type[i],
+            temperature=temperature_m[i],
+            total_phosphate=2,
+            total_silicate=10,
+        )
+        for k in [
+            "alkalinity",
+            "dic",
+            "pH",
+            "pCO2",
+            "fCO2",
+            "carbonate",
+            "bicarbonate",
+        ]:
+            assert np.isclose(co2nd_mixed[k][i], co2nd_single[k], rtol=1e-12, atol=0)
+
+
+test_mixed_Icase()
+
+
+def test_solver_method():
+    co2nd_bracketed = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        solver_method="bracketed",
+    )
+    assert np.allclose(co2nd_bracketed["pH"], co2nd_mixed["pH"], rtol=0, atol=1e-8)
+
+
+test_solver_method()
+
+
+def test_solver_diagnostics():
+    co2nd_diagnostics = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        temperature_out=10,
+        total_phosphate=2,
+        total_silicate=10,
+        solver_diagnostics=True,
+    )
+    assert "solver_iterations" not in co2nd_mixed
+    iterative = (par1m_type == 1) & (par2m_type != 3)
+    # Where output conditions are the same as input conditions, the input solver
+    # diagnostics are reused
+    reused = temperature_m == 10
+    for suffix in ["", "_out"]:
+        assert np.all(co2nd_diagnostics["solver_converged" + suffix])
+        iterations = co2nd_diagnostics["solver_iterations" + suffix]
+        residual = co2nd_diagnostics["solver_residual" + suffix]
+        delta_pH = co2nd_diagnostics["solver_delta_pH" + suffix]
+        if suffix == "_out":
+            for k in ["solver_iterations", "solver_residual", "solver_delta_pH"]:
+                assert np.array_equal(
+                    co2nd_diagnostics[k + suffix][reused],
+                    co2nd_diagnostics[k][reused],
+                    equal_nan=True,
+                )
+            iterative = iterative | ~reused
+        assert np.all(iterations[~iterative] == 0)
+        assert np.all(np.isnan(residual[~iterative]))
+        assert np.all(np.isnan(delta_pH[~iterative]))
+        iterations = iterations[iterative]
+        residual = residual[iterative]
+        delta_pH = delta_pH[iterative]
+        assert np.all(iterations > 0)
+        assert np.all(np.abs(residual) < 1e-6)
+        assert np.all(delta_pH < pyco2.solve.get.pHTol)
+
+
+test_solver_diagnostics()
+
+
+def test_solver_tolerance():
+    co2nd_loose = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        solver_tolerance=1e-3,
+        solver_diagnostics=True,
+    )
+    co2nd_tight = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        solver_tolerance=1e-12,
+        solver_diagnostics=True,
+    )
+    assert np.all(co2nd_loose["solver_iterations"] <= co2nd_tight["solver_iterations"])
+    assert np.allclose(co2nd_loose["pH"], co2nd_tight["pH"], rtol=0, atol=1e-3)
+    # The module-wide default must not have been changed
+    assert pyco2.solve.get.pHTol == 1e-8
+    co2nd_capped = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        solver_max_iter=0,
+    )
+    iterative = (par1m_type == 1) & (par2m_type != 3)
+    assert np.all(np.isnan(co2nd_capped["pH"][iterative]))
+    assert ~np.any(np.isnan(co2nd_capped["pH"][~iterative]))
+
+
+test_solver_tolerance()
+
+
+def test_pH_guess():
+    pH_guess = np.where(np.arange(len(par_pairs)) % 2, co2nd_mixed["pH"] + 0.01, np.nan)
+    co2nd_guessed = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        pH_guess=pH_guess,
+        solver_diagnostics=True,
+    )
+    assert np.allclose(co2nd_guessed["pH"], co2nd_mixed["pH"], rtol=0, atol=1e-8)
+    co2nd_warm = pyco2.sys(
+        par1m,
+        par2m,
+        par1m_type,
+        par2m_type,
+        temperature=temperature_m,
+        total_phosphate=2,
+        total_silicate=10,
+        pH_guess=co2nd_mixed["pH"],
+        solver_diagnostics=True,
+    )
+    iterative = (par1m_type == 1) & (par2m_type != 3)
+    assert np.all(co2nd_warm["solver_iterations"][iterative] == 1)
+
+
+test_pH_guess()
+
+
+def test_CO2SYSPlan():
+    """Does a CO2SYSPlan give the same results as pyco2.sys?"""
+    plan = pyco2.CO2SYSPlan(par1m_type, par2m_type, shape=np.shape(par1m))
+    for _ in range(2):  # check the plan can be reused
+        co2plan = plan.solve(
+            par1m,
+            par2m,
+            temperature=temperature_m,
+            total_phosphate=2,
+            total_silicate=10,
+        )
+        for k, v in co2nd_mixed.items():
+            if isinstance(v, str):
+                assert co2plan[k] == v
+            else:
+                assert np.allclose(co2plan[k], v, rtol=1e-12, atol=0, equal_nan=True)
+    plan_out = pyco2.CO2SYSPlan(1, 2, outputs=["pH", "pH_out"])
+    co2plan_out = plan_out.solve(2300, 2100, temperature_out=0, pressure_out=1000)
+    co2nd_out = pyco2.sys(2300, 2100, 1, 2, temperature_out=0, pressure_out=1000)
+    assert set(co2plan_out.keys()) == {"pH", "pH_out"}
+    for k, v in co2plan_out.items():
+        assert np.isclose(v, co2nd_out[k], rtol=1e-12, atol=0)
+    # The default solver settings are read when solving, not when planning
+    plan_solver = pyco2.CO2SYSPlan(1, 2, solver_diagnostics=True)
+    pHTol = pyco2.solve.get.pHTol
+    pyco2.solve.get.pHTol = 1e-3
+    try:
+        co2plan_solver = plan_solver.solve(2300, 2100, temperature_out=0)
+        co2nd_solver = pyco2.sys(
+            2300, 2100, 1, 2, temperature_out=0, solver_diagnostics=True
+        )
+    finally:
+        pyco2.solve.get.pHTol = pHTol
+    for k in ["pH", "pH_out", "solver_iterations", "solver_iterations_out"]:
+        assert co2plan_solver[k] == co2nd_solver[k]
+
+
+test_CO2SYSPlan()
+
+
+def test_outputs():
+    """Does selecting outputs return the same values as calculating everything?"""
+    kwargs = dict(
+        temperature=temperature_m,
+        temperature_out=0,
+        pressure_out=1000,
+        total_phosphate=2,
+        total_silicate=10,
+    )
+    co2nd_full = pyco2.sys(par1m, par2m, par1m_type, par2m_type, **kwargs)
+    for buffers_mode in ["auto", "explicit", "none"]:
+        for outputs in [
+            ["pH", "saturation_aragonite_out"],
+            ["revelle_factor", "psi_out", "substrate_inhibitor_ratio"],
+            ["xCO2", "pH_free_out", "HCO3", "alkalinity_borate_out"],
+            ["dic", "k_CO2_out"],
+        ]:
+            co2nd_outputs = pyco2.sys(
+                par1m,
+                par2m,
+                par1m_type,
+                par2m_type,
+                buffers_mode=buffers_mode,
+                outputs=outputs,
+                **kwargs,
+            )
+            assert set(co2nd_outputs.keys()) == set(outputs)
+            if buffers_mode == "auto":
+                for k, v in co2nd_outputs.items():
+                    assert np.allclose(
+                        v, co2nd_full[k], rtol=1e-12, atol=0, equal_nan=True
+                    )
+
+
+test_outputs()
+
+
+def test_outputs_unknown():
+    """Are unknown or unavailable outputs rejected instead of silently dropped?"""
+    for outputs, kwargs in [
+        (["pH", "pHH", "revele_factor"], {}),
+        (["pH", "pH_out"], {}),
+        (["pH", "solver_residual"], {}),
+    ]:
+        try:
+            pyco2.sys(2300, 2100, 1, 2, outputs=outputs, **kwargs)
+        except KeyError as e:
+            assert all(k in str(e) for k in outputs[1:])
+        else:
+            assert False, outputs
+    plan = pyco2.CO2SYSPlan(1, 2, outputs=["pH", "pH_out"])
+    assert set(plan.solve(2300, 2100, temperature_out=0)) == {"pH", "pH_out"}
+    try:
+        plan.solve(2300, 2100)
+    except KeyError as e:
+        assert "pH_out" in str(e)
+    else:
+        assert False
+
+
+test_outputs_unknown()
+
+
+def test_mixed_options():
+    """Do mixed constants options give the same results as each option on its own?"""
+    opt_k_carbonic = np.arange(1, 17)
+    opt_k_bisulfate = np.tile([1, 2], 8)
+    kwargs = dict(
+        temperature=np.linspace(0, 30, 16),
+        pressure=np.linspace(0, 5000, 16),
+        pressure_out=1000,
+        total_phosphate=2,
+        total_silicate=10,
+    )
+    co2nd_mixed = pyco2.sys(
+        2300,
+        2100,
+        1,
+        2,
+        opt_k_carbonic=opt_k_carbonic,
+        opt_k_bisulfate=opt_k_bisulfate,
+        **kwargs,
+    )
+    for i in range(16):
+        co2nd_i = pyco2.sys(
+            2300,
+            2100,
+            1,
+            2,
+            opt_k_carbonic=opt_k_carbonic[i],
+            opt_k_bisulfate=opt_k_bisulfate[i],
+            **{k: v[i] if np.ndim(v) else v for k, v in kwargs.items()},
+        )
+        for k in ["pH", "k_carbonic_1", "k_borate_out", "k_aragonite", "pH_out"]:
+            assert np.isclose(
+                co2nd_mixed[k][i], co2nd_i[k], rtol=1e-12, atol=0, equal_nan=True
+            )
+
+
+test_mixed_options()
+
+
+def test_ConstantsCache():
+    """Does using a ConstantsCache give the same results as pyco2.sys without it?"""
+    kwargs = dict(
+        temperature=np.tile([5.0, 10.0, 25.0], 4),
+        pressure=np.repeat([0.0, 1000.0], 6),
+        pressure_out=0,
+        opt_k_carbonic=np.tile([10, 16], 6),
+        total_phosphate=2,
+    )
+    co2nd = pyco2.sys(2300, 2100, 1, 2, **kwargs)
+    cache = pyco2.ConstantsCache(maxsize=100)
+    for _ in range(2):
+        co2cache = pyco2.sys(2300, 2100, 1, 2, constants_cache=cache, **kwargs)
+        for k, v in co2nd.items():
+            if isinstance(v, str):
+                assert co2cache[k] == v
+            else:
+                assert np.shape(co2cache[k]) == np.shape(v)
+                assert np.allclose(co2cache[k], v, rtol=1e-12, atol=0, equal_nan=True)
+    # 2 unique rows for salts, 12 for the input conditions and 6 for the output
+    info = cache.info()
+    assert info["misses"] == 20
+    assert info["hits"] == 20
+    assert info["size"] == 20
+    cache.clear()
+    assert cache.info()["size"] == 0
+    # With more unique rows than `maxsize`, the cache is bypassed
+    cache = pyco2.ConstantsCache(maxsize=5)
+    co2cache = pyco2.sys(2300, 2100, 1, 2, constants_cache=cache, **kwargs)
+    for k, v in co2nd.items():
+        if not isinstance(v, str):
+            assert np.allclose(co2cache[k], v, rtol=1e-12, atol=0, equal_nan=True)
+    info = cache.info()
+    assert info["misses"] == 20
+    assert info["hits"] == 0
+    assert info["size"] == 2
+    # Rows with NaN conditions are all treated as the same row
+    cache = pyco2.ConstantsCache()
+    temperature = np.array([10.0, np.nan, 20.0, np.nan, np.nan])
+    co2nd = pyco2.sys(2300, 2100, 1, 2, temperature=temperature)
+    for _ in range(2):
+        co2cache = pyco2.sys(
+            2300, 2100, 1, 2, temperature=temperature, constants_cache=cache
+        )
+        assert np.array_equal(co2cache["pH"], co2nd["pH"], equal_nan=True)
+    # 1 unique row for salts and 3 for the input conditions
+    info = cache.info()
+    assert info["misses"] == 4
+    assert info["hits"] == 4
+    assert info["size"] == 4
+
+
+test_ConstantsCache()
+
+
+def test_same_conditions_out():
+    """Are results at input conditions reused where output conditions are the same,
+    with the other rows unaffected?
+    """
+    temperature = np.linspace(0, 30, 10)
+    pressure = np.linspace(0, 5000, 10)
+    same = np.arange(10) % 2 == 1
+    kwargs = dict(
+        temperature=temperature, pressure=pressure, total_silicate=10, total_phosphate=2
+    )
+    co2nd = pyco2.sys(
+        2300,
+        2100,
+        1,
+        2,
+        temperature_out=np.where(same, temperature, 25),
+        pressure_out=np.where(same, pressure, 0),
+        **kwargs,
+    )
+    co2nd_diff = pyco2.sys(
+        2300, 2100, 1, 2, temperature_out=25, pressure_out=0, **kwargs
+    )
+    for k in ["pH", "k_carbonic_1", "saturation_aragonite", "isocapnic_quotient"]:
+        assert np.all(co2nd[k + "_out"][same] == co2nd[k][same])
+        k_diff = np.broadcast_to(co2nd_diff[k + "_out"], same.shape)
+        assert np.all(co2nd[k + "_out"][~same] == k_diff[~same])
+    # Everywhere the same, including with `outputs`
+    co2nd = pyco2.sys(
+        2300,
+        2100,
+        1,
+        2,
+        temperature_out=temperature,
+        outputs=["pH", "revelle_factor_out"],
+        **kwargs,
+    )
+    co2nd_all = pyco2.sys(2300, 2100, 1, 2, **kwargs)
+    assert np.all(co2nd["revelle_factor_out"] == co2nd_all["revelle_factor"])
+    # Equilibrium constants provided at input conditions only: nothing is reused
+    co2nd = pyco2.sys(
+        2300, 2100, 1, 2, temperature_out=temperature, k_carbonic_1=1e-6, **kwargs
+    )
+    assert np.all(co2nd["k_carbonic_1"] == 1e-6)
+    assert np.all(co2nd["k_carbonic_1_out"] == co2nd_all["k_carbonic_1"])
+
+
+test_same_conditions_out()
+
+
+def test_Ks_P0():
+    """Do the intermediate values from one pressure give the same equilibrium constants
+    at another pressure?
+    """
+    temperature = np.linspace(0, 30, 16)
+    opt_k_carbonic = np.arange(1, 17)
+    totals = pyco2.salts.assemble(35, 10, 2, 1, 0.5, opt_k_carbonic, 1)
+    args = (totals, 1, opt_k_carbonic, 1, 1, 1)
+    Ks_P0 = {}
+    pyco2.equilibria.assemble(temperature, 0, *args, Ks_P0=Ks_P0)
+    for k in ["KSO4", "fH", "SWStoTOT_P0", "KB", "K1", "K2", "KAr", "K0", "FugFac"]:
+        assert k in Ks_P0
+    Ks_exact = pyco2.equilibria.assemble(temperature, 5000, *args)
+    Ks_P0_before = {k: np.copy(v) for k, v in Ks_P0.items()}
+    Ks = pyco2.equilibria.assemble(temperature, 5000, *args, Ks_P0=Ks_P0)
+    for k, v in Ks_exact.items():
+        assert np.array_equal(Ks[k], v, equal_nan=True)
+    for k, v in Ks_P0.items():
+        assert np.array_equal(v, Ks_P0_before[k], equal_nan=True)
+
+
+test_Ks_P0()
+
+
+def test_minimal_shapes():
+    """Are the results the same whether or not the inputs are broadcast to the full
+    shape before calling `CO2SYS_nd`, and are values that depend only on the smaller
+    inputs evaluated at their own shapes?
+    """
+    salinity = np.vstack([30.0, 35.0, 40.0])
+    temperature = np.linspace(0, 30, 8)
+    kwargs = dict(
+        salinity=salinity,
+        temperature=temperature,
+        temperature_out=temperature,
+        pressure_out=np.array([0.0, 1000.0, 4000.0])[:, np.newaxis, np.newaxis],
+        total_silicate=10,
+    )
+    co2nd = pyco2.sys(2300, 2100, 1, 2, **kwargs)
+    shape = (3, 3, 8)
+    co2nd_full = pyco2.sys(
+        2300,
+        np.full(shape, 2100.0),
+        1,
+        2,
+        **{k: np.broadcast_to(v, shape) for k, v in kwargs.items()},
+    )
+    for k, v in co2nd_full.items():
+        if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+            assert np.ndim(co2nd[k]) == 0 or np.shape(co2nd[k]) == shape
+            assert np.array_equal(np.broadcast_to(co2nd[k], shape), v, equal_nan=True)
+    # Calculated results are writable, even if they were evaluated at a smaller shape
+    for k in ["k_carbonic_1", "total_borate", "pH", "saturation_aragonite_out"]:
+        assert np.shape(co2nd[k]) == shape
+        assert co2nd[k].flags.writeable
+        co2nd[k][0] = 0
+    # The total salts depend only on salinity, so are evaluated at its shape
+    args = pyco2.engine.nd.condition(
+        {"salinity": salinity, "temperature": temperature}, broadcast=False
+    )
+    assert np.shape(args["salinity"]) == (3, 1)
+    assert np.shape(args["temperature"]) == (8,)
+    assert np.shape(pyco2.salts.assemble(args["salinity"], 0, 0, 0, 0, 10, 1)["TB"]) == (
+        3,
+        1,
+    )
+
+
+test_minimal_shapes()
+
+
+def test_chunks():
+    """Are the results the same when CO2SYS_nd is run in chunks, serially or in
+    parallel, with the results in memory or memory-mapped files?
+    """
+    kwargs = dict(
+        salinity=np.vstack([30.0, 35.0, 40.0]),
+        temperature=np.linspace(0, 30, 7),
+        temperature_out=25,
+        pressure_out=np.array([0.0, 1000.0])[:, np.newaxis, np.newaxis],
+        total_silicate=10,
+        opt_k_carbonic=np.vstack([1, 10, 16]),
+    )
+    par1 = np.linspace(2200, 2400, 42).reshape((2, 3, 7))
+    co2nd = pyco2.sys(par1, 2100, 1, 2, **kwargs)
+    with tempfile.TemporaryDirectory() as directory:
+        for chunk_size, memmap_directory in [(1, None), (5, directory), (22, None)]:
+            co2nd_chunks = pyco2.sys(
+                par1,
+                2100,
+                1,
+                2,
+                chunk_size=chunk_size,
+                memmap_directory=memmap_directory,
+                **kwargs,
+            )
+            assert co2nd_chunks.keys() == co2nd.keys()
+            for k, v in co2nd.items():
+                if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+                    assert np.shape(co2nd_chunks[k]) == (2, 3, 7)
+                    assert np.array_equal(co2nd_chunks[k], v, equal_nan=True)
+            if memmap_directory is not None:
+                assert isinstance(co2nd_chunks["pH"], np.memmap)
+            del co2nd_chunks
+        co2nd_chunks = pyco2.sys(par1, 2100, 1, 2, max_memory=1, **kwargs)
+        assert np.array_equal(co2nd_chunks["pH_out"], co2nd["pH_out"])
+        # Chunks solved in parallel by a pool of processes
+        for memmap_directory in [None, directory]:
+            co2nd_pool = pyco2.sys(
+                par1,
+                2100,
+                1,
+                2,
+                n_workers=2,
+                memmap_directory=memmap_directory,
+                **kwargs,
+            )
+            assert co2nd_pool.keys() == co2nd.keys()
+            for k, v in co2nd.items():
+                if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+                    assert np.array_equal(co2nd_pool[k], v, equal_nan=True)
+            del co2nd_pool
+        # Worker processes started with spawn, which pickles the constants cache
+        start_method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method("spawn", force=True)
+        try:
+            co2nd_pool = pyco2.sys(
+                par1,
+                2100,
+                1,
+                2,
+                n_workers=2,
+                constants_cache=pyco2.ConstantsCache(),
+                **kwargs,
+            )
+        finally:
+            multiprocessing.set_start_method(start_method, force=True)
+        for k, v in co2nd.items():
+            if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+                assert np.array_equal(co2nd_pool[k], v, equal_nan=True)
+
+
+test_chunks()
+
+
+def test_threads():
+    """Are the results the same when CO2SYS_nd and CO2SYS are run in chunks in a pool
+    of threads, and are the dicts of provided values left unmodified?
+    """
+    kwargs = dict(
+        salinity=np.vstack([30.0, 35.0, 40.0]),
+        temperature=np.linspace(0, 30, 7),
+        temperature_out=25,
+        total_silicate=10,
+        opt_k_carbonic=np.vstack([1, 10, 16]),
+    )
+    par1 = np.linspace(2200, 2400, 21).reshape((3, 7))
+    co2nd = pyco2.sys(par1, 2100, 1, 2, **kwargs)
+    cache = pyco2.ConstantsCache()
+    for extra in [{}, {"chunk_size": 2, "constants_cache": cache}]:
+        co2nd_threads = pyco2.sys(par1, 2100, 1, 2, n_threads=3, **extra, **kwargs)
+        assert co2nd_threads.keys() == co2nd.keys()
+        for k, v in co2nd.items():
+            if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+                assert np.array_equal(co2nd_threads[k], v, equal_nan=True)
+    npts = 50
+    totals = {"TB": np.full(npts, 400.0)}
+    equilibria_in = {"K1": np.full(npts, 1e-6)}
+    args = (np.linspace(2200, 2400, npts), 2100, 1, 2, 35, 10, 25, 0, 1000, 10, 1)
+    co2dict = pyco2.CO2SYS(
+        *args, 1, 10, 3, totals=totals, equilibria_in=equilibria_in,
+    )
+    co2dict_threads = pyco2.CO2SYS(
+        *args, 1, 10, 3, totals=totals, equilibria_in=equilibria_in, n_threads=4,
+    )
+    assert co2dict_threads.keys() == co2dict.keys()
+    for k, v in co2dict.items():
+        assert np.array_equal(co2dict_threads[k], v)
+    assert list(totals) == ["TB"]
+    assert list(equilibria_in) == ["K1"]
+
+
+test_threads()
+
+
+def test_lazy():
+    """Do lazy results have the same keys and values as the results dict, and are
+    they calculated only when they are accessed?
+    """
+    temperature = np.linspace(0, 30, 10)
+    kwargs = dict(
+        temperature=temperature,
+        temperature_out=np.where(np.arange(10) % 2 == 1, temperature, 25),
+        pressure=np.vstack([0, 1000]),
+        total_silicate=10,
+        buffers_mode=np.array(["auto", "explicit"] * 5),
+        solver_diagnostics=True,
+    )
+    co2nd = pyco2.sys(2300, 2100, 1, 2, **kwargs)
+    co2nd_lazy = pyco2.sys(2300, 2100, 1, 2, lazy=True, **kwargs)
+    assert isinstance(co2nd_lazy, pyco2.engine.nd.LazyResults)
+    assert list(co2nd_lazy) == list(co2nd)
+    assert len(co2nd_lazy._values) == 0
+    assert np.array_equal(co2nd_lazy["gamma_dic_out"], co2nd["gamma_dic_out"])
+    assert len(co2nd_lazy._values) == 1
+    assert "HCO3_out" in co2nd_lazy and "not_a_key" not in co2nd_lazy
+    for k, v in co2nd_lazy.items():
+        if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+            assert np.array_equal(v, co2nd[k], equal_nan=True), k
+    # With `outputs`, and through a CO2SYSPlan
+    outputs = ["pH", "pCO2_out", "saturation_aragonite", "substrate_inhibitor_ratio"]
+    plan = pyco2.CO2SYSPlan(1, 2, outputs=outputs, lazy=True)
+    co2nd_plan = plan.solve(2300, 2100, temperature=temperature, temperature_out=25)
+    co2nd = pyco2.sys(
+        2300, 2100, 1, 2, temperature=temperature, temperature_out=25, outputs=outputs
+    )
+    assert list(co2nd_plan) == list(co2nd)
+    for k, v in co2nd.items():
+        assert np.array_equal(co2nd_plan[k], v), k
+
+
+test_lazy()
+
+
+def test_precomputed():
+    """Are the total salts and equilibrium constants added to a `precomputed` dict, and
+    are the same results found when they are reused?
+    """
+    temperature = np.linspace(0, 30, 10)
+    kwargs = dict(
+        temperature=temperature,
+        temperature_out=np.where(np.arange(10) % 2 == 1, temperature, 25),
+        pressure=np.vstack([0, 1000]),
+        total_silicate=10,
+    )
+    precomputed = {}
+    co2nd = pyco2.sys(2300, 2100, 1, 2, precomputed=precomputed, **kwargs)
+    assert set(precomputed) == {"totals", "k_constants_in", "k_constants_out"}
+    K1_out = co2nd["k_carbonic_1_out"]
+    assert np.array_equal(
+        np.broadcast_to(precomputed["k_constants_out"]["K1"], K1_out.shape), K1_out
+    )
+    # Only the equilibrium constants at input conditions depend on k_carbonic_1, and
+    # it is put straight into them, so everything can be reused
+    kwargs_plus = {**kwargs, "k_carbonic_1": 1e-6}
+    assert pyco2.engine.nd.stages_affected("par1", kwargs_plus) == set()
+    assert pyco2.engine.nd.stages_affected("k_carbonic_1", kwargs_plus) == {
+        "k_constants_in"
+    }
+    assert pyco2.engine.nd.stages_affected("pressure", kwargs_plus) == {
+        "k_constants_in",
+        "k_constants_out",
+    }
+    reused = pyco2.engine.nd.reuse_stages(precomputed, kwargs_plus, ["k_carbonic_1"])
+    assert set(reused) == set(precomputed)
+    assert reused["k_constants_in"]["K1"] == 1e-6
+    assert pyco2.engine.nd.reuse_stages(precomputed, kwargs, ["salinity"]) == {}
+    co2nd = pyco2.sys(2200, 2100, 1, 2, **kwargs_plus)
+    co2nd_reused = pyco2.sys(2200, 2100, 1, 2, precomputed=reused, **kwargs_plus)
+    for k, v in co2nd.items():
+        if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float):
+            assert np.array_equal(co2nd_reused[k], v, equal_nan=True), k
+
+
+test_precomputed()
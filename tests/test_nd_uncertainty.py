@@ -76,3 +76,76 @@ test_uncertainty_old_new()
 uncertainties_pk, components_pk = pyco2.uncertainty.propagate_nd(
     results, uncertainties_into, pyco2.uncertainty.pKs_OEDG18, **kwargs
 )
+
+
+def test_batch():
+    """Are the derivatives the same when all the perturbations are solved together?"""
+    grads_of_batch = grads_of + ["isocapnic_quotient", "k_carbonic_2", "pH_out"]
+    grads_wrt_batch = grads_wrt + ["pk_carbonic_2", "pk_bisulfate", "salinity"]
+    kwargs_batch = {**kwargs, "temperature_out": 10}
+    results_batch = pyco2.sys(par1, par2, par1_type, par2_type, **kwargs_batch)
+    derivs, dxs = pyco2.uncertainty.forward_nd(
+        results_batch, grads_of_batch, grads_wrt_batch, **kwargs_batch
+    )
+    derivs_batch, dxs_batch = pyco2.uncertainty.forward_nd(
+        results_batch, grads_of_batch, grads_wrt_batch, batch=True, **kwargs_batch
+    )
+    assert dxs_batch == dxs
+    for of in grads_of_batch:
+        for wrt in grads_wrt_batch:
+            v = derivs_batch[of][wrt]
+            assert np.array_equal(np.broadcast_to(derivs[of][wrt], v.shape), v), (
+                of,
+                wrt,
+            )
+    uncertainties_batch = pyco2.uncertainty.propagate_nd(
+        results, uncertainties_into, uncertainties_from, batch=True, **kwargs
+    )[0]
+    for u_into in uncertainties_into:
+        assert np.array_equal(uncertainties_batch[u_into], uncertainties[u_into])
+
+
+test_batch()
+
+
+def test_reuse():
+    """Are the derivatives the same as when each perturbation is solved from scratch,
+    without reusing the total salts and equilibrium constants?
+    """
+    kwargs_reuse = {**kwargs, "temperature_out": 10, "total_borate": 400.0}
+    args = dict(
+        par1=par1, par2=par2, par1_type=par1_type, par2_type=par2_type, **kwargs_reuse
+    )
+    results_reuse = pyco2.sys(**args)
+    args = {k: results_reuse[k] for k in args}
+    grads_of_reuse = ["pH", "pH_out", "isocapnic_quotient_out", "k_carbonic_2_out"]
+    grads_wrt_reuse = [
+        "par1",
+        "total_borate",
+        "pk_carbonic_2",
+        "k_carbonic_1",
+        "temperature",
+        "total_fluoride",
+    ]
+    for batch in [False, True]:
+        derivs, dxs = pyco2.uncertainty.forward_nd(
+            results_reuse, grads_of_reuse, grads_wrt_reuse, batch=batch, **kwargs_reuse
+        )
+        for wrt in grads_wrt_reuse:
+            if wrt.startswith("pk_"):
+                key = wrt[1:]
+                value = 10.0 ** -(-np.log10(results_reuse[key]) + dxs[wrt])
+            else:
+                key = wrt
+                value = results_reuse[wrt] + dxs[wrt]
+            results_plus = pyco2.sys(**{**args, key: value})
+            for of in grads_of_reuse:
+                v = derivs[of][wrt]
+                deriv = (results_plus[of] - results_reuse[of]) / dxs[wrt]
+                assert np.array_equal(np.broadcast_to(deriv, np.shape(v)), v), (
+                    of,
+                    wrt,
+                )
+
+
+test_reuse()
@@ -0,0 +1,42 @@
+import os, time
+import numpy as np, PyCO2SYS as pyco2
+
+# Time pyco2.sys serially and with increasing numbers of worker processes or threads
+npts = 10 ** 6
+rng = np.random.default_rng(7)
+kwargs = dict(
+    par1=rng.uniform(2200, 2400, npts),
+    par2=rng.uniform(1900, 2200, npts),
+    par1_type=1,
+    par2_type=2,
+    salinity=rng.uniform(30, 38, npts),
+    temperature=rng.uniform(0, 30, npts),
+    pressure=rng.uniform(0, 5000, npts),
+    temperature_out=25,
+    total_silicate=10,
+    total_phosphate=1,
+)
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    serial = pyco2.sys(**kwargs)
+    time_serial = time.perf_counter() - start
+    print("{} points on {} cores".format(npts, os.cpu_count()))
+    print("Serial:    {:6.2f} s".format(time_serial))
+    for mode in ["n_workers", "n_threads"]:
+        n = 1
+        while n <= os.cpu_count():
+            start = time.perf_counter()
+            parallel = pyco2.sys(**kwargs, **{mode: n})
+            time_parallel = time.perf_counter() - start
+            assert all(
+                np.array_equal(parallel[k], v, equal_nan=True)
+                for k, v in serial.items()
+                if np.ndim(v) > 0 and isinstance(np.ravel(v)[0], float)
+            )
+            print(
+                "{:3d} {:7s}: {:6.2f} s (speedup {:.2f}x)".format(
+                    n, mode[2:], time_parallel, time_serial / time_parallel
+                )
+            )
+            n *= 2